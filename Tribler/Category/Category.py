@@ -36,6 +36,7 @@ class Category(object):
             self.category_info = []
             self._logger.critical('', exc_info=True)
 
+        self._compiled_categories = None
         self.xxx_filter = XXXFilter(self.install_dir)
 
         self._logger.debug("category: Categories defined by user: %s", self.getCategoryNames())
@@ -96,8 +97,9 @@ class Category(object):
         torrent_category = None
         # filename_list ready
         strongest_cat = 0.0
-        for category in self.category_info:  # for each category
-            (decision, strength) = self.judge(category, files_list, display_name)
+        categories = self.category_info
+        judgements = self._judge_categories(categories, self._get_compiled_categories(), files_list, display_name)
+        for category, (decision, strength) in zip(categories, judgements):
             if decision and (strength > strongest_cat):
                 torrent_category = category['name']
                 strongest_cat = strength
@@ -110,65 +112,78 @@ class Category(object):
     # judge whether a torrent file belongs to a certain category
     # return bool
     def judge(self, category, files_list, display_name=''):
+        return self._judge_categories([category], compile_categories([category]), files_list, display_name)[0]
+
+    def _get_compiled_categories(self):
+        """
+        Return the suffix tuples and keyword index of the current categories, (re)building them when the category
+        information has been replaced.
+        """
+        if self._compiled_categories is None or self._compiled_categories[0] is not self.category_info:
+            self._compiled_categories = (self.category_info, compile_categories(self.category_info))
+        return self._compiled_categories[1]
+
+    def _get_keyword_factors(self, string, keyword_index, num_categories):
+        factors = [1.0] * num_categories
+        for word in set(self._getWords(string)):
+            for index, weight in keyword_index.get(word, ()):
+                factors[index] *= 1 - weight
+        return factors
+
+    def _judge_categories(self, categories, compiled_categories, files_list, display_name):
+        """
+        Judge whether a torrent belongs to each of the given categories, scoring all categories in a single pass over
+        the files of the torrent.
+        :return: a list with a (decision, strength) tuple for each category
+        """
+        suffixes, keyword_index = compiled_categories
+        num_categories = len(categories)
+        judgements = [None] * num_categories
 
         # judge file keywords
-        display_name = display_name.lower()
-        factor = 1.0
-        fileKeywords = self._getWords(display_name)
-
-        for ikeywords in category['keywords'].keys():
-            try:
-                fileKeywords.index(ikeywords)
-                factor *= 1 - category['keywords'][ikeywords]
-            except ValueError:
-                pass
-        if (1 - factor) > 0.5:
-            if 'strength' in category:
-                return (True, category['strength'])
-            else:
-                return (True, (1 - factor))
+        name_factors = self._get_keyword_factors(display_name.lower(), keyword_index, num_categories)
+        for index, category in enumerate(categories):
+            if (1 - name_factors[index]) > 0.5:
+                judgements[index] = (True, category.get('strength', 1 - name_factors[index]))
+
+        pending = [index for index in xrange(num_categories) if judgements[index] is None]
+        if not pending:
+            return judgements
 
         # judge each file
-        matchSize = 0
-        totalSize = 1e-19
+        match_sizes = [0] * num_categories
+        total_size = 1e-19
         for name, length in files_list:
-            totalSize += length
-            # judge file size
-            if length < category['minfilesize'] or 0 < category['maxfilesize'] < length:
-                continue
-
-            # judge file suffix
-            OK = False
-            for isuffix in category['suffix']:
-                if name.lower().endswith(isuffix):
-                    OK = True
-                    break
-            if OK:
-                matchSize += length
-                continue
-
-            # judge file keywords
-            factor = 1.0
-            fileKeywords = self._getWords(name.lower())
-
-            for ikeywords in category['keywords'].keys():
-                try:
-                    fileKeywords.index(ikeywords)
-                    # print ikeywords
-                    factor *= 1 - category['keywords'][ikeywords]
-                except ValueError:
-                    pass
-            if factor < 0.5:
-                matchSize += length
+            total_size += length
+            name = name.lower()
+            file_factors = None
+            for index in pending:
+                category = categories[index]
+                # judge file size
+                if length < category['minfilesize'] or 0 < category['maxfilesize'] < length:
+                    continue
+
+                # judge file suffix
+                if name.endswith(suffixes[index]):
+                    match_sizes[index] += length
+                    continue
+
+                # judge file keywords, the words of a file are only extracted once for all categories
+                if file_factors is None:
+                    file_factors = self._get_keyword_factors(name, keyword_index, num_categories)
+                if file_factors[index] < 0.5:
+                    match_sizes[index] += length
 
         # match file
-        if (matchSize / totalSize) >= category['matchpercentage']:
-            if 'strength' in category:
-                return True, category['strength']
+        for index in pending:
+            category = categories[index]
+            match_ratio = match_sizes[index] / total_size
+            if match_ratio >= category['matchpercentage']:
+                judgements[index] = (True, category.get('strength', match_ratio))
             else:
-                return True, (matchSize / totalSize)
+                judgements[index] = (False, 0)
 
-        return False, 0
+        return judgements
 
     WORDS_REGEXP = re.compile('[a-zA-Z0-9]+')
 
@@ -208,6 +223,21 @@ class Category(object):
         return ''
 
 
+def compile_categories(categories):
+    """
+    Precompute the data needed to judge files against all given categories at once.
+    :return: a tuple with the suffix tuple of each category and an index mapping each keyword to a list of
+    (category index, weight) tuples.
+    """
+    suffixes = []
+    keyword_index = {}
+    for index, category in enumerate(categories or []):
+        suffixes.append(tuple(category['suffix']))
+        for keyword, weight in category['keywords'].iteritems():
+            keyword_index.setdefault(keyword, []).append((index, weight))
+    return suffixes, keyword_index
+
+
 def cmp_rank(a, b):
     if not ('rank' in a):
         return 1
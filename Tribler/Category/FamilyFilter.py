@@ -18,6 +18,7 @@ class XXXFilter(object):
 
         termfilename = os.path.join(install_dir, LIBRARYNAME, 'Category', 'filter_terms.filter')
         self.xxx_terms, self.xxx_searchterms = self.initTerms(termfilename)
+        self.xxx_searchterms_regexp = self.compileSearchTerms(self.xxx_searchterms)
 
     def initTerms(self, filename):
         terms = set()
@@ -39,6 +40,17 @@ class XXXFilter(object):
         self._logger.debug('Read %d XXX terms from file %s', len(terms) + len(searchterms), filename)
         return terms, searchterms
 
+    def compileSearchTerms(self, searchterms):
+        """
+        Compile all substring search terms into a single regular expression, so a string can be checked against
+        every term in one pass instead of doing a substring scan per term.
+        """
+        if not searchterms:
+            return None
+        # Longest terms first, so the reported match is the most specific one
+        ordered_terms = sorted(searchterms, key=lambda term: (-len(term), term))
+        return re.compile('|'.join(re.escape(term) for term in ordered_terms))
+
     def _getWords(self, string):
         return [a.lower() for a in WORDS_REGEXP.findall(string)]
 
@@ -64,21 +76,24 @@ class XXXFilter(object):
         s = s.lower()
         if self.isXXXTerm(s):  # We have also put some full titles in the filter file
             return True
-        if not self.isAudio(s) and self.foundXXXTerm(s):
+        is_audio = self.isAudio(s)
+        if not is_audio and self.foundXXXTerm(s):
             return True
         words = self._getWords(s)
         words2 = [' '.join(words[i:i + 2]) for i in xrange(0, len(words) - 1)]
         num_xxx = len([w for w in words + words2 if self.isXXXTerm(w, s)])
-        if isFilename and self.isAudio(s):
+        if isFilename and is_audio:
             return num_xxx > 2  # almost never classify mp3 as porn
         else:
             return num_xxx > 0
 
     def foundXXXTerm(self, s):
-        for term in self.xxx_searchterms:
-            if term in s:
-                self._logger.debug('XXXFilter: Found term "%s" in %s', term, s)
-                return True
+        if self.xxx_searchterms_regexp is None:
+            return False
+        match = self.xxx_searchterms_regexp.search(s)
+        if match:
+            self._logger.debug('XXXFilter: Found term "%s" in %s', match.group(0), s)
+            return True
         return False
 
     def isXXXTerm(self, s, title=None):
@@ -10,23 +10,21 @@ import time as timemod
 from glob import iglob
 from threading import Event, enumerate as enumerate_threads
 from traceback import print_exc
-from twisted.internet.defer import inlineCallbacks
+from twisted.internet.defer import Deferred, maybeDeferred
 
 from twisted.internet import reactor
 
+from Tribler.Core.APIImplementation.shutdownplanner import ShutdownPlanner
+from Tribler.Core.APIImplementation.startupplanner import StartupPlanner
 from Tribler.Core.APIImplementation.threadpoolmanager import ThreadPoolManager
 from Tribler.Core.CacheDB.sqlitecachedb import forceDBThread
 from Tribler.Core.DownloadConfig import DownloadStartupConfig, DefaultDownloadStartupConfig
-from Tribler.Core.Modules.restapi.rest_manager import RESTManager
-from Tribler.Core.Modules.search_manager import SearchManager
-from Tribler.Core.Modules.versioncheck_manager import VersionCheckManager
-from Tribler.Core.Modules.watch_folder import WatchFolder
 from Tribler.Core.TorrentDef import TorrentDef, TorrentDefNoMetainfo
 from Tribler.Core.Utilities.configparser import CallbackConfigParser
-from Tribler.Core.Video.VideoPlayer import VideoPlayer
+from Tribler.Core.Utilities.metrics import registry
+from Tribler.Core.Utilities.twisted_utils import callInThreadPool
 from Tribler.Core.exceptions import DuplicateDownloadException
 from Tribler.Core.simpledefs import NTFY_DISPERSY, NTFY_STARTED, NTFY_TORRENTS, NTFY_UPDATE
-from Tribler.community.tunnel.tunnel_community import TunnelSettings
 from Tribler.dispersy.taskmanager import TaskManager
 from Tribler.dispersy.util import blockingCallFromThread, blocking_call_on_reactor_thread
 
@@ -41,6 +39,8 @@ if sys.platform == 'win32':
 else:
     SOCKET_BLOCK_ERRORCODE = errno.EWOULDBLOCK
 
+EARLY_SHUTDOWN_DEADLINE = 30.0  # seconds
+
 
 # Internal classes
 #
@@ -53,6 +53,7 @@ class TriblerLaunchMany(TaskManager):
         super(TriblerLaunchMany, self).__init__()
 
         self.initComplete = False
+        self.core_init_complete = False
         self.registered = False
         self.dispersy = None
 
@@ -68,7 +69,12 @@ class TriblerLaunchMany(TaskManager):
         self.shutdownstarttime = None
 
         # modules
+        self.startup_planner = StartupPlanner()
+        self.background_startup_done = None
         self.threadpool = ThreadPoolManager()
+        self.reactor_monitor = None
+        self.profiler = None
+        self.statistics = None
         self.torrent_store = None
         self.metadata_store = None
         self.rtorrent_handler = None
@@ -145,172 +151,228 @@ class TriblerLaunchMany(TaskManager):
                 self.tracker_manager.initialize()
 
             if self.session.get_videoplayer():
+                from Tribler.Core.Video.VideoPlayer import VideoPlayer
                 self.videoplayer = VideoPlayer(self.session)
 
-            # Dispersy
-            self.tftp_handler = None
-            if self.session.get_dispersy():
-                from Tribler.dispersy.dispersy import Dispersy
-                from Tribler.dispersy.endpoint import StandaloneEndpoint
-
-                # set communication endpoint
-                endpoint = StandaloneEndpoint(self.session.get_dispersy_port(), ip=self.session.get_ip())
-
-                working_directory = unicode(self.session.get_state_dir())
-                self.dispersy = Dispersy(endpoint, working_directory)
-
-                # register TFTP service
-                from Tribler.Core.TFTP.handler import TftpHandler
-                self.tftp_handler = TftpHandler(self.session, endpoint, "fffffffd".decode('hex'), block_size=1024)
-                self.tftp_handler.initialize()
-
-            if self.session.get_enable_torrent_search() or self.session.get_enable_channel_search():
-                self.search_manager = SearchManager(self.session)
-                self.search_manager.initialize()
-
         if not self.initComplete:
             self.init()
 
     def init(self):
-        if self.dispersy:
-            from Tribler.dispersy.community import HardKilledCommunity
+        """
+        Start the components in stages. The components needed to resume downloads and to serve the REST API, and
+        Dispersy (which callers use as soon as the session has started), are started right away. The remaining ones
+        (the communities, the mainline DHT, torrent checking and collecting) are started in the background.
+        initComplete is set once all stages have been run.
+        """
+        core_stages = []
+        if self.session.get_reactor_monitor_enabled():
+            core_stages.append((u"reactor_monitor", self._start_reactor_monitor))
+        if self.session.get_dispersy():
+            core_stages.append((u"dispersy", self._start_dispersy))
+        if self.session.get_libtorrent():
+            core_stages.append((u"libtorrent", self._start_libtorrent))
+        if self.session.get_http_api_enabled():
+            core_stages.append((u"rest_api", self._start_rest_api))
+        if self.session.get_watch_folder_enabled():
+            core_stages.append((u"watch_folder", self._start_watch_folder))
+        core_stages.append((u"version_check", self._start_version_check))
+        self.startup_planner.run_stages(core_stages)
+        self.core_init_complete = True
 
-            self._logger.info("lmc: Starting Dispersy...")
+        self.background_startup_done = Deferred()
+        callInThreadPool(self._start_background_components)
 
-            now = timemod.time()
-            success = self.dispersy.start(self.session.autoload_discovery)
+    def _start_background_components(self):
+        try:
+            self._run_background_stages()
+        finally:
+            reactor.callFromThread(self.background_startup_done.callback, None)
+
+    def _run_background_stages(self):
+        background_stages = []
+        if self.session.get_dispersy():
+            background_stages.append((u"communities", self._load_communities))
+        if self.session.get_enable_torrent_search() or self.session.get_enable_channel_search():
+            background_stages.append((u"search_manager", self._start_search_manager))
+        if self.session.get_dispersy() and self.session.get_enable_channel_search():
+            background_stages.append((u"channel_manager", self._start_channel_manager))
+        background_stages.append((u"mainline_dht", self._start_mainline_dht))
+        if self.session.get_torrent_checking():
+            background_stages.append((u"torrent_checker", self._start_torrent_checker))
+        if self.rtorrent_handler:
+            background_stages.append((u"rtorrent_handler", self.rtorrent_handler.initialize))
+        self.startup_planner.run_stages(background_stages)
 
-            diff = timemod.time() - now
-            if success:
-                self._logger.info("lmc: Dispersy started successfully in %.2f seconds [port: %d]",
-                                  diff, self.dispersy.wan_address[1])
-            else:
-                self._logger.info("lmc: Dispersy failed to start in %.2f seconds", diff)
+        self.initComplete = True
 
-            self.upnp_ports.append((self.dispersy.wan_address[1], 'UDP'))
+    def _add_upnp_mapping(self, port, protocol):
+        self.upnp_ports.append((port, protocol))
+        if self.ltmgr:
+            self.ltmgr.add_upnp_mapping(port, protocol)
+
+    def _start_libtorrent(self):
+        from Tribler.Core.Libtorrent.LibtorrentMgr import LibtorrentMgr
+        self.ltmgr = LibtorrentMgr(self.session)
+        self.ltmgr.initialize()
+        for port, protocol in self.upnp_ports:
+            self.ltmgr.add_upnp_mapping(port, protocol)
+
+    def _start_reactor_monitor(self):
+        from Tribler.Core.Utilities.instrumentation import REACTOR_LAG_BUCKETS, ReactorMonitor
+        lag_histogram = registry.histogram(u"tribler_reactor_lag_seconds", u"Delay of scheduled calls on the reactor",
+                                           buckets=REACTOR_LAG_BUCKETS).labels()
+        self.reactor_monitor = ReactorMonitor(slow_call_threshold=self.session.get_reactor_monitor_slow_call_threshold(),
+                                              lag_histogram=lag_histogram)
+        if self.session.sqlite_db:
+            self.session.sqlite_db.slow_call_tracer = self.reactor_monitor.tracer
+        reactor.callFromThread(self.reactor_monitor.start)
+
+    def _start_rest_api(self):
+        from Tribler.Core.Modules.restapi.rest_manager import RESTManager
+        self.api_manager = RESTManager(self.session)
+        self.api_manager.start()
+
+    def _start_watch_folder(self):
+        from Tribler.Core.Modules.watch_folder import WatchFolder
+        self.watch_folder = WatchFolder(self.session)
+        self.watch_folder.start()
+
+    def _start_version_check(self):
+        from Tribler.Core.Modules.versioncheck_manager import VersionCheckManager
+        self.version_check_manager = VersionCheckManager(self.session)
 
-            from Tribler.dispersy.crypto import M2CryptoSK
-            self.session.dispersy_member = blockingCallFromThread(reactor, self.dispersy.get_member,
-                                                                  private_key=self.dispersy.crypto.key_to_bin(M2CryptoSK(filename=self.session.get_permid_keypair_filename())))
+    def _start_dispersy(self):
+        from Tribler.dispersy.community import HardKilledCommunity
+        from Tribler.dispersy.dispersy import Dispersy
+        from Tribler.dispersy.endpoint import StandaloneEndpoint
 
-            blockingCallFromThread(reactor, self.dispersy.define_auto_load, HardKilledCommunity,
-                                   self.session.dispersy_member, load=True)
+        # set communication endpoint
+        endpoint = StandaloneEndpoint(self.session.get_dispersy_port(), ip=self.session.get_ip())
 
-            if self.session.get_megacache():
-                self.dispersy.database.attach_commit_callback(self.session.sqlite_db.commit_now)
-
-            # notify dispersy finished loading
-            self.session.notifier.notify(NTFY_DISPERSY, NTFY_STARTED, None)
-
-            @blocking_call_on_reactor_thread
-            def load_communities():
-                self._logger.info("tribler: Preparing communities...")
-                now_time = timemod.time()
-                default_kwargs = {'tribler_session': self.session}
-
-                # Search Community
-                if self.session.get_enable_torrent_search():
-                    from Tribler.community.search.community import SearchCommunity
-                    self.dispersy.define_auto_load(SearchCommunity, self.session.dispersy_member, load=True,
-                                                   kargs=default_kwargs)
-
-                # AllChannel Community
-                if self.session.get_enable_channel_search():
-                    from Tribler.community.allchannel.community import AllChannelCommunity
-                    self.dispersy.define_auto_load(AllChannelCommunity, self.session.dispersy_member, load=True,
-                                                   kargs=default_kwargs)
-
-                # Bartercast Community
-                if self.session.get_barter_community_enabled():
-                    from Tribler.community.bartercast4.community import BarterCommunity
-                    self.dispersy.define_auto_load(BarterCommunity, self.session.dispersy_member, load=True)
-
-                # Channel Community
-                if self.session.get_channel_community_enabled():
-                    from Tribler.community.channel.community import ChannelCommunity
-                    self.dispersy.define_auto_load(ChannelCommunity,
-                                                   self.session.dispersy_member, load=True, kargs=default_kwargs)
-
-                # PreviewChannel Community
-                if self.session.get_preview_channel_community_enabled():
-                    from Tribler.community.channel.preview import PreviewChannelCommunity
-                    self.dispersy.define_auto_load(PreviewChannelCommunity,
-                                                   self.session.dispersy_member, kargs=default_kwargs)
-
-                if self.session.get_tunnel_community_enabled():
-                    tunnel_settings = TunnelSettings(tribler_session=self.session)
-                    tunnel_kwargs = {'tribler_session': self.session, 'settings': tunnel_settings}
-
-                    if self.session.get_enable_multichain():
-                        # If the multichain is enabled, we use the permanent multichain keypair
-                        # for both the multichain and the tunnel community
-                        keypair = self.session.multichain_keypair
-                        dispersy_member = self.dispersy.get_member(private_key=keypair.key_to_bin())
-
-                        from Tribler.community.multichain.community import MultiChainCommunity
-                        self.dispersy.define_auto_load(MultiChainCommunity, dispersy_member, load=True)
-
-                        from Tribler.community.tunnel.hidden_community_multichain import HiddenTunnelCommunityMultichain
-                        self.tunnel_community = self.dispersy.define_auto_load(
-                            HiddenTunnelCommunityMultichain, dispersy_member, load=True, kargs=tunnel_kwargs)[0]
-                    else:
-                        keypair = self.dispersy.crypto.generate_key(u"curve25519")
-                        dispersy_member = self.dispersy.get_member(private_key=self.dispersy.crypto.key_to_bin(keypair))
+        working_directory = unicode(self.session.get_state_dir())
+        self.dispersy = Dispersy(endpoint, working_directory)
 
-                        from Tribler.community.tunnel.hidden_community import HiddenTunnelCommunity
-                        self.tunnel_community = self.dispersy.define_auto_load(
-                            HiddenTunnelCommunity, dispersy_member, load=True, kargs=tunnel_kwargs)[0]
+        # register TFTP service
+        from Tribler.Core.TFTP.handler import TftpHandler
+        self.tftp_handler = TftpHandler(self.session, endpoint, "fffffffd".decode('hex'), block_size=1024)
+        self.tftp_handler.initialize()
 
-                self.session.set_anon_proxy_settings(2, ("127.0.0.1",
-                                                         self.session.get_tunnel_community_socks5_listen_ports()))
+        self._logger.info("lmc: Starting Dispersy...")
 
-                self._logger.info("tribler: communities are ready in %.2f seconds", timemod.time() - now_time)
+        now = timemod.time()
+        success = self.dispersy.start(self.session.autoload_discovery)
 
-            load_communities()
+        diff = timemod.time() - now
+        if success:
+            self._logger.info("lmc: Dispersy started successfully in %.2f seconds [port: %d]",
+                              diff, self.dispersy.wan_address[1])
+        else:
+            self._logger.info("lmc: Dispersy failed to start in %.2f seconds", diff)
 
-            if self.session.get_enable_channel_search():
-                from Tribler.Core.Modules.channel.channel_manager import ChannelManager
-                self.channel_manager = ChannelManager(self.session)
-                self.channel_manager.initialize()
+        self._add_upnp_mapping(self.dispersy.wan_address[1], 'UDP')
 
-        from Tribler.Core.DecentralizedTracking import mainlineDHT
-        try:
-            self.mainline_dht = mainlineDHT.init(('127.0.0.1', self.session.get_mainline_dht_listen_port()),
-                                                 self.session.get_state_dir())
-            self.upnp_ports.append((self.session.get_mainline_dht_listen_port(), 'UDP'))
-        except:
-            print_exc()
+        from Tribler.dispersy.crypto import M2CryptoSK
+        self.session.dispersy_member = blockingCallFromThread(reactor, self.dispersy.get_member,
+                                                              private_key=self.dispersy.crypto.key_to_bin(M2CryptoSK(filename=self.session.get_permid_keypair_filename())))
 
-        if self.session.get_libtorrent():
-            from Tribler.Core.Libtorrent.LibtorrentMgr import LibtorrentMgr
-            self.ltmgr = LibtorrentMgr(self.session)
-            self.ltmgr.initialize()
-            for port, protocol in self.upnp_ports:
-                self.ltmgr.add_upnp_mapping(port, protocol)
+        blockingCallFromThread(reactor, self.dispersy.define_auto_load, HardKilledCommunity,
+                               self.session.dispersy_member, load=True)
 
-        # add task for tracker checking
-        if self.session.get_torrent_checking():
-            try:
-                from Tribler.Core.TorrentChecker.torrent_checker import TorrentChecker
-                self.torrent_checker = TorrentChecker(self.session)
-                self.torrent_checker.initialize()
-            except:
-                print_exc()
+        if self.session.get_megacache():
+            self.dispersy.database.attach_commit_callback(self.session.sqlite_db.commit_now)
+
+        from Tribler.Core.statistics import TriblerStatistics
+        self.statistics = TriblerStatistics(self.session)
+        registry.register_collector(self.statistics.collect_metrics)
+
+        # notify dispersy finished loading
+        self.session.notifier.notify(NTFY_DISPERSY, NTFY_STARTED, None)
+
+    @blocking_call_on_reactor_thread
+    def _load_communities(self):
+        self._logger.info("tribler: Preparing communities...")
+        now_time = timemod.time()
+        default_kwargs = {'tribler_session': self.session}
+
+        # Search Community
+        if self.session.get_enable_torrent_search():
+            from Tribler.community.search.community import SearchCommunity
+            self.dispersy.define_auto_load(SearchCommunity, self.session.dispersy_member, load=True,
+                                           kargs=default_kwargs)
+
+        # AllChannel Community
+        if self.session.get_enable_channel_search():
+            from Tribler.community.allchannel.community import AllChannelCommunity
+            self.dispersy.define_auto_load(AllChannelCommunity, self.session.dispersy_member, load=True,
+                                           kargs=default_kwargs)
+
+        # Bartercast Community
+        if self.session.get_barter_community_enabled():
+            from Tribler.community.bartercast4.community import BarterCommunity
+            self.dispersy.define_auto_load(BarterCommunity, self.session.dispersy_member, load=True)
+
+        # Channel Community
+        if self.session.get_channel_community_enabled():
+            from Tribler.community.channel.community import ChannelCommunity
+            self.dispersy.define_auto_load(ChannelCommunity,
+                                           self.session.dispersy_member, load=True, kargs=default_kwargs)
+
+        # PreviewChannel Community
+        if self.session.get_preview_channel_community_enabled():
+            from Tribler.community.channel.preview import PreviewChannelCommunity
+            self.dispersy.define_auto_load(PreviewChannelCommunity,
+                                           self.session.dispersy_member, kargs=default_kwargs)
+
+        if self.session.get_tunnel_community_enabled():
+            from Tribler.community.tunnel.tunnel_community import TunnelSettings
+            tunnel_settings = TunnelSettings(tribler_session=self.session)
+            tunnel_kwargs = {'tribler_session': self.session, 'settings': tunnel_settings}
+
+            if self.session.get_enable_multichain():
+                # If the multichain is enabled, we use the permanent multichain keypair
+                # for both the multichain and the tunnel community
+                keypair = self.session.multichain_keypair
+                dispersy_member = self.dispersy.get_member(private_key=keypair.key_to_bin())
+
+                from Tribler.community.multichain.community import MultiChainCommunity
+                self.dispersy.define_auto_load(MultiChainCommunity, dispersy_member, load=True)
+
+                from Tribler.community.tunnel.hidden_community_multichain import HiddenTunnelCommunityMultichain
+                self.tunnel_community = self.dispersy.define_auto_load(
+                    HiddenTunnelCommunityMultichain, dispersy_member, load=True, kargs=tunnel_kwargs)[0]
+            else:
+                keypair = self.dispersy.crypto.generate_key(u"curve25519")
+                dispersy_member = self.dispersy.get_member(private_key=self.dispersy.crypto.key_to_bin(keypair))
 
-        if self.rtorrent_handler:
-            self.rtorrent_handler.initialize()
+                from Tribler.community.tunnel.hidden_community import HiddenTunnelCommunity
+                self.tunnel_community = self.dispersy.define_auto_load(
+                    HiddenTunnelCommunity, dispersy_member, load=True, kargs=tunnel_kwargs)[0]
 
-        if self.session.get_http_api_enabled():
-            self.api_manager = RESTManager(self.session)
-            self.api_manager.start()
+        self.session.set_anon_proxy_settings(2, ("127.0.0.1",
+                                                 self.session.get_tunnel_community_socks5_listen_ports()))
 
-        if self.session.get_watch_folder_enabled():
-            self.watch_folder = WatchFolder(self.session)
-            self.watch_folder.start()
+        self._logger.info("tribler: communities are ready in %.2f seconds", timemod.time() - now_time)
 
-        self.version_check_manager = VersionCheckManager(self.session)
+    def _start_search_manager(self):
+        from Tribler.Core.Modules.search_manager import SearchManager
+        self.search_manager = SearchManager(self.session)
+        self.search_manager.initialize()
 
-        self.initComplete = True
+    def _start_channel_manager(self):
+        from Tribler.Core.Modules.channel.channel_manager import ChannelManager
+        self.channel_manager = ChannelManager(self.session)
+        self.channel_manager.initialize()
+
+    def _start_mainline_dht(self):
+        from Tribler.Core.DecentralizedTracking import mainlineDHT
+        self.mainline_dht = mainlineDHT.init(('127.0.0.1', self.session.get_mainline_dht_listen_port()),
+                                             self.session.get_state_dir())
+        self._add_upnp_mapping(self.session.get_mainline_dht_listen_port(), 'UDP')
+
+    def _start_torrent_checker(self):
+        from Tribler.Core.TorrentChecker.torrent_checker import TorrentChecker
+        self.torrent_checker = TorrentChecker(self.session)
+        self.torrent_checker.initialize()
 
     def add(self, tdef, dscfg, pstate=None, initialdlstatus=None, setupDelay=0, hidden=False):
         """ Called by any thread """
@@ -500,10 +562,11 @@ class TriblerLaunchMany(TaskManager):
                 for i, filename in enumerate(iglob(os.path.join(self.session.get_downloads_pstate_dir(), '*.state'))):
                     self.resume_download(filename, initialdlstatus, initialdlstatus_dict, setupDelay=i * 0.1)
 
-        if self.initComplete:
+        if self.core_init_complete:
             do_load_checkpoint(initialdlstatus, initialdlstatus_dict)
         else:
-            self.register_task("load_checkpoint", reactor.callLater(1, do_load_checkpoint))
+            self.register_task("load_checkpoint", reactor.callLater(1, do_load_checkpoint,
+                                                                    initialdlstatus, initialdlstatus_dict))
 
     def load_download_pstate_noexc(self, infohash):
         """ Called by any thread, assume sesslock already held """
@@ -650,94 +713,136 @@ class TriblerLaunchMany(TaskManager):
                                       repr(infohash))
         self.threadpool.add_task(do_remove)
 
-    @inlineCallbacks
     def early_shutdown(self):
         """ Called as soon as Session shutdown is initiated. Used to start
         shutdown tasks that takes some time and that can run in parallel
         to checkpointing, etc.
-        :returns a Deferred that will fire once all dependencies acknowledge they have shutdown.
+        Components that do not depend on each other are shut down concurrently.
+        :returns a Deferred that will fire once all dependencies acknowledge they have shutdown,
+        or once EARLY_SHUTDOWN_DEADLINE seconds have passed.
         """
         self._logger.info("tlm: early_shutdown")
 
+        # Do not start the background components that have not been started yet
+        self.startup_planner.cancel()
         self.cancel_all_pending_tasks()
 
         # Note: sesslock not held
         self.shutdownstarttime = timemod.time()
+
+        # A background startup stage that is already running cannot be interrupted. Wait for it to finish, so the
+        # components it starts are shut down as well.
+        if self.background_startup_done is None or self.background_startup_done.called:
+            return self._shutdown_components()
+
+        deferred = Deferred()
+        self.background_startup_done.addCallback(lambda _: self._shutdown_components().chainDeferred(deferred))
+        return deferred
+
+    def _shutdown_components(self):
+        """
+        Shut down all components that have been started.
+        :returns a Deferred that will fire once all components acknowledge they have shutdown,
+        or once EARLY_SHUTDOWN_DEADLINE seconds have passed.
+        """
+        planner = ShutdownPlanner()
         if self.torrent_checker:
-            yield self.torrent_checker.shutdown()
-            self.torrent_checker = None
+            planner.add_component(u"torrent_checker", self._get_component_shutdown(u"torrent_checker"))
         if self.channel_manager:
-            yield self.channel_manager.shutdown()
-            self.channel_manager = None
+            planner.add_component(u"channel_manager", self._get_component_shutdown(u"channel_manager"))
         if self.search_manager:
-            yield self.search_manager.shutdown()
-            self.search_manager = None
+            planner.add_component(u"search_manager", self._get_component_shutdown(u"search_manager"))
         if self.rtorrent_handler:
-            yield self.rtorrent_handler.shutdown()
-            self.rtorrent_handler = None
+            planner.add_component(u"rtorrent_handler", self._get_component_shutdown(u"rtorrent_handler"))
         if self.videoplayer:
-            yield self.videoplayer.shutdown()
-            self.videoplayer = None
-
-        self.version_check_manager.stop()
-        self.version_check_manager = None
-
+            planner.add_component(u"videoplayer", self._get_component_shutdown(u"videoplayer"))
+        if self.version_check_manager:
+            planner.add_component(u"version_check_manager",
+                                  self._get_component_shutdown(u"version_check_manager", u"stop"))
         if self.tracker_manager:
-            yield self.tracker_manager.shutdown()
-            self.tracker_manager = None
+            planner.add_component(u"tracker_manager", self._get_component_shutdown(u"tracker_manager"),
+                                  after=[u"torrent_checker"])
+        if self.api_manager is not None:
+            planner.add_component(u"api_manager", self._get_component_shutdown(u"api_manager", u"stop"))
+        if self.watch_folder is not None:
+            planner.add_component(u"watch_folder", self._get_component_shutdown(u"watch_folder", u"stop"))
+        if self.reactor_monitor is not None:
+            planner.add_component(u"reactor_monitor", self._get_component_shutdown(u"reactor_monitor", u"stop"),
+                                  after=[u"api_manager"])
+        if self.profiler is not None and self.profiler.running:
+            planner.add_component(u"profiler", self._get_component_shutdown(u"profiler", u"stop"),
+                                  after=[u"api_manager"])
 
         if self.dispersy:
-            self._logger.info("lmc: Shutting down Dispersy...")
-            now = timemod.time()
-            try:
-                success = self.dispersy.stop()
-            except:
-                print_exc()
-                success = False
-
-            diff = timemod.time() - now
-            if success:
-                self._logger.info("lmc: Dispersy successfully shutdown in %.2f seconds", diff)
-            else:
-                self._logger.info("lmc: Dispersy failed to shutdown in %.2f seconds", diff)
+            planner.add_component(u"dispersy", self._shutdown_dispersy,
+                                  after=[u"torrent_checker", u"channel_manager", u"search_manager",
+                                         u"rtorrent_handler", u"api_manager"])
 
         if self.metadata_store is not None:
-            yield self.metadata_store.close()
-            self.metadata_store = None
+            planner.add_component(u"metadata_store", self._get_component_shutdown(u"metadata_store", u"close"),
+                                  after=[u"rtorrent_handler", u"dispersy", u"api_manager"])
 
         if self.tftp_handler:
-            yield self.tftp_handler.shutdown()
-            self.tftp_handler = None
+            planner.add_component(u"tftp_handler", self._get_component_shutdown(u"tftp_handler"),
+                                  after=[u"rtorrent_handler", u"dispersy"])
 
         if self.session.get_megacache():
-            yield self.channelcast_db.close()
-            yield self.votecast_db.close()
-            yield self.mypref_db.close()
-            yield self.torrent_db.close()
-            yield self.peer_db.close()
-
-            self.channelcast_db = None
-            self.votecast_db = None
-            self.mypref_db = None
-            self.torrent_db = None
-            self.peer_db = None
+            db_users = [u"torrent_checker", u"channel_manager", u"search_manager", u"rtorrent_handler",
+                        u"videoplayer", u"tracker_manager", u"api_manager", u"watch_folder", u"dispersy",
+                        u"tftp_handler"]
+            for db_handler in (u"channelcast_db", u"votecast_db", u"mypref_db", u"torrent_db", u"peer_db"):
+                planner.add_component(db_handler, self._get_component_shutdown(db_handler, u"close"),
+                                      after=db_users)
 
         if self.mainline_dht:
-            from Tribler.Core.DecentralizedTracking import mainlineDHT
-            yield mainlineDHT.deinit(self.mainline_dht)
-            self.mainline_dht = None
+            planner.add_component(u"mainline_dht", self._shutdown_mainline_dht)
 
         if self.torrent_store is not None:
-            yield self.torrent_store.close()
-            self.torrent_store = None
+            planner.add_component(u"torrent_store", self._get_component_shutdown(u"torrent_store", u"close"),
+                                  after=[u"rtorrent_handler", u"api_manager", u"watch_folder", u"dispersy",
+                                         u"tftp_handler"])
 
-        if self.api_manager is not None:
-            yield self.api_manager.stop()
-            self.api_manager = None
+        return planner.run(deadline=EARLY_SHUTDOWN_DEADLINE)
 
-        if self.watch_folder is not None:
-            yield self.watch_folder.stop()
-            self.watch_folder = None
+    def _get_component_shutdown(self, attribute_name, method_name=u"shutdown"):
+        """
+        Returns a callable that shuts down the component stored in the given attribute and clears the attribute once
+        the shutdown has completed.
+        """
+        def shutdown_component():
+            component = getattr(self, attribute_name)
+
+            def on_shutdown(_):
+                setattr(self, attribute_name, None)
+
+            return maybeDeferred(getattr(component, method_name)).addCallback(on_shutdown)
+        return shutdown_component
+
+    def _shutdown_dispersy(self):
+        self._logger.info("lmc: Shutting down Dispersy...")
+        if self.statistics:
+            registry.unregister_collector(self.statistics.collect_metrics)
+            self.statistics = None
+        now = timemod.time()
+        try:
+            success = self.dispersy.stop()
+        except:
+            print_exc()
+            success = False
+
+        diff = timemod.time() - now
+        if success:
+            self._logger.info("lmc: Dispersy successfully shutdown in %.2f seconds", diff)
+        else:
+            self._logger.info("lmc: Dispersy failed to shutdown in %.2f seconds", diff)
+
+    def _shutdown_mainline_dht(self):
+        from Tribler.Core.DecentralizedTracking import mainlineDHT
+
+        def on_shutdown(_):
+            self.mainline_dht = None
+
+        return maybeDeferred(mainlineDHT.deinit, self.mainline_dht).addCallback(on_shutdown)
 
     def network_shutdown(self):
         try:
@@ -759,7 +864,7 @@ class TriblerLaunchMany(TaskManager):
             self.ltmgr = None
 
         if self.threadpool:
-            self.threadpool.cancel_all_pending_tasks()
+            self.threadpool.stop()
             self.threadpool = None
 
     def save_download_pstate(self, infohash, pstate):
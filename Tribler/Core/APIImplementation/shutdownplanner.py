@@ -0,0 +1,113 @@
+import logging
+import time
+from collections import OrderedDict
+
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred, DeferredList, maybeDeferred, succeed
+
+
+class ShutdownPlanner(object):
+    """
+    Shuts down a set of components concurrently while respecting the dependencies between them.
+
+    A component is only shut down after all the components it has to wait for have finished shutting down, the
+    components that do not depend on each other are shut down at the same time.
+    """
+
+    _reactor = reactor
+
+    def __init__(self):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._components = OrderedDict()
+        self.timings = {}
+
+    def add_component(self, name, shutdown_callable, after=()):
+        """
+        Add a component to shut down.
+        :param name: the name of the component, used in the log and in the timings.
+        :param shutdown_callable: a callable shutting down the component, that may return a Deferred.
+        :param after: the names of the components that should be shut down before this one. They do not have to be
+        added before this one. Components that are never added are ignored, so disabled components do not need to be
+        taken into account.
+        """
+        assert name not in self._components, "Component %s has already been added" % name
+        self._components[name] = (shutdown_callable, tuple(after))
+
+    def get_shutdown_order(self):
+        """
+        Returns the names of the components, ordered so that every component comes after the components it has to wait
+        for, and otherwise in the order they were added.
+        :raises ValueError: if components (indirectly) have to wait for each other.
+        """
+        ordered = OrderedDict()
+        visiting = set()
+
+        def visit(name):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError("The shutdown of %s (indirectly) has to wait for itself" % name)
+            visiting.add(name)
+            for dependency in self._components[name][1]:
+                if dependency in self._components:
+                    visit(dependency)
+            visiting.remove(name)
+            ordered[name] = None
+
+        for name in self._components:
+            visit(name)
+        return ordered.keys()
+
+    def run(self, deadline=None):
+        """
+        Shut down all components.
+        :param deadline: the maximum number of seconds the shutdown may take. When the deadline passes, the returned
+        Deferred fires while the components that did not finish yet are left behind.
+        :return: a Deferred that fires when all components have been shut down or the deadline has passed.
+        """
+        shutdown_order = self.get_shutdown_order()
+        start_time = time.time()
+        finished_deferreds = OrderedDict()
+        result_deferred = Deferred()
+
+        def shutdown_component(_, name, shutdown_callable):
+            component_start_time = time.time()
+
+            def on_shutdown(_):
+                self.timings[name] = time.time() - component_start_time
+                self._logger.info("Shutdown of %s took %.2f seconds", name, self.timings[name])
+
+            def on_shutdown_failed(failure):
+                self.timings[name] = time.time() - component_start_time
+                self._logger.error("Shutdown of %s failed after %.2f seconds: %s",
+                                   name, self.timings[name], failure.getErrorMessage())
+
+            return maybeDeferred(shutdown_callable).addCallbacks(on_shutdown, on_shutdown_failed)
+
+        for name in shutdown_order:
+            shutdown_callable, after = self._components[name]
+            dependencies = [dependency for dependency in after if dependency in self._components]
+            if dependencies:
+                wait_deferred = DeferredList([finished_deferreds[dependency] for dependency in dependencies])
+            else:
+                wait_deferred = succeed(None)
+            finished_deferreds[name] = wait_deferred.addCallback(shutdown_component, name, shutdown_callable)
+
+        def on_deadline():
+            pending = [name for name in finished_deferreds.iterkeys() if name not in self.timings]
+            self._logger.error("Shutdown deadline of %.2f seconds passed, still waiting for: %s",
+                               deadline, ", ".join(pending))
+            result_deferred.callback(None)
+
+        deadline_call = self._reactor.callLater(deadline, on_deadline) if deadline is not None else None
+
+        def on_all_shutdown(_):
+            self._logger.info("Shutdown of %d components took %.2f seconds",
+                              len(finished_deferreds), time.time() - start_time)
+            if deadline_call is None or deadline_call.active():
+                if deadline_call is not None:
+                    deadline_call.cancel()
+                result_deferred.callback(None)
+
+        DeferredList(finished_deferreds.values()).addCallback(on_all_shutdown)
+        return result_deferred
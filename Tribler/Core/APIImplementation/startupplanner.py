@@ -0,0 +1,62 @@
+import logging
+import time
+
+
+class StartupPlanner(object):
+    """
+    Starts components in named stages and records a boot timeline, containing when each stage started (relative to
+    the creation of the planner) and how long it took.
+    """
+
+    def __init__(self):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._start_time = time.time()
+        self._cancelled = False
+        self.timeline = []
+
+    def run_stage(self, name, stage_callable):
+        """
+        Run a single startup stage. Exceptions raised by the stage are logged, so the remaining stages can still run.
+        :param name: the name of the stage in the timeline.
+        :param stage_callable: a callable starting the components of this stage.
+        :return: whether the stage has been run successfully.
+        """
+        if self._cancelled:
+            self._logger.info("Skipping startup stage %s, startup has been cancelled", name)
+            return False
+
+        stage_start_time = time.time()
+        try:
+            stage_callable()
+            success = True
+        except Exception:
+            self._logger.exception("Startup stage %s failed", name)
+            success = False
+
+        stage_info = {u"stage": name,
+                      u"start": stage_start_time - self._start_time,
+                      u"duration": time.time() - stage_start_time,
+                      u"success": success}
+        self.timeline.append(stage_info)
+        self._logger.info("Startup stage %s took %.2f seconds (%.2f seconds after start)",
+                          name, stage_info[u"duration"], stage_info[u"start"] + stage_info[u"duration"])
+        return success
+
+    def run_stages(self, stages):
+        """
+        Run the given (name, callable) stages one after another.
+        """
+        for name, stage_callable in stages:
+            self.run_stage(name, stage_callable)
+
+    def cancel(self):
+        """
+        Skip all stages that have not been started yet, e.g. because Tribler is shutting down.
+        """
+        self._cancelled = True
+
+    def get_timeline(self):
+        """
+        Return a copy of the boot timeline, a list with a dictionary for each stage that has been run.
+        """
+        return [dict(stage_info) for stage_info in self.timeline]
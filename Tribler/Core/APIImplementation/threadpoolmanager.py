@@ -1,23 +1,193 @@
-
 from Tribler.dispersy.taskmanager import TaskManager
 from twisted.internet import reactor
-from threading import RLock
+from collections import defaultdict
+from heapq import heappop, heappush
+from itertools import count
+from threading import Condition, RLock, Thread, current_thread
+from time import time
 import logging
 
+from Tribler.Core.Utilities.instrumentation import get_callable_name
+from Tribler.Core.Utilities.metrics import registry
+
+PRIORITY_INTERACTIVE = 0  # work someone is waiting for, like GUI requests and metainfo and download state callbacks
+PRIORITY_COLLECTING = 1  # collecting torrents, thumbnails and other content in the background
+PRIORITY_MAINTENANCE = 2  # periodic checks and cleanups
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: u"interactive",
+                  PRIORITY_COLLECTING: u"collecting",
+                  PRIORITY_MAINTENANCE: u"maintenance"}
+
+DEFAULT_POOL_SIZE = 10
+INTERACTIVE_RESERVED_THREADS = 2  # the number of threads background tasks cannot occupy
+
+TASK_WAIT_SECONDS = registry.histogram(u"tribler_threadpool_wait_seconds", u"Time tasks wait in the thread pool queue",
+                                       [u"task_type", u"priority"])
+TASK_RUN_SECONDS = registry.histogram(u"tribler_threadpool_run_seconds", u"Duration of thread pool tasks",
+                                      [u"task_type"])
+
+
+class PoolTask(object):
+    """
+    A call waiting in the queue of a PriorityThreadPool.
+    """
+
+    def __init__(self, func, args, kwargs, priority, task_type):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.task_type = task_type
+        self.submit_time = time()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class PriorityThreadPool(object):
+    """
+    A thread pool that runs the queued task with the highest priority first, and tasks with the same priority in the
+    order they were submitted. Background tasks can only occupy size - reserved threads, so interactive tasks never
+    have to wait for a long running collecting or maintenance task. The threads are started when they are needed.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, reserved=INTERACTIVE_RESERVED_THREADS, name=u"tribler"):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.size = size
+        self.reserved = min(reserved, size - 1)
+        self.name = name
+        self.running = True
+
+        self._condition = Condition()
+        self._queue = []
+        self._sequence = count()
+        self._workers = []
+        self._idle_workers = 0
+        self._busy_background_workers = 0
+        self._queued = defaultdict(int)
+
+    def submit(self, func, args=(), kwargs=None, priority=PRIORITY_INTERACTIVE, task_type=None):
+        """
+        Queue a call to func(*args, **kwargs). Can be called from any thread.
+        :param priority: PRIORITY_INTERACTIVE, PRIORITY_COLLECTING or PRIORITY_MAINTENANCE.
+        :param task_type: the name to account the task under, defaults to the name of func.
+        :return: a PoolTask that can be cancelled while it is queued, or None if the pool has been stopped.
+        """
+        task = PoolTask(func, args, kwargs or {}, priority, task_type or get_callable_name(func))
+        with self._condition:
+            if not self.running:
+                return None
+            heappush(self._queue, (priority, next(self._sequence), task))
+            self._queued[(task.task_type, priority)] += 1
+
+            if self._idle_workers:
+                self._condition.notify()
+            # A woken worker only stops counting as idle once it has the lock, so tasks submitted in the meantime need
+            # a worker of their own
+            if len(self._queue) > self._idle_workers and len(self._workers) < self.size:
+                self._start_worker()
+        return task
+
+    def stop(self):
+        """
+        Drop the queued tasks and let the threads exit once they have finished their current task.
+        """
+        with self._condition:
+            self.running = False
+            self._queue = []
+            self._queued.clear()
+            self._condition.notify_all()
+
+    def _start_worker(self):
+        worker = Thread(target=self._work, name=u"PoolThread-%s-%d" % (self.name, len(self._workers) + 1))
+        worker.daemon = True
+        self._workers.append(worker)
+        worker.start()
+
+    def _pop_task(self):
+        """
+        Returns the next task this thread may run, or None if there is none. Should be called with the lock held.
+        """
+        while self._queue:
+            priority, _, task = self._queue[0]
+            if priority != PRIORITY_INTERACTIVE and self._busy_background_workers >= self.size - self.reserved:
+                return None
+
+            heappop(self._queue)
+            self._queued[(task.task_type, priority)] -= 1
+            if not task.cancelled:
+                return task
+        return None
+
+    def _work(self):
+        while True:
+            with self._condition:
+                task = self._pop_task()
+                while task is None and self.running:
+                    self._idle_workers += 1
+                    self._condition.wait()
+                    self._idle_workers -= 1
+                    task = self._pop_task()
+
+                if task is None:
+                    self._workers.remove(current_thread())
+                    return
+                if task.priority != PRIORITY_INTERACTIVE:
+                    self._busy_background_workers += 1
+
+            self._run_task(task)
+
+            if task.priority != PRIORITY_INTERACTIVE:
+                with self._condition:
+                    self._busy_background_workers -= 1
+                    self._condition.notify()
+
+    def _run_task(self, task):
+        start_time = time()
+        TASK_WAIT_SECONDS.observe(start_time - task.submit_time, task_type=task.task_type,
+                                  priority=PRIORITY_NAMES[task.priority])
+        try:
+            task.func(*task.args, **task.kwargs)
+        except Exception:
+            self._logger.exception("Thread pool task %s failed", task.task_type)
+        finally:
+            TASK_RUN_SECONDS.observe(time() - start_time, task_type=task.task_type)
+
+    def get_queue_lengths(self):
+        """
+        Returns the number of queued tasks by (task type, priority).
+        """
+        with self._condition:
+            return dict((key, length) for key, length in self._queued.iteritems() if length)
+
+    def collect_metrics(self, metrics):
+        queued = metrics.gauge(u"tribler_threadpool_queued", u"Number of tasks waiting in the thread pool queue",
+                               [u"task_type", u"priority"])
+        queued.clear()
+        for (task_type, priority), length in self.get_queue_lengths().iteritems():
+            queued.set(length, task_type=task_type, priority=PRIORITY_NAMES[priority])
+
+        threads = metrics.gauge(u"tribler_threadpool_threads", u"Number of thread pool threads", [u"state"])
+        with self._condition:
+            threads.set(len(self._workers) - self._idle_workers, state=u"busy")
+            threads.set(self._idle_workers, state=u"idle")
+
 
 class ThreadPoolManager(TaskManager):
     """
-    Enhanced TaskManager that allows you to schedule jobs in the twisted
-    threadpool.
+    Enhanced TaskManager that allows you to schedule jobs on the reactor thread or in a thread pool with priorities.
     """
 
     _reactor = reactor
 
-    def __init__(self):
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
         super(ThreadPoolManager, self).__init__()
         self._auto_counter = 0
         self._lock = RLock()
         self._logger = logging.getLogger(self.__class__.__name__)
+        self._pool = PriorityThreadPool(pool_size)
+        self._queued_tasks = {}
+        registry.register_collector(self._pool.collect_metrics)
 
     def _check_task_name(self, task_name):
         if not task_name:
@@ -34,13 +204,35 @@ class ThreadPoolManager(TaskManager):
             lambda: self.register_task(self._check_task_name(task_name),
                                   self._reactor.callLater(delay, wrapper)))
 
-    def add_task_in_thread(self, wrapper, delay=0, task_name=None):
-        """Add task to be called in thread pool"""
+    def add_task_in_thread(self, wrapper, delay=0, task_name=None, priority=PRIORITY_INTERACTIVE, task_type=None):
+        """
+        Add task to be called in the thread pool. Tasks without a delay are queued right away, from any thread.
+        :param priority: PRIORITY_INTERACTIVE, PRIORITY_COLLECTING or PRIORITY_MAINTENANCE.
+        :param task_type: the name to account the task under in the thread pool metrics, defaults to the name of wrapper.
+        """
         assert wrapper
+        task_type = task_type or get_callable_name(wrapper)
+
+        if not delay:
+            if not task_name:
+                self._pool.submit(wrapper, priority=priority, task_type=task_type)
+                return
+
+            def named_call():
+                with self._lock:
+                    self._queued_tasks.pop(task_name, None)
+                wrapper()
+
+            with self._lock:
+                task = self._pool.submit(named_call, priority=priority, task_type=task_type)
+                if task:
+                    self._queued_tasks[task_name] = task
+            return
 
         def delayed_call(delay, task_name):
             self.register_task(self._check_task_name(task_name),
-                               self._reactor.callLater(delay, reactor.callInThread, wrapper))
+                               self._reactor.callLater(delay, self._pool.submit, wrapper, priority=priority,
+                                                       task_type=task_type))
 
         reactor.callFromThread(delayed_call, delay, task_name)
 
@@ -52,6 +244,30 @@ class ThreadPoolManager(TaskManager):
 
     def call_in_thread(self, delay, fun, *args, **kwargs):
         task_name = kwargs.pop("task_name", None)
+        priority = kwargs.pop("priority", PRIORITY_INTERACTIVE)
+        task_type = kwargs.pop("task_type", None) or get_callable_name(fun)
         def caller():
             fun(*args, **kwargs)
-        self.add_task_in_thread(caller, delay=delay, task_name=task_name)
+        self.add_task_in_thread(caller, delay=delay, task_name=task_name, priority=priority, task_type=task_type)
+
+    def cancel_pending_task(self, name):
+        with self._lock:
+            task = self._queued_tasks.pop(name, None)
+        if task:
+            task.cancel()
+        return super(ThreadPoolManager, self).cancel_pending_task(name)
+
+    def cancel_all_pending_tasks(self):
+        with self._lock:
+            tasks, self._queued_tasks = self._queued_tasks.values(), {}
+        for task in tasks:
+            task.cancel()
+        return super(ThreadPoolManager, self).cancel_all_pending_tasks()
+
+    def stop(self):
+        """
+        Cancel all pending tasks and stop the thread pool.
+        """
+        self.cancel_all_pending_tasks()
+        self._pool.stop()
+        registry.unregister_collector(self._pool.collect_metrics)
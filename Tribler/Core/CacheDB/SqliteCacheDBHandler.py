@@ -7,9 +7,10 @@ import logging
 import os
 import threading
 import json
+from bisect import insort
 from copy import deepcopy
+from random import sample
 from pprint import pformat
-from struct import unpack_from
 from time import time
 from traceback import print_exc
 from collections import OrderedDict, defaultdict
@@ -18,7 +19,7 @@ from twisted.internet.task import LoopingCall
 
 from Tribler.Core.CacheDB.sqlitecachedb import bin2str, str2bin
 from Tribler.Core.TorrentDef import TorrentDef
-from Tribler.Core.Utilities.search_utils import split_into_keywords, filter_keywords
+from Tribler.Core.Utilities.search_utils import filter_keywords, get_fts_term_keywords, split_into_keywords
 from Tribler.Core.Utilities.unicode import dunno2unicode
 from Tribler.Core.simpledefs import (INFOHASH_LENGTH, NTFY_UPDATE, NTFY_INSERT, NTFY_DELETE, NTFY_CREATE,
                                      NTFY_MODIFIED, NTFY_TRACKERINFO, NTFY_MYPREFERENCES, NTFY_VOTECAST, NTFY_TORRENTS,
@@ -31,6 +32,13 @@ from Tribler.Core.Utilities.tracker_utils import get_uniformed_tracker_url
 
 VOTECAST_FLUSH_DB_INTERVAL = 15
 
+FTS_MERGE_INTERVAL = 60
+FTS_MERGE_PAGES = 500
+FTS_MERGE_SEGMENTS = 8
+FTS_COLUMNS = ['swarmname', 'filenames', 'fileextensions']
+
+CHANNELCAST_POOL_MAX_AGE = 600
+
 DEFAULT_ID_CACHE_SIZE = 1024 * 5
 
 
@@ -46,6 +54,40 @@ class LimitedOrderedDict(OrderedDict):
             self.popitem(last=False)
 
 
+class ChannelTorrentPool(object):
+    """
+    The ids of the channel torrents in a set of channels, ordered from the most recent to the oldest. Channelcast
+    messages are filled with the most recent torrents and a random sample of the older ones from these pools, so the
+    channels do not have to be sorted (or shuffled with ORDER BY random()) in the database for every message.
+    """
+
+    def __init__(self, channel_ids, rows):
+        self.channel_ids = set(channel_ids)
+        self.keys = sorted((-(time_stamp or 0), channeltorrent_id) for channeltorrent_id, time_stamp in rows)
+        self.created = time()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, channel_id, channeltorrent_id, time_stamp):
+        if channel_id in self.channel_ids:
+            insort(self.keys, (-(time_stamp or 0), channeltorrent_id))
+
+    def get_recent(self, num_recent):
+        return [channeltorrent_id for _, channeltorrent_id in self.keys[:num_recent]]
+
+    def get_random(self, num_recent, num_random):
+        """
+        Returns a random sample of the torrents that are older than the num_recent most recent ones. Only the positions
+        are sampled, so this does not depend on the size of the pool.
+        """
+        num_older = len(self.keys) - num_recent
+        if num_older <= 0 or num_random <= 0:
+            return []
+        indices = sample(xrange(num_recent, len(self.keys)), min(num_random, num_older))
+        return [self.keys[index][1] for index in indices]
+
+
 class BasicDBHandler(TaskManager):
 
     def __init__(self, session, table_name):
@@ -230,6 +272,9 @@ class TorrentDBHandler(BasicDBHandler):
         self.channelcast_db = self.session.open_dbhandler(NTFY_CHANNELCAST)
         self._rtorrent_handler = self.session.lm.rtorrent_handler
 
+        self.register_task(u"merge_full_text_index",
+                           LoopingCall(self.merge_full_text_index)).start(FTS_MERGE_INTERVAL, now=False)
+
     def close(self):
         super(TorrentDBHandler, self).close()
         self.category = None
@@ -272,7 +317,7 @@ class TorrentDBHandler(BasicDBHandler):
             self._logger.error("to_return:")
             self._logger.error(pformat(to_return))
             self._logger.error("infohashes:")
-            self._logger.error(pformat([bin2str(infohash) for infohash in unique_infohashes]))
+            self._logger.error(pformat([infohash.encode('hex') for infohash in unique_infohashes]))
             assert len(to_return) == len(unique_infohashes), (len(to_return), len(unique_infohashes))
 
         return to_return
@@ -451,14 +496,25 @@ class TorrentDBHandler(BasicDBHandler):
 
         values = (torrent_id, swarm_keywords, " ".join(filenames), " ".join(fileextensions))
         try:
-            # INSERT OR REPLACE not working for fts3 table
-            self._db.execute_write(u"DELETE FROM FullTextIndex WHERE rowid = ?", (torrent_id,))
             self._db.execute_write(
-                u"INSERT INTO FullTextIndex (rowid, swarmname, filenames, fileextensions) VALUES(?,?,?,?)", values)
+                u"INSERT OR REPLACE INTO FullTextIndex (docid, swarmname, filenames, fileextensions) VALUES(?,?,?,?)",
+                values)
         except:
-            # this will fail if the fts3 module cannot be found
+            # this will fail if the fts4 module cannot be found
             print_exc()
 
+    def merge_full_text_index(self):
+        """
+        Merge some of the segments of the full text index. Every torrent we index adds a segment; automerge keeps their
+        number in check while inserting, and this finishes the merges in small steps instead of one long optimize.
+        :return: True if segments have been merged, False if there was nothing left to merge.
+        """
+        changes = self._db.connection.totalchanges()
+        self._db.execute_write(u"INSERT INTO FullTextIndex(FullTextIndex) VALUES('merge=%d,%d')"
+                               % (FTS_MERGE_PAGES, FTS_MERGE_SEGMENTS))
+        # the merge command changes less than two rows when it has nothing to do
+        return self._db.connection.totalchanges() - changes >= 2
+
     # ------------------------------------------------------------
     # Adds the trackers of a given torrent into the database.
     # ------------------------------------------------------------
@@ -506,8 +562,7 @@ class TorrentDBHandler(BasicDBHandler):
                 kw.pop(key)
 
         if len(kw) > 0:
-            infohash_str = bin2str(infohash)
-            where = "infohash='%s'" % infohash_str
+            where = "infohash = X'%s'" % infohash.encode('hex')
             self._db.update(self.table_name, where, **kw)
 
         if notify:
@@ -552,7 +607,7 @@ class TorrentDBHandler(BasicDBHandler):
         tid_collected = set()
         tid_name = {}
         for torrent_id, infohash, is_collected, name in results:
-            infohash = str(infohash)
+            infohash = str2bin(infohash)
 
             if infohash:
                 infohash_tid[infohash] = torrent_id
@@ -565,14 +620,15 @@ class TorrentDBHandler(BasicDBHandler):
         update_infohash = []
         to_be_indexed = []
         for infohash, swarmname, length, nrfiles, category, creation_date in torrents:
-            tid = infohash_tid.get(infohash, None)
+            # infohash is a buffer, which never equals the str keys of infohash_tid
+            tid = infohash_tid.get(str2bin(infohash), None)
 
             if tid:  # we know this torrent
                 if tid not in tid_collected and swarmname != tid_name.get(tid, ''):  # if not collected and name not equal then do fullupdate
                     update.append((swarmname, length, nrfiles, category, creation_date, infohash, status, tid))
                     to_be_indexed.append((tid, swarmname))
 
-                elif infohash and infohash not in infohash_tid:
+                elif infohash and str2bin(infohash) not in infohash_tid:
                     update_infohash.append((infohash, tid))
             else:
                 insert.append((swarmname, length, nrfiles, category, creation_date, infohash, status))
@@ -614,7 +670,7 @@ class TorrentDBHandler(BasicDBHandler):
 
         self._db.execute_write(sql, (seeders, leechers, last_check, next_check, status, retries, torrent_id))
 
-        self._logger.debug(u"update result %d/%d for %s/%d", seeders, leechers, bin2str(infohash), torrent_id)
+        self._logger.debug(u"update result %d/%d for %s/%d", seeders, leechers, infohash.encode('hex'), torrent_id)
 
         # notify
         self.notifier.notify(NTFY_TORRENTS, NTFY_UPDATE, infohash)
@@ -816,25 +872,33 @@ class TorrentDBHandler(BasicDBHandler):
         return self._db.getOne('CollectedTorrent', ['count(torrent_id)', 'sum(length)', 'sum(num_files)'])
 
     def freeSpace(self, torrents2del):
+        """
+        Remove the collected torrents with the lowest eviction weight, except for the ones we downloaded ourselves or
+        added to our own channel. The weight is kept up to date by triggers on the Torrent table and indexed for the
+        collected torrents, so only the removed torrents (and the ones we skip) are visited.
+        :param torrents2del: the number of torrents to remove
+        :return: the number of torrents that have been removed
+        """
         if self.channelcast_db and self.channelcast_db._channel_id:
-            sql = U"""
-                SELECT name, torrent_id, infohash, relevance,
-                MIN(relevance, 2500) + MIN(500, num_leechers) + 4*MIN(500, num_seeders) - (MAX(0, MIN(500, (%d - creation_date)/86400)) ) AS weight
-                FROM CollectedTorrent
-                WHERE torrent_id NOT IN (SELECT torrent_id FROM MyPreference)
-                AND torrent_id NOT IN (SELECT torrent_id FROM ChannelTorrents WHERE channel_id == %d)
-                ORDER BY weight
+            sql = u"""
+                SELECT name, torrent_id, infohash, relevance, eviction_weight
+                FROM Torrent T
+                WHERE is_collected == 1
+                AND NOT EXISTS (SELECT 1 FROM MyPreference MP WHERE MP.torrent_id == T.torrent_id)
+                AND NOT EXISTS (SELECT 1 FROM ChannelTorrents CT
+                                WHERE CT.torrent_id == T.torrent_id AND CT.channel_id == %d)
+                ORDER BY eviction_weight
                 LIMIT %d
-            """ % (int(time()), self.channelcast_db._channel_id, torrents2del)
+            """ % (self.channelcast_db._channel_id, torrents2del)
         else:
             sql = u"""
-                SELECT name, torrent_id, infohash, relevance,
-                    min(relevance,2500) +  min(500,num_leechers) + 4*min(500,num_seeders) - (max(0,min(500,(%d-creation_date)/86400)) ) AS weight
-                FROM CollectedTorrent
-                WHERE torrent_id NOT IN (SELECT torrent_id FROM MyPreference)
-                ORDER BY weight
+                SELECT name, torrent_id, infohash, relevance, eviction_weight
+                FROM Torrent T
+                WHERE is_collected == 1
+                AND NOT EXISTS (SELECT 1 FROM MyPreference MP WHERE MP.torrent_id == T.torrent_id)
+                ORDER BY eviction_weight
                 LIMIT %d
-            """ % (int(time()), torrents2del)
+            """ % torrents2del
 
         res_list = self._db.fetchall(sql)
         if len(res_list) == 0:
@@ -847,7 +911,7 @@ class TorrentDBHandler(BasicDBHandler):
         tids = []
         for _name, torrent_id, infohash, _relevance, _weight in res_list:
             tids.append((torrent_id,))
-            self.session.delete_collected_torrent(infohash)
+            self.session.delete_collected_torrent(str2bin(infohash))
 
         self._db.executemany(sql_del_torrent, tids)
         # self._db.executemany(sql_del_tracker, tids)
@@ -873,7 +937,7 @@ class TorrentDBHandler(BasicDBHandler):
             doSort = False
 
         values = ", ".join(keys)
-        mainsql = "SELECT " + values + ", C.channel_id, Matchinfo(FullTextIndex) FROM"
+        mainsql = "SELECT " + values + ", C.channel_id, offsets(FullTextIndex) FROM"
         if local:
             mainsql += " Torrent T"
         else:
@@ -888,7 +952,7 @@ class TorrentDBHandler(BasicDBHandler):
             mainsql += "AND T.secret is not 1 LIMIT 250"
 
         query = " ".join(filter_keywords(kws))
-        not_negated = [kw for kw in filter_keywords(kws) if kw[0] != '-']
+        term_keywords = get_fts_term_keywords([kw for kw in filter_keywords(kws) if kw[0] != '-'])
 
         results = self._db.fetchall(mainsql, (query,))
 
@@ -955,24 +1019,12 @@ class TorrentDBHandler(BasicDBHandler):
 
             matches = {'swarmname': set(), 'filenames': set(), 'fileextensions': set()}
 
-            # Matchinfo is documented at: http://www.sqlite.org/fts3.html#matchinfo
-            matchinfo = str(result[-1])
-            num_phrases, num_cols = unpack_from('II', matchinfo)
-            unpack_str = 'I' * (3 * num_cols * num_phrases)
-            matchinfo = unpack_from('II' + unpack_str, matchinfo)
-
-            swarmnames, filenames, fileextensions = [
-                [matchinfo[3 * (i + p * num_cols) + 2] for p in range(num_phrases)]
-                for i in range(num_cols)
-            ]
-
-            for i, keyword in enumerate(not_negated):
-                if swarmnames[i]:
-                    matches['swarmname'].add(keyword)
-                if filenames[i]:
-                    matches['filenames'].add(keyword)
-                if fileextensions[i]:
-                    matches['fileextensions'].add(keyword)
+            # Offsets are documented at: http://www.sqlite.org/fts3.html#offsets, every match in this row is described
+            # by its column, the number of the (not negated) query term, and its byte offset and size.
+            offsets = [int(offset) for offset in result[-1].split()]
+            for column, term in zip(offsets[0::4], offsets[1::4]):
+                if term < len(term_keywords):
+                    matches[FTS_COLUMNS[column]].add(term_keywords[term])
             result[-1] = matches
 
             channel = channel_dict.get(result[-2], (result[-2], None, '', '', 0, 0, 0, 0, 0, False))
@@ -1181,6 +1233,8 @@ class VoteCastDBHandler(BasicDBHandler):
                 self.notifier.notify(NTFY_VOTECAST, NTFY_UPDATE, channel_id, voter_id is None)
                 if self.my_votes is not None:
                     self.my_votes[channel_id] = vote
+                if self.channelcast_db:
+                    self.channelcast_db.invalidate_channelcast_pool(u"favorite")
             self.updatedChannels.add(channel_id)
 
     def on_remove_votes_from_dispersy(self, votes, contains_my_vote):
@@ -1190,6 +1244,8 @@ class VoteCastDBHandler(BasicDBHandler):
         if contains_my_vote:
             for _, channel_id, _ in votes:
                 self.notifier.notify(NTFY_VOTECAST, NTFY_UPDATE, channel_id, contains_my_vote)
+            if self.channelcast_db:
+                self.channelcast_db.invalidate_channelcast_pool(u"favorite")
 
         for _, channel_id, _ in votes:
             self.updatedChannels.add(channel_id)
@@ -1283,6 +1339,9 @@ class ChannelCastDBHandler(BasicDBHandler):
         self.votecast_db = None
         self.torrent_db = None
 
+        self._channelcast_pools = {}
+        self.channelcast_pool_stats = {u"refreshes": 0, u"refresh_time": 0.0, u"additions": 0}
+
     def initialize(self, *args, **kwargs):
         self._channel_id = self.getMyChannelId()
         self._logger.debug(u"Channels: my channel is %s", self._channel_id)
@@ -1403,6 +1462,7 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
 
         if not self._channel_id and self._get_my_dispersy_cid() == dispersy_cid:
             self._channel_id = channel_id
+            self.invalidate_channelcast_pool(u"own")
             self.notifier.notify(NTFY_CHANNELCAST, NTFY_CREATE, channel_id)
         return channel_id
 
@@ -1436,13 +1496,24 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             sql_insert_torrent = "INSERT INTO _ChannelTorrents (dispersy_id, torrent_id, channel_id, peer_id, name, time_stamp) VALUES (?,?,?,?,?,?)"
             self._db.executemany(sql_insert_torrent, insert_data)
 
+        # fetch the ids of the channel torrents we just inserted in one go
+        parameters = u"?," * len(torrent_ids)
+        sql = u"SELECT channel_id, torrent_id, id FROM ChannelTorrents WHERE torrent_id IN (%s)" % parameters[:-1]
+        channel_torrent_ids = dict(((channel_id, torrent_id), channel_torrent_id) for channel_id, torrent_id,
+                                   channel_torrent_id in self._db.fetchall(sql, torrent_ids))
+
         updated_channel_torrent_dict = defaultdict(list)
-        for torrent in torrentlist:
+        for i, torrent in enumerate(torrentlist):
             channel_id, dispersy_id, peer_id, infohash, timestamp, name, files, trackers = torrent
-            channel_torrent_id = self.get_channel_torrent_id(channel_id, infohash)
+            channel_torrent_id = channel_torrent_ids.get((channel_id, torrent_ids[i]))
             updated_channel_torrent_dict[channel_id].append({u'info_hash': infohash,
                                                              u'channel_torrent_id': channel_torrent_id})
 
+            if channel_torrent_id and dispersy_id != -1:
+                for pool in self._channelcast_pools.itervalues():
+                    pool.add(channel_id, channel_torrent_id, timestamp)
+                self.channelcast_pool_stats[u"additions"] += 1
+
         sql_update_channel = "UPDATE _Channels SET modified = strftime('%s','now'), nr_torrents = nr_torrents+? WHERE id = ?"
         update_channels = [(new_torrents, channel_id) for channel_id, new_torrents in updated_channels.iteritems()]
         self._db.executemany(sql_update_channel, update_channels)
@@ -1462,6 +1533,7 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
         else:
             deleted_at = long(time())
         self._db.execute_write(sql, (deleted_at, channel_id, dispersy_id))
+        self.invalidate_channelcast_pool()
 
         self.notifier.notify(NTFY_CHANNELCAST, NTFY_UPDATE, channel_id)
 
@@ -1504,18 +1576,17 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
         return True if self.get_channel_torrent_id(channel_id, infohash) else False
 
     def hasTorrents(self, channel_id, infohashes):
-        returnAr = []
         torrent_id_results = self.torrent_db.getTorrentIDS(infohashes)
+        torrent_ids = [torrent_id for torrent_id in torrent_id_results.itervalues() if torrent_id is not None]
 
-        for infohash in infohashes:
-            if torrent_id_results[infohash] is None:
-                returnAr.append(False)
-            else:
-                torrent_id = torrent_id_results[infohash]
-                sql = "SELECT id FROM ChannelTorrents WHERE torrent_id = ? AND channel_id = ? AND dispersy_id <> -1"
-                channeltorrent_id = self._db.fetchone(sql, (torrent_id, channel_id))
-                returnAr.append(True if channeltorrent_id else False)
-        return returnAr
+        channel_torrent_ids = set()
+        if torrent_ids:
+            parameters = u"?," * len(torrent_ids)
+            sql = u"SELECT torrent_id FROM ChannelTorrents WHERE channel_id = ? AND dispersy_id <> -1 " \
+                  u"AND torrent_id IN (%s)" % parameters[:-1]
+            channel_torrent_ids = set(torrent_id for torrent_id, in self._db.fetchall(sql, [channel_id] + torrent_ids))
+
+        return [torrent_id_results[infohash] in channel_torrent_ids for infohash in infohashes]
 
     def playlistHasTorrent(self, playlist_id, channeltorrent_id):
         sql = "SELECT id FROM PlaylistTorrents WHERE playlist_id = ? AND channeltorrent_id = ?"
@@ -1773,34 +1844,80 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
         sql = "select count(DISTINCT id) from Channels LIMIT 1"
         return self._db.fetchone(sql)
 
+    def _get_channelcast_pool_channels(self, pool_name):
+        if pool_name == u"own":
+            return [self._channel_id] if self._channel_id else []
+
+        if pool_name == u"favorite":
+            sql = "SELECT channel_id FROM ChannelVotes WHERE voter_id ISNULL AND vote = 2"
+            return [channel_id for channel_id, in self._db.fetchall(sql)]
+
+        twomonthsago = long(time() - 5259487)
+        sql = """SELECT DISTINCT ChannelTorrents.channel_id FROM ChannelTorrents, MyPreference, Channels
+        WHERE ChannelTorrents.torrent_id = MyPreference.torrent_id AND Channels.id = ChannelTorrents.channel_id
+        AND Channels.modified > ?"""
+        return [channel_id for channel_id, in self._db.fetchall(sql, (twomonthsago,))]
+
+    def _get_channelcast_pool(self, pool_name):
+        """
+        Returns the pool of channel torrents with the given name, (re)building it if it is missing or older than
+        CHANNELCAST_POOL_MAX_AGE seconds.
+        :param pool_name: u"own", u"favorite" or u"interesting".
+        :return: a ChannelTorrentPool.
+        """
+        pool = self._channelcast_pools.get(pool_name)
+        if pool is not None and time() - pool.created < CHANNELCAST_POOL_MAX_AGE:
+            return pool
+
+        start_time = time()
+        channel_ids = self._get_channelcast_pool_channels(pool_name)
+        rows = []
+        if channel_ids:
+            sql = "SELECT id, time_stamp FROM ChannelTorrents WHERE channel_id IN (" + \
+                  "?," * (len(channel_ids) - 1) + "?) AND dispersy_id <> -1"
+            rows = self._db.fetchall(sql, channel_ids)
+        pool = self._channelcast_pools[pool_name] = ChannelTorrentPool(channel_ids, rows)
+
+        refresh_time = time() - start_time
+        self.channelcast_pool_stats[u"refreshes"] += 1
+        self.channelcast_pool_stats[u"refresh_time"] += refresh_time
+        self._logger.debug("Rebuilt the %s channelcast pool with %d torrents of %d channels in %.3f seconds",
+                           pool_name, len(pool), len(channel_ids), refresh_time)
+        return pool
+
+    def invalidate_channelcast_pool(self, pool_name=None):
+        """
+        Drops a channelcast pool (or all of them), so it is rebuilt the next time a channelcast message is created.
+        """
+        if pool_name is None:
+            self._channelcast_pools.clear()
+        else:
+            self._channelcast_pools.pop(pool_name, None)
+
+    def get_channelcast_pool_stats(self):
+        stats = dict(self.channelcast_pool_stats)
+        stats[u"pools"] = dict((pool_name, len(pool)) for pool_name, pool in self._channelcast_pools.iteritems())
+        return stats
+
     def getRecentAndRandomTorrents(self, NUM_OWN_RECENT_TORRENTS=15, NUM_OWN_RANDOM_TORRENTS=10,
                                    NUM_OTHERS_RECENT_TORRENTS=15, NUM_OTHERS_RANDOM_TORRENTS=10,
                                    NUM_OTHERS_DOWNLOADED=5):
-        torrent_dict = {}
-
-        least_recent = -1
-        sql = """SELECT dispersy_cid, infohash, time_stamp from ChannelTorrents, Channels, Torrent
-        WHERE ChannelTorrents.torrent_id = Torrent.torrent_id AND Channels.id = ChannelTorrents.channel_id
-        AND ChannelTorrents.channel_id==? and ChannelTorrents.dispersy_id <> -1 order by time_stamp desc limit ?"""
-        myrecenttorrents = self._db.fetchall(sql, (self._channel_id, NUM_OWN_RECENT_TORRENTS))
-        for cid, infohash, timestamp in myrecenttorrents:
-            torrent_dict.setdefault(str(cid), set()).add(str2bin(infohash))
-            least_recent = timestamp
-
-        if len(myrecenttorrents) == NUM_OWN_RECENT_TORRENTS and least_recent != -1:
-            sql = """SELECT dispersy_cid, infohash from ChannelTorrents, Channels, Torrent
-            WHERE ChannelTorrents.torrent_id = Torrent.torrent_id AND Channels.id = ChannelTorrents.channel_id
-            AND ChannelTorrents.channel_id==? AND time_stamp<?
-            AND ChannelTorrents.dispersy_id <> -1 order by random() limit ?"""
-            myrandomtorrents = self._db.fetchall(sql, (self._channel_id, least_recent, NUM_OWN_RANDOM_TORRENTS))
-            for cid, infohash, _ in myrecenttorrents:
-                torrent_dict.setdefault(str(cid), set()).add(str2bin(infohash))
+        """
+        Selects the torrents for a channelcast message: the most recent torrents and a random sample of the older
+        ones from my own channel and the channels I marked as favorite, and the most recent torrents of the channels
+        that contain torrents I downloaded. The selection is made from cached ChannelTorrentPools, only the selected
+        torrents are looked up in the database.
+        :return: a dictionary of dispersy cids to sets of infohashes.
+        """
+        channeltorrent_ids = set()
 
-            for cid, infohash in myrandomtorrents:
-                torrent_dict.setdefault(str(cid), set()).add(str2bin(infohash))
+        own_pool = self._get_channelcast_pool(u"own")
+        own_recent = own_pool.get_recent(NUM_OWN_RECENT_TORRENTS)
+        channeltorrent_ids.update(own_recent)
+        if len(own_recent) == NUM_OWN_RECENT_TORRENTS:
+            channeltorrent_ids.update(own_pool.get_random(NUM_OWN_RECENT_TORRENTS, NUM_OWN_RANDOM_TORRENTS))
 
-        nr_records = sum(len(torrents) for torrents in torrent_dict.values())
-        additionalSpace = (NUM_OWN_RECENT_TORRENTS + NUM_OWN_RANDOM_TORRENTS) - nr_records
+        additionalSpace = (NUM_OWN_RECENT_TORRENTS + NUM_OWN_RANDOM_TORRENTS) - len(channeltorrent_ids)
 
         if additionalSpace > 0:
             NUM_OTHERS_RECENT_TORRENTS += additionalSpace / 2
@@ -1811,41 +1928,26 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             NUM_OWN_RECENT_TORRENTS -= additionalSpace / 2
             NUM_OWN_RANDOM_TORRENTS -= additionalSpace - (additionalSpace / 2)
 
-        least_recent = -1
-        sql = """SELECT dispersy_cid, infohash, time_stamp from ChannelTorrents, Channels, Torrent
-        WHERE ChannelTorrents.torrent_id = Torrent.torrent_id AND Channels.id = ChannelTorrents.channel_id
-        AND ChannelTorrents.channel_id in (select channel_id from ChannelVotes
-        WHERE voter_id ISNULL AND vote=2) and ChannelTorrents.dispersy_id <> -1 ORDER BY time_stamp desc limit ?"""
-        othersrecenttorrents = self._db.fetchall(sql, (NUM_OTHERS_RECENT_TORRENTS,))
-        for cid, infohash, timestamp in othersrecenttorrents:
-            torrent_dict.setdefault(str(cid), set()).add(str2bin(infohash))
-            least_recent = timestamp
-
-        if othersrecenttorrents and len(othersrecenttorrents) == NUM_OTHERS_RECENT_TORRENTS and least_recent != -1:
-            sql = """SELECT dispersy_cid, infohash FROM ChannelTorrents, Channels, Torrent
-            WHERE ChannelTorrents.torrent_id = Torrent.torrent_id AND Channels.id = ChannelTorrents.channel_id
-            AND ChannelTorrents.channel_id in (select channel_id from ChannelVotes
-            WHERE voter_id ISNULL and vote=2) and time_stamp < ?
-            AND ChannelTorrents.dispersy_id <> -1 order by random() limit ?"""
-            othersrandomtorrents = self._db.fetchall(sql, (least_recent, NUM_OTHERS_RANDOM_TORRENTS))
-            for cid, infohash in othersrandomtorrents:
-                torrent_dict.setdefault(str(cid), set()).add(str2bin(infohash))
+        favorite_pool = self._get_channelcast_pool(u"favorite")
+        others_recent = favorite_pool.get_recent(NUM_OTHERS_RECENT_TORRENTS)
+        channeltorrent_ids.update(others_recent)
+        if others_recent and len(others_recent) == NUM_OTHERS_RECENT_TORRENTS:
+            channeltorrent_ids.update(favorite_pool.get_random(NUM_OTHERS_RECENT_TORRENTS,
+                                                               NUM_OTHERS_RANDOM_TORRENTS))
 
-        twomonthsago = long(time() - 5259487)
-        nr_records = sum(len(torrents) for torrents in torrent_dict.values())
         additionalSpace = (NUM_OWN_RECENT_TORRENTS + NUM_OWN_RANDOM_TORRENTS +
-                           NUM_OTHERS_RECENT_TORRENTS + NUM_OTHERS_RANDOM_TORRENTS) - nr_records
+                           NUM_OTHERS_RECENT_TORRENTS + NUM_OTHERS_RANDOM_TORRENTS) - len(channeltorrent_ids)
         NUM_OTHERS_DOWNLOADED += additionalSpace
 
-        sql = """SELECT dispersy_cid, infohash from ChannelTorrents, Channels, Torrent
-        WHERE ChannelTorrents.torrent_id = Torrent.torrent_id AND Channels.id = ChannelTorrents.channel_id
-        AND ChannelTorrents.channel_id in (select distinct channel_id from ChannelTorrents
-        WHERE torrent_id in (select torrent_id from MyPreference))
-        AND ChannelTorrents.dispersy_id <> -1 and Channels.modified > ? order by time_stamp desc limit ?"""
-        interesting_records = self._db.fetchall(sql, (twomonthsago, NUM_OTHERS_DOWNLOADED))
-        for cid, infohash in interesting_records:
-            torrent_dict.setdefault(str(cid), set()).add(str2bin(infohash))
+        channeltorrent_ids.update(self._get_channelcast_pool(u"interesting").get_recent(NUM_OTHERS_DOWNLOADED))
 
+        torrent_dict = {}
+        if channeltorrent_ids:
+            sql = """SELECT dispersy_cid, infohash FROM ChannelTorrents, Channels, Torrent
+            WHERE ChannelTorrents.torrent_id = Torrent.torrent_id AND Channels.id = ChannelTorrents.channel_id
+            AND ChannelTorrents.id IN (""" + "?," * (len(channeltorrent_ids) - 1) + "?)"
+            for cid, infohash in self._db.fetchall(sql, list(channeltorrent_ids)):
+                torrent_dict.setdefault(str(cid), set()).add(str2bin(infohash))
         return torrent_dict
 
     def getRandomTorrents(self, channel_id, limit=15):
@@ -1880,7 +1982,11 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
         else:
             return self.__fixTorrent(keys, result)
 
-    def getTorrentsFromChannelId(self, channel_id, isDispersy, keys, limit=None):
+    def getTorrentsFromChannelId(self, channel_id, isDispersy, keys, limit=None, offset=None, order_by=None):
+        """
+        Returns the torrents in a channel, newest first unless order_by specifies another SQL ordering. If no limit
+        and offset are given, the torrent count of the channel is updated as well.
+        """
         if isDispersy:
             sql = "SELECT " + ", ".join(keys) + """ FROM Torrent, ChannelTorrents
                   WHERE Torrent.torrent_id = ChannelTorrents.torrent_id"""
@@ -1890,17 +1996,17 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
 
         if channel_id:
             sql += " AND channel_id = ?"
-        sql += " ORDER BY time_stamp DESC"
+        sql += " ORDER BY " + (order_by or "time_stamp DESC")
 
-        if limit:
-            sql += " LIMIT %d" % limit
+        if limit is not None or offset is not None:
+            sql += " LIMIT %d OFFSET %d" % (limit if limit is not None else -1, offset or 0)
 
         if channel_id:
             results = self._db.fetchall(sql, (channel_id,))
         else:
             results = self._db.fetchall(sql)
 
-        if limit is None and channel_id:
+        if limit is None and offset is None and channel_id:
             # use this possibility to update nrtorrent in channel
 
             if 'time_stamp' in keys and len(results) > 0:
@@ -2231,6 +2337,21 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
         sql = "Select id, name, description, dispersy_cid, modified, nr_torrents, nr_favorite, nr_spam FROM Channels"
         return self._getChannels(sql)
 
+    def getChannelsPage(self, offset, limit, order_by):
+        """
+        Returns a page of all channels, ordered by the SQL ordering order_by. Channels without a name are skipped in
+        the query, so the offsets of consecutive pages line up. Like _getChannels, names consisting of whitespace
+        (tabs and newlines included) count as no name.
+        """
+        sql = "Select id, name, description, dispersy_cid, modified, nr_torrents, nr_favorite, nr_spam " + \
+              "FROM Channels WHERE trim(name, char(9, 10, 11, 12, 13, 32)) != '' ORDER BY " + order_by + \
+              " LIMIT ? OFFSET ?"
+        return self._getChannels(sql, (limit if limit is not None else -1, offset), sort=False)
+
+    def getChannelsModified(self):
+        """ Returns the number of channels and the most recent modification time of a channel """
+        return self._db.fetchone("SELECT COUNT(*), MAX(modified) FROM Channels")
+
     def getNewChannels(self, updated_since=0):
         """ Returns all newest unsubscribed channels, ie the ones with no votes (positive or negative)"""
         sql = "Select id, name, description, dispersy_cid, modified, nr_torrents, nr_favorite, nr_spam " + \
@@ -2271,7 +2392,7 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
 
         return self._getChannels(sql)
 
-    def _getChannels(self, sql, args=None, cmpF=None, includeSpam=True):
+    def _getChannels(self, sql, args=None, cmpF=None, includeSpam=True, sort=True):
         """Returns the channels based on the input sql, if the number of positive votes
         is less than maxvotes and the number of torrent > 0"""
         if self.votecast_db is None:
@@ -2313,9 +2434,10 @@ ORDER BY CMD.time_stamp DESC LIMIT ?;
             # finally compare nr_torrents
             return cmp(a[4], b[4])
 
-        if cmpF is None:
-            cmpF = channel_sort
-        channels.sort(cmpF)
+        if sort:
+            if cmpF is None:
+                cmpF = channel_sort
+            channels.sort(cmpF)
         return channels
 
     def getMyChannelId(self):
@@ -8,6 +8,10 @@
 # 26 is used by Tribler 6.5-git (with database upgrade scripts)
 # 27 is used by Tribler 6.5-git (TorrentStatus and Category tables are removed)
 # 28 is used by Tribler 6.5-git (cleanup Metadata stuff)
+# 29 is used by Tribler 6.5-git (infohashes and permids are stored as blobs)
+# 30 is used by Tribler 6.5-git (collected torrents are indexed by their eviction weight)
+# 31 is used by Tribler 6.5-git (the full text index uses fts4)
+# 32 is used by Tribler 6.5-git (indexes for tracker checks and collected torrents)
 
 TRIBLER_59_DB_VERSION = 17
 TRIBLER_60_DB_VERSION = 17
@@ -25,9 +29,13 @@ TRIBLER_65PRE_DB_VERSION = 25
 TRIBLER_65PRE2_DB_VERSION = 26
 TRIBLER_65PRE3_DB_VERSION = 27
 TRIBLER_65PRE4_DB_VERSION = 28
+TRIBLER_65PRE5_DB_VERSION = 29
+TRIBLER_65PRE6_DB_VERSION = 30
+TRIBLER_65PRE7_DB_VERSION = 31
+TRIBLER_65PRE8_DB_VERSION = 32
 
 # the lowest supported database version number
 LOWEST_SUPPORTED_DB_VERSION = TRIBLER_59_DB_VERSION
 
 # the latest database version number
-LATEST_DB_VERSION = TRIBLER_65PRE4_DB_VERSION
+LATEST_DB_VERSION = TRIBLER_65PRE8_DB_VERSION
@@ -2,8 +2,9 @@
 # see LICENSE.txt for license information
 import logging
 import os
-from base64 import encodestring, decodestring
+from functools import wraps
 from threading import currentThread, RLock
+from time import time
 
 import apsw
 from apsw import CantOpenError, SQLError
@@ -14,6 +15,7 @@ from Tribler.dispersy.util import blocking_call_on_reactor_thread, call_on_react
 
 from Tribler import LIBRARYNAME
 from Tribler.Core.CacheDB.db_versions import LATEST_DB_VERSION
+from Tribler.Core.Utilities.metrics import registry
 
 
 DB_SCRIPT_NAME = u"schema_sdb_v%s.sql" % str(LATEST_DB_VERSION)
@@ -28,6 +30,8 @@ DEFAULT_BUSY_TIMEOUT = 10000
 
 TRHEADING_DEBUG = False
 
+DB_QUERY_SECONDS = registry.histogram(u"tribler_db_query_seconds", u"Duration of database queries", [u"method"])
+
 forceDBThread = call_on_reactor_thread
 forceAndReturnDBThread = blocking_call_on_reactor_thread
 
@@ -36,12 +40,38 @@ class CorruptedDatabaseError(Exception):
     pass
 
 
+def trace_query(func):
+    """
+    Observes the duration of a database call in DB_QUERY_SECONDS, and reports it to the slow call tracer of the
+    database, if it has one.
+    """
+    histogram = DB_QUERY_SECONDS.labels(method=unicode(func.__name__))
+
+    @wraps(func)
+    def wrapper(self, sql, *args, **kwargs):
+        start_time = time()
+        try:
+            return func(self, sql, *args, **kwargs)
+        finally:
+            duration = time() - start_time
+            histogram.observe(duration)
+            if self.slow_call_tracer is not None:
+                self.slow_call_tracer.record_sql(sql, duration)
+    return wrapper
+
+
 def bin2str(bin_data):
-    return encodestring(bin_data).replace("\n", "")
+    """
+    Convert binary data, such as an infohash or permid, to the blob that is stored in the database.
+    """
+    return buffer(bin_data)
 
 
 def str2bin(str_data):
-    return decodestring(str_data)
+    """
+    Convert a blob from the database back to binary data.
+    """
+    return str(str_data)
 
 
 class SQLiteCacheDB(TaskManager):
@@ -64,6 +94,9 @@ class SQLiteCacheDB(TaskManager):
         self._should_commit = False
         self._show_execute = False
 
+        # set by the reactor monitor to find the queries that block the reactor thread
+        self.slow_call_tracer = None
+
     @property
     def version(self):
         """The version of this database."""
@@ -284,6 +317,7 @@ class SQLiteCacheDB(TaskManager):
             raise msg
 
     @blocking_call_on_reactor_thread
+    @trace_query
     def executemany(self, sql, args=None):
         self._should_commit = True
 
@@ -309,6 +343,7 @@ class SQLiteCacheDB(TaskManager):
     def execute_read(self, sql, args=None):
         return self.execute(sql, args)
 
+    @trace_query
     def execute_write(self, sql, args=None):
         self._should_commit = True
 
@@ -378,6 +413,7 @@ class SQLiteCacheDB(TaskManager):
         return result
 
     @blocking_call_on_reactor_thread
+    @trace_query
     def fetchone(self, sql, args=None):
         find = self.execute_read(sql, args)
         if not find:
@@ -397,6 +433,7 @@ class SQLiteCacheDB(TaskManager):
             return find[0]
 
     @blocking_call_on_reactor_thread
+    @trace_query
     def fetchall(self, sql, args=None):
         res = self.execute_read(sql, args)
         if res is not None:
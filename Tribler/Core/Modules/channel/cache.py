@@ -7,39 +7,75 @@ import os
 class SimpleCache(object):
     """
     This is a cache for recording the keys that we have seen before.
+
+    The keys are kept in a set and stored in an append-only file with one JSON-encoded key per line, so saving the
+    cache only writes the keys that have been added since the last save.
     """
     def __init__(self, file_path):
         self._logger = logging.getLogger(self.__class__.__name__)
         self._file_path = file_path
 
-        self._cache_list = list()
-        self._initial_cache_size = 0
+        self._cache_set = set()
+        self._unsaved_keys = list()
+        self._rewrite_file = False
+
+    def __len__(self):
+        return len(self._cache_set)
 
     def add(self, key):
         if not self.has(key):
-            self._cache_list.append(key)
+            self._cache_set.add(key)
+            self._unsaved_keys.append(key)
 
     def has(self, key):
-        return key in self._cache_list
+        return key in self._cache_set
 
     def load(self):
-        if os.path.exists(self._file_path):
+        self._cache_set = set()
+        self._unsaved_keys = list()
+        self._rewrite_file = False
+
+        if not os.path.exists(self._file_path):
+            return
+
+        try:
+            with codecs.open(self._file_path, 'rb', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            self._logger.error(u"Failed to load cache file %s: %s", self._file_path, repr(e))
+            return
+
+        if content.lstrip().startswith(u'['):
+            # old format: the whole cache is stored as a single JSON list, rewrite it on the next save
             try:
-                with codecs.open(self._file_path, 'rb', encoding='utf-8') as f:
-                    self._cache_list = json.load(f)
-            except Exception as e:
+                self._cache_set = set(json.loads(content))
+                self._rewrite_file = True
+            except ValueError as e:
                 self._logger.error(u"Failed to load cache file %s: %s", self._file_path, repr(e))
-        else:
-            self._cache_list = list()
-        self._initial_cache_size = len(self._cache_list)
+            return
+
+        for line in content.splitlines():
+            if not line:
+                continue
+            try:
+                self._cache_set.add(json.loads(line))
+            except ValueError:
+                # a partially written line, e.g. due to a crash while saving
+                self._logger.warning(u"Skipping corrupt line in cache file %s", self._file_path)
+                self._rewrite_file = True
 
     def save(self):
-        if self._initial_cache_size == len(self._cache_list):
+        if not self._unsaved_keys and not self._rewrite_file:
             return
         try:
-            with codecs.open(self._file_path, 'wb', encoding='utf-8') as f:
-                json.dump(self._cache_list, f)
-                self._initial_cache_size = len(self._cache_list)
+            if self._rewrite_file:
+                with codecs.open(self._file_path, 'wb', encoding='utf-8') as f:
+                    f.writelines(json.dumps(key) + u'\n' for key in self._cache_set)
+                self._rewrite_file = False
+            else:
+                with codecs.open(self._file_path, 'ab', encoding='utf-8') as f:
+                    f.writelines(json.dumps(key) + u'\n' for key in self._unsaved_keys)
+            self._unsaved_keys = list()
         except Exception as e:
             self._logger.error(u"Failed to save cache file %s: %s", self._file_path, repr(e))
             return
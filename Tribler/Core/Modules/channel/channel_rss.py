@@ -8,8 +8,10 @@ import re
 import feedparser
 
 from twisted.internet import reactor
-from twisted.internet.defer import DeferredList
-from twisted.web.client import getPage
+from twisted.internet.defer import DeferredList, DeferredSemaphore, succeed
+from twisted.internet.threads import deferToThread
+from twisted.web.client import Agent, RedirectAgent, getPage, readBody
+from twisted.web.http_headers import Headers
 
 from Tribler.dispersy.taskmanager import TaskManager
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
@@ -18,8 +20,10 @@ from Tribler.Core.simpledefs import (SIGNAL_CHANNEL_COMMUNITY, SIGNAL_ON_TORRENT
                                      SIGNAL_ON_UPDATED)
 from Tribler.Core.TorrentDef import TorrentDef
 from Tribler.Core.Modules.channel.cache import SimpleCache
+from Tribler.Core.version import version_id
 
 DEFAULT_CHECK_INTERVAL = 1800  # half an hour
+MAX_CONCURRENT_DOWNLOADS = 4  # maximum number of torrents and thumbnails that are downloaded in parallel per feed
 
 
 class ChannelRssParser(TaskManager):
@@ -37,6 +41,14 @@ class ChannelRssParser(TaskManager):
 
         self._pending_metadata_requests = {}
 
+        # validators of the last successfully processed feed, used for conditional requests
+        self._etag = None
+        self._last_modified = None
+        # validators of the feed that is being parsed, only kept once parsing succeeded
+        self._pending_validators = None
+
+        self._download_semaphore = DeferredSemaphore(MAX_CONCURRENT_DOWNLOADS)
+
         self._to_stop = False
 
     @blocking_call_on_reactor_thread
@@ -79,20 +91,96 @@ class ChannelRssParser(TaskManager):
         self.session = None
 
     def parse_feed(self):
-        rss_parser = RSSFeedParser()
+        """
+        Fetches the RSS feed without blocking the reactor, parses it in a thread and downloads the torrents of the new
+        items.
+        :return: a Deferred that fires when all torrents of the new items have been processed.
+        """
+        if self._to_stop:
+            return None
 
-        def_list = []
+        feed_deferred = self._fetch_feed()
+        feed_deferred.addCallback(self._parse_feed_content)
+        feed_deferred.addCallback(self._download_feed_items)
+        feed_deferred.addErrback(self._on_feed_error)
+        return feed_deferred
+
+    def _fetch_feed(self):
+        """
+        Fetches the content of the RSS feed. HTTP feeds are requested with a conditional GET, other feeds (e.g. local
+        files) are handed to feedparser as they are.
+        :return: a Deferred that fires with the feed content, or with None if the feed has not been modified.
+        """
+        if not self.rss_url.startswith((u'http://', u'https://')):
+            return succeed(self.rss_url)
+
+        headers = {'User-Agent': ['Tribler ' + version_id]}
+        if self._etag:
+            headers['If-None-Match'] = [self._etag]
+        if self._last_modified:
+            headers['If-Modified-Since'] = [self._last_modified]
+
+        agent = RedirectAgent(Agent(reactor, connectTimeout=30.0))
+        request_deferred = agent.request('GET', self.rss_url.encode('utf-8'), Headers(headers), None)
+        return request_deferred.addCallback(self._on_feed_response)
+
+    def _on_feed_response(self, response):
+        if response.code == 304:
+            self._logger.debug(u"RSS feed %s has not been modified", self.rss_url)
+            return None
+        elif response.code != 200:
+            self._logger.warning(u"Got response code %s when fetching RSS feed %s", response.code, self.rss_url)
+            return None
+
+        def on_body(body):
+            self._pending_validators = (response.headers.getRawHeaders('etag', [None])[0],
+                                        response.headers.getRawHeaders('last-modified', [None])[0])
+            return body
 
-        for rss_item in rss_parser.parse(self.rss_url, self._url_cache):
-            if self._to_stop:
-                return None
+        return readBody(response).addCallback(on_body)
 
-            torrent_deferred = getPage(rss_item[u'torrent_url'].encode('utf-8'))
+    def _parse_feed_content(self, content):
+        if content is None or self._to_stop:
+            return []
+
+        rss_parser = RSSFeedParser()
+        url_cache = self._url_cache
+        parse_deferred = deferToThread(lambda: list(rss_parser.parse(content, url_cache)))
+        parse_deferred.addCallback(self._on_feed_parsed)
+        return parse_deferred
+
+    def _on_feed_parsed(self, rss_items):
+        # only now the feed has been parsed, the next scrape may skip it if it has not been modified
+        if self._pending_validators:
+            self._etag, self._last_modified = self._pending_validators
+            self._pending_validators = None
+        return rss_items
+
+    def _download_feed_items(self, rss_items):
+        if self._to_stop:
+            return None
+
+        def_list = []
+        for rss_item in rss_items:
+            torrent_url = rss_item[u'torrent_url']
+            torrent_deferred = self._download_semaphore.run(getPage, torrent_url.encode('utf-8'))
             torrent_deferred.addCallback(lambda t, r=rss_item: self.on_got_torrent(t, rss_item=r))
+            torrent_deferred.addErrback(self._on_download_error, torrent_url)
             def_list.append(torrent_deferred)
 
         return DeferredList(def_list)
 
+    def _on_download_error(self, failure, url, refetch_feed=True):
+        self._logger.error(u"Failed to download %s from RSS feed %s: %s", url, self.rss_url, failure.getErrorMessage())
+        if refetch_feed:
+            # make sure the next scrape fetches the whole feed again, so the failed item is retried
+            self._etag = None
+            self._last_modified = None
+
+    def _on_feed_error(self, failure):
+        self._pending_validators = None
+        self._logger.error(u"Failed to fetch RSS feed %s: %s", self.rss_url, failure.getErrorMessage())
+
     def _task_scrape(self):
         self.parse_feed()
 
@@ -137,8 +225,10 @@ class ChannelRssParser(TaskManager):
                 rss_item[u'info_hash'] = data[u'info_hash']
                 rss_item[u'channel_torrent_id'] = data[u'channel_torrent_id']
 
-                metadata_deferred = getPage(rss_item[u'thumbnail_url'].encode('utf-8'))
+                thumbnail_url = rss_item[u'thumbnail_url']
+                metadata_deferred = self._download_semaphore.run(getPage, thumbnail_url.encode('utf-8'))
                 metadata_deferred.addCallback(lambda md, r=rss_item: self.on_got_metadata(md, rss_item=r))
+                metadata_deferred.addErrback(self._on_download_error, thumbnail_url, refetch_feed=False)
 
     def on_got_metadata(self, metadata_data, rss_item=None):
         # save metadata
@@ -200,8 +290,12 @@ class RSSFeedParser(object):
 
     def parse(self, url, cache):
         """Parses a RSS feed. This methods supports RSS 2.0 and Media RSS.
+        The url can also be the content of an already fetched feed. As parsing (and fetching) blocks, this method
+        should not be called on the reactor thread.
         """
         feed = feedparser.parse(url)
+        if feed.bozo and not feed.entries:
+            raise ValueError(u"could not parse the RSS feed: %s" % feed.get(u'bozo_exception'))
 
         for item in feed.entries:
             # ignore the ones that we have seen before
@@ -1,13 +1,90 @@
+import hashlib
 import json
+import os
 import time
+from threading import Lock
 
 from twisted.web import http, resource
 
 from Tribler.Core.Modules.restapi import VOTE_SUBSCRIBE, VOTE_UNSUBSCRIBE
 from Tribler.Core.Modules.restapi.util import convert_db_channel_to_json, convert_db_torrent_to_json
-from Tribler.Core.simpledefs import NTFY_CHANNELCAST
+from Tribler.Core.simpledefs import (NTFY_CHANNELCAST, NTFY_CREATE, NTFY_INSERT, NTFY_MODIFIED, NTFY_STATE,
+                                     NTFY_TORRENTS, NTFY_UPDATE, NTFY_VOTECAST)
 from Tribler.community.allchannel.community import AllChannelCommunity
 
+RESPONSE_CACHE_TTL = 5
+RESPONSE_CACHE_MAX_SIZE = 256
+
+# The values of the sort argument of the listing endpoints and the columns they sort on.
+CHANNEL_SORT_COLUMNS = {"id": "id", "name": "name", "votes": "nr_favorite", "torrents": "nr_torrents",
+                        "spam": "nr_spam", "modified": "modified"}
+TORRENT_SORT_COLUMNS = {"id": "Torrent.torrent_id", "name": "Torrent.name", "size": "length",
+                        "category": "Torrent.category", "num_seeders": "num_seeders", "num_leechers": "num_leechers",
+                        "last_tracker_check": "last_tracker_check"}
+
+
+class ChannelsResponseCache(object):
+    """
+    A short-lived cache of the responses of the channel listing endpoints, together with their ETags. The cache is
+    cleared whenever the Notifier reports a change in the channels, votes or torrents.
+    """
+
+    def __init__(self, session, ttl=RESPONSE_CACHE_TTL):
+        self.ttl = ttl
+        self.responses = {}
+        self.version = 0
+        self.nonce = os.urandom(8).encode('hex')
+        self.lock = Lock()
+
+        session.add_observer(self.invalidate, NTFY_CHANNELCAST,
+                             [NTFY_INSERT, NTFY_UPDATE, NTFY_CREATE, NTFY_MODIFIED, NTFY_STATE])
+        session.add_observer(self.invalidate, NTFY_VOTECAST, [NTFY_UPDATE])
+        session.add_observer(self.invalidate, NTFY_TORRENTS, [NTFY_INSERT, NTFY_UPDATE])
+
+    def invalidate(self, *_):
+        """
+        Drop all cached responses. This is called by the Notifier, so it may run on any thread.
+        """
+        with self.lock:
+            self.version += 1
+            self.responses.clear()
+
+    def get_etag(self, key, version, stamp):
+        return '"%s"' % hashlib.sha1(repr((self.nonce, version, stamp, key))).hexdigest()
+
+    def render(self, request, get_stamp, render_body):
+        """
+        Return the response to a GET request, either from the cache or by calling render_body. The ETag of the
+        response is derived from the stamp returned by get_stamp, which should change when the listed rows change.
+        If the client already has the response, the body is not rendered and a 304 response is returned.
+        """
+        key = (request.path, tuple(sorted((name, tuple(values)) for name, values in request.args.iteritems())))
+        now = time.time()
+        with self.lock:
+            version = self.version
+            cached = self.responses.get(key)
+
+        if cached and cached[2] > now:
+            etag, body = cached[:2]
+        else:
+            etag = self.get_etag(key, version, get_stamp())
+            body = None
+
+        request.setHeader('ETag', etag)
+        if request.getHeader('If-None-Match') == etag:
+            request.setResponseCode(http.NOT_MODIFIED)
+            return ""
+
+        if body is None:
+            body = render_body()
+            with self.lock:
+                # Responses rendered while the database changed might be outdated already
+                if self.version == version:
+                    if len(self.responses) >= RESPONSE_CACHE_MAX_SIZE:
+                        self.responses.clear()
+                    self.responses[key] = (etag, body, now + self.ttl)
+        return body
+
 
 class BaseChannelsEndpoint(resource.Resource):
     """
@@ -38,6 +115,44 @@ class BaseChannelsEndpoint(resource.Resource):
             return None
         return channels_list[0]
 
+    @staticmethod
+    def get_pagination_args(request, sort_columns):
+        """
+        Parse the offset, limit and sort arguments of a listing request. The sort argument is one of the keys in
+        sort_columns, prefixed with a '-' to sort in descending order.
+        :param request: The request to parse the arguments of.
+        :param sort_columns: A dictionary of the allowed sort arguments and the columns they sort on.
+        :return: A tuple (offset, limit, order_by), or None if the request does not ask for a page.
+        """
+        if not any(arg in request.args for arg in ['offset', 'limit', 'sort']):
+            return None
+
+        offset = request.args.get('offset', ['0'])[0]
+        limit = request.args.get('limit', [None])[0]
+        if not offset.isdigit():
+            raise ValueError("offset should be a non-negative integer")
+        if limit is not None and not limit.isdigit():
+            raise ValueError("limit should be a non-negative integer")
+
+        sort = request.args.get('sort', [None])[0]
+        if sort is None:
+            order_by = None
+        else:
+            column = sort_columns.get(sort.lstrip('-'))
+            if column is None:
+                raise ValueError("sort should be one of %s" % ", ".join(sorted(sort_columns.keys())))
+            order_by = column + (" DESC" if sort.startswith('-') else " ASC")
+
+        return int(offset), int(limit) if limit is not None else None, order_by
+
+    @staticmethod
+    def return_400(request, message):
+        """
+        Returns a 400 response code if the arguments of the request are invalid.
+        """
+        request.setResponseCode(http.BAD_REQUEST)
+        return json.dumps({"error": message})
+
     def vote_for_channel(self, cid, vote):
         """
         Make a vote in the channel specified by the cid
@@ -146,13 +261,25 @@ class ChannelsDiscoveredEndpoint(BaseChannelsEndpoint):
     """
     This class is responsible for requests regarding the subscriptions to channels.
     """
+
+    def __init__(self, session):
+        BaseChannelsEndpoint.__init__(self, session)
+        self.response_cache = ChannelsResponseCache(session)
+
     def getChild(self, path, request):
-        return ChannelsDiscoveredSpecificEndpoint(self.session, path)
+        return ChannelsDiscoveredSpecificEndpoint(self.session, path, self.response_cache)
 
     def render_GET(self, request):
         """
         A GET request to this endpoint returns all channels discovered in Tribler.
 
+        A page of the channels can be requested with the offset, limit and sort arguments. The sort argument is one
+        of id, name, votes, torrents, spam or modified, prefixed with a '-' to sort in descending order. By default,
+        pages are sorted on the number of votes and modification time.
+
+        The response contains an ETag header. If it matches the If-None-Match header of the request, a 304 response
+        without body is returned.
+
         Example GET response:
         {
             "channels": [{
@@ -168,9 +295,22 @@ class ChannelsDiscoveredEndpoint(BaseChannelsEndpoint):
             }, ...]
         }
         """
-        all_channels_db = self.channel_db_handler.getAllChannels()
-        results_json = [convert_db_channel_to_json(channel) for channel in all_channels_db]
-        return json.dumps({"channels": results_json})
+        try:
+            page = self.get_pagination_args(request, CHANNEL_SORT_COLUMNS)
+        except ValueError as ex:
+            return ChannelsDiscoveredEndpoint.return_400(request, str(ex))
+
+        def render_channels():
+            if page:
+                offset, limit, order_by = page
+                all_channels_db = self.channel_db_handler.getChannelsPage(
+                    offset, limit, order_by or "nr_favorite DESC, modified DESC, id ASC")
+            else:
+                all_channels_db = self.channel_db_handler.getAllChannels()
+            results_json = [convert_db_channel_to_json(channel) for channel in all_channels_db]
+            return json.dumps({"channels": results_json})
+
+        return self.response_cache.render(request, self.channel_db_handler.getChannelsModified, render_channels)
 
 
 class ChannelsDiscoveredSpecificEndpoint(BaseChannelsEndpoint):
@@ -178,12 +318,12 @@ class ChannelsDiscoveredSpecificEndpoint(BaseChannelsEndpoint):
     This class is responsible for dispatching requests to perform operations in a specific discovered channel.
     """
 
-    def __init__(self, session, cid):
+    def __init__(self, session, cid, response_cache):
         BaseChannelsEndpoint.__init__(self, session)
 
         child_handler_dict = {"torrents": ChannelTorrentsEndpoint}
         for path, child_cls in child_handler_dict.iteritems():
-            self.putChild(path, child_cls(session, bytes(cid.decode('hex'))))
+            self.putChild(path, child_cls(session, bytes(cid.decode('hex')), response_cache))
 
 
 class ChannelTorrentsEndpoint(BaseChannelsEndpoint):
@@ -191,6 +331,10 @@ class ChannelTorrentsEndpoint(BaseChannelsEndpoint):
     A GET request to this endpoint returns all discovered torrents in a specific channel. The size of the torrent is
     in number of bytes. The last_tracker_check value will be 0 if we did not check the tracker state of the torrent yet.
 
+    A page of the torrents can be requested with the offset, limit and sort arguments. The sort argument is one of id,
+    name, size, category, num_seeders, num_leechers or last_tracker_check, prefixed with a '-' to sort in descending
+    order. By default, the newest torrents come first. Like the channels listing, the response has an ETag header.
+
     Example GET response:
     {
         "torrents": [{
@@ -206,19 +350,36 @@ class ChannelTorrentsEndpoint(BaseChannelsEndpoint):
     }
     """
 
-    def __init__(self, session, cid):
+    def __init__(self, session, cid, response_cache):
         BaseChannelsEndpoint.__init__(self, session)
         self.cid = cid
+        self.response_cache = response_cache
 
     def render_GET(self, request):
         channel_info = self.get_channel_from_db(self.cid)
         if channel_info is None:
             return ChannelTorrentsEndpoint.return_404(request)
 
-        torrent_db_columns = ['Torrent.torrent_id', 'infohash', 'Torrent.name', 'length',
-                              'Torrent.category', 'num_seeders', 'num_leechers', 'last_tracker_check']
-        results_local_torrents_channel = self.channel_db_handler\
-            .getTorrentsFromChannelId(channel_info[0], True, torrent_db_columns)
-
-        results_json = [convert_db_torrent_to_json(torrent_result) for torrent_result in results_local_torrents_channel]
-        return json.dumps({"torrents": results_json})
+        try:
+            page = self.get_pagination_args(request, TORRENT_SORT_COLUMNS)
+        except ValueError as ex:
+            return ChannelTorrentsEndpoint.return_400(request, str(ex))
+
+        def render_torrents():
+            torrent_db_columns = ['Torrent.torrent_id', 'infohash', 'Torrent.name', 'length',
+                                  'Torrent.category', 'num_seeders', 'num_leechers', 'last_tracker_check']
+            if page:
+                offset, limit, order_by = page
+                results_local_torrents_channel = self.channel_db_handler.getTorrentsFromChannelId(
+                    channel_info[0], True, torrent_db_columns, limit=limit, offset=offset,
+                    order_by=(order_by + ", " if order_by else "") + "time_stamp DESC, ChannelTorrents.id DESC")
+            else:
+                results_local_torrents_channel = self.channel_db_handler\
+                    .getTorrentsFromChannelId(channel_info[0], True, torrent_db_columns)
+
+            results_json = [convert_db_torrent_to_json(torrent_result)
+                            for torrent_result in results_local_torrents_channel]
+            return json.dumps({"torrents": results_json})
+
+        # The modification time and torrent count of the channel change whenever torrents are added to it
+        return self.response_cache.render(request, lambda: (channel_info[8], channel_info[4]), render_torrents)
@@ -0,0 +1,182 @@
+import json
+
+from twisted.web import http, resource
+
+from Tribler.Core.Utilities.profiler import (DEFAULT_SAMPLE_INTERVAL, FORMAT_CALLGRIND, FORMAT_COLLAPSED,
+                                             PROFILER_SAMPLING, PROFILER_YAPPI, SamplingProfiler, YappiProfiler,
+                                             get_profile_filename)
+
+
+class DebugEndpoint(resource.Resource):
+    """
+    This endpoint is responsible for handing requests regarding debug information in Tribler.
+    """
+
+    def __init__(self, session):
+        resource.Resource.__init__(self)
+        self.session = session
+
+        self.putChild("reactor", DebugReactorEndpoint(session))
+        self.putChild("profiler", DebugProfilerEndpoint(session))
+
+
+class DebugReactorEndpoint(resource.Resource):
+    """
+    This endpoint is responsible for handing requests regarding the health of the reactor thread.
+
+    A GET request to this endpoint returns how late the reactor has been running its scheduled calls (in seconds),
+    and the calls on the reactor thread that took longer than the slow call threshold, the ones that took the most
+    time in total first. A 404 is returned if the reactor monitor is not enabled.
+
+    Example GET response:
+    {
+        "reactor": {
+            "running": True,
+            "interval": 0.5,
+            "slow_call_threshold": 0.1,
+            "lag": {
+                "buckets": [[0.005, 1432], [0.01, 12], ..., ["inf", 0]],
+                "count": 1460,
+                "mean": 0.0021,
+                "max": 0.41,
+                "p50": 0.005,
+                "p99": 0.25
+            },
+            "slow_calls": [{
+                "name": "Tribler.Core.CacheDB.SqliteCacheDBHandler.TorrentDBHandler.freeSpace",
+                "count": 2,
+                "total_time": 0.65,
+                "max_time": 0.41
+            }, ...]
+        }
+    }
+    """
+
+    def __init__(self, session):
+        resource.Resource.__init__(self)
+        self.session = session
+
+    def render_GET(self, request):
+        """
+        Returns the reactor lag histogram and the slow calls in a JSON dictionary.
+        """
+        reactor_monitor = self.session.lm.reactor_monitor
+        if reactor_monitor is None:
+            request.setResponseCode(http.NOT_FOUND)
+            return json.dumps({"error": "the reactor monitor is not enabled"})
+
+        return json.dumps({"reactor": reactor_monitor.get_stats()})
+
+
+class DebugProfilerEndpoint(resource.Resource):
+    """
+    This endpoint is responsible for starting and stopping a profiler while Tribler is running.
+
+    A GET request to this endpoint returns the state of the profiler that is running or has run last.
+
+    Example GET response:
+    {
+        "profiler": {
+            "mode": "sampling",
+            "running": True,
+            "start_time": 1477064400.0,
+            "duration": 12.5,
+            "interval": 0.005,
+            "threads": ["reactor"],
+            "samples": 2480,
+            "stacks": 312,
+            "overhead": 0.004
+        }
+    }
+    """
+
+    def __init__(self, session):
+        resource.Resource.__init__(self)
+        self.session = session
+
+    def render_GET(self, request):
+        """
+        Returns the state of the profiler, or {"running": False} if no profiler has been started.
+        """
+        profiler = self.session.lm.profiler
+        return json.dumps({"profiler": profiler.get_stats() if profiler else {"running": False}})
+
+    def render_PUT(self, request):
+        """
+        Start a profiler. Returns error 400 if a profiler is already running or if the parameters are invalid.
+
+        Example request:
+        {
+            "mode" (optional): "sampling" (default) or "yappi",
+            "interval" (optional): the number of seconds between two samples of the sampling profiler (default: 0.005),
+            "threads" (optional): a comma separated list of the threads to sample, "reactor", "threadpool" and/or
+                                  "other" (default: all threads),
+            "clock_type" (optional): the clock yappi measures with, "wall" (default) or "cpu"
+        }
+
+        Example response:
+        {
+            "started": True
+        }
+        """
+        if self.session.lm.profiler and self.session.lm.profiler.running:
+            request.setResponseCode(http.BAD_REQUEST)
+            return json.dumps({"error": "the profiler is already running"})
+
+        parameters = http.parse_qs(request.content.read(), 1)
+        mode = parameters['mode'][0] if parameters.get('mode') else PROFILER_SAMPLING
+
+        try:
+            if mode == PROFILER_SAMPLING:
+                interval = float(parameters['interval'][0]) if parameters.get('interval') else DEFAULT_SAMPLE_INTERVAL
+                threads = parameters['threads'][0].split(',') if parameters.get('threads') else None
+                profiler = SamplingProfiler(interval, threads)
+            elif mode == PROFILER_YAPPI:
+                profiler = YappiProfiler(parameters['clock_type'][0] if parameters.get('clock_type') else u"wall")
+            else:
+                raise ValueError(u"the mode should be %s or %s" % (PROFILER_SAMPLING, PROFILER_YAPPI))
+        except ValueError as exc:
+            request.setResponseCode(http.BAD_REQUEST)
+            return json.dumps({"error": unicode(exc)})
+
+        self.session.lm.profiler = profiler
+        profiler.start()
+        return json.dumps({"started": True})
+
+    def render_DELETE(self, request):
+        """
+        Stop the running profiler and save its profile in the state directory. The profile of the sampling profiler
+        is saved in the collapsed stack format of flamegraph.pl by default, the one of yappi in the callgrind format.
+        Returns error 400 if no profiler is running or if the format is not supported by the profiler.
+
+        Example request:
+        {
+            "format" (optional): "collapsed", "callgrind" or "pstat" (yappi only)
+        }
+
+        Example response:
+        {
+            "profiler_file": "/home/user/.Tribler/profile-sampling-1477064400.collapsed"
+        }
+        """
+        profiler = self.session.lm.profiler
+        if not profiler or not profiler.running:
+            request.setResponseCode(http.BAD_REQUEST)
+            return json.dumps({"error": "the profiler is not running"})
+
+        parameters = http.parse_qs(request.content.read(), 1)
+        if parameters.get('format'):
+            output_format = parameters['format'][0]
+        else:
+            output_format = FORMAT_COLLAPSED if profiler.mode == PROFILER_SAMPLING else FORMAT_CALLGRIND
+
+        try:
+            profiler.check_format(output_format)
+        except ValueError as exc:
+            request.setResponseCode(http.BAD_REQUEST)
+            return json.dumps({"error": unicode(exc)})
+
+        profiler.stop()
+        filename = get_profile_filename(self.session.get_state_dir(), profiler, output_format)
+        profiler.save(filename, output_format)
+        return json.dumps({"profiler_file": filename})
@@ -1,10 +1,17 @@
 import json
+import os
 
-from twisted.web import resource
+from twisted.web import http, resource
 from Tribler.Core.Libtorrent.LibtorrentDownloadImpl import LibtorrentStatisticsResponse
 
 from Tribler.Core.simpledefs import DOWNLOAD, UPLOAD, dlstatus_strings
 
+DOWNLOAD_FIELDS = frozenset(["name", "progress", "infohash", "speed_down", "speed_up", "status", "size", "eta",
+                             "num_peers", "num_seeds", "files", "trackers", "hops", "anon_download", "safe_seeding",
+                             "max_upload_speed", "max_download_speed"])
+MAX_DELTA_STATES = 16
+MAX_DELTA_REMOVED = 64
+
 
 class DownloadsEndpoint(resource.Resource):
     """
@@ -16,6 +23,13 @@ class DownloadsEndpoint(resource.Resource):
         resource.Resource.__init__(self)
         self.session = session
 
+        # The last response for every download per set of requested fields, used to answer delta requests. Tokens
+        # older than delta_horizon may have missed a removal that has been forgotten since.
+        self.delta_nonce = os.urandom(4).encode('hex')
+        self.delta_version = 0
+        self.delta_horizon = 0
+        self.delta_states = {}
+
     def render_GET(self, request):
         """
         A GET request to this endpoint returns all downloads in Tribler, both active and inactive. The progress is a
@@ -54,39 +68,118 @@ class DownloadsEndpoint(resource.Resource):
                 "max_download_speed": 0,
             }, ...]
         }
+
+        The fields argument is a comma-separated list of the fields to return, for instance fields=infohash,progress
+        to skip the (expensive) files and trackers. With the changed_since argument, only the downloads that changed
+        since the response with that token are returned, together with the infohashes of the removed downloads and a
+        new token. An empty, unknown or expired token returns all downloads, in which case full is true and the client
+        should drop the downloads that are not in the response.
+
+        Example response with changed_since:
+        {
+            "downloads": [{
+                "infohash": "4344503b7e797ebf31582327a5baae35b11bda01",
+                "progress": 0.31459265
+            }],
+            "removed": ["97d2d8f5d37e56cfaeaae151d55f05b077074779"],
+            "token": "8a0e63c1:42",
+            "full": false
+        }
         """
-        downloads_json = []
-        downloads = self.session.get_downloads()
-        for download in downloads:
+        fields = request.args.get('fields', [None])[0]
+        if fields is None:
+            fields = DOWNLOAD_FIELDS
+        else:
+            fields = frozenset(fields.split(',')) | frozenset(["infohash"])
+            if not fields <= DOWNLOAD_FIELDS:
+                request.setResponseCode(http.BAD_REQUEST)
+                return json.dumps({"error": "unknown fields: %s" % ", ".join(sorted(fields - DOWNLOAD_FIELDS))})
+
+        downloads_json = [self.get_download_json(download, fields) for download in self.session.get_downloads()]
+
+        if 'changed_since' not in request.args:
+            return json.dumps({"downloads": downloads_json})
+        return json.dumps(self.get_delta(downloads_json, fields, request.args['changed_since'][0]))
+
+    @staticmethod
+    def get_files_json(download):
+        """
+        Return the files of a download. The files are listed in the order of the metainfo, so their position is their
+        index in the torrent.
+        """
+        selected_files = set(download.get_selected_files())
+        return [{"index": file_index, "name": file, "size": size, "included": file in selected_files}
+                for file_index, (file, size) in enumerate(download.get_def().get_files_as_unicode_with_length())]
+
+    def get_download_json(self, download, fields):
+        """
+        Return the information about a download, limited to the given fields. The information about peers, files and
+        trackers is only gathered if it is requested.
+        """
+        download_json = {"name": download.correctedinfoname, "progress": download.get_progress(),
+                         "infohash": download.get_def().get_infohash().encode('hex'),
+                         "speed_down": download.get_current_speed(DOWNLOAD),
+                         "speed_up": download.get_current_speed(UPLOAD),
+                         "status": dlstatus_strings[download.get_status()],
+                         "size": download.get_length(), "eta": download.network_calc_eta(),
+                         "hops": download.get_hops(),
+                         "anon_download": download.get_anon_mode(), "safe_seeding": download.get_safe_seeding(),
+                         "max_upload_speed": download.get_max_speed(UPLOAD),
+                         "max_download_speed": download.get_max_speed(DOWNLOAD)}
+
+        if "num_peers" in fields or "num_seeds" in fields:
             stats = download.network_create_statistics_reponse() or LibtorrentStatisticsResponse(0, 0, 0, 0, 0, 0, 0)
+            download_json["num_peers"] = stats.numPeers
+            download_json["num_seeds"] = stats.numSeeds
+
+        if "files" in fields:
+            download_json["files"] = self.get_files_json(download)
+
+        if "trackers" in fields:
+            download_json["trackers"] = [{"url": url, "peers": url_info[0], "status": url_info[1]}
+                                         for url, url_info in download.network_tracker_status().iteritems()]
+
+        return {key: value for key, value in download_json.iteritems() if key in fields}
+
+    def get_delta(self, downloads_json, fields, token):
+        """
+        Return the downloads that changed or were removed since the response with the given token. Tokens are only
+        comparable for requests with the same fields. Unknown tokens, for instance of a previous run of Tribler, and
+        tokens older than the removals we still remember are answered with all downloads.
+        """
+        nonce, _, version = token.partition(':')
+        since = int(version) if nonce == self.delta_nonce and version.isdigit() else -1
+
+        if fields not in self.delta_states and len(self.delta_states) >= MAX_DELTA_STATES:
+            # Forget all states, and with them the removals, so no token handed out so far is valid anymore
+            self.delta_states.clear()
+            self.delta_nonce = os.urandom(4).encode('hex')
+            self.delta_horizon = 0
+            since = -1
+        states = self.delta_states.setdefault(fields, {})
+
+        for download_json in downloads_json:
+            state = states.get(download_json["infohash"])
+            if state is None or state[1] != download_json:
+                self.delta_version += 1
+                states[download_json["infohash"]] = (self.delta_version, download_json)
+
+        current = set(download_json["infohash"] for download_json in downloads_json)
+        for infohash, state in states.items():
+            if infohash not in current and state[1] is not None:
+                self.delta_version += 1
+                states[infohash] = (self.delta_version, None)
+
+        # Only remember the most recent removals
+        removals = sorted((state[0], infohash) for infohash, state in states.iteritems() if state[1] is None)
+        for removed_version, infohash in removals[:-MAX_DELTA_REMOVED]:
+            del states[infohash]
+            self.delta_horizon = max(self.delta_horizon, removed_version)
+        if since < self.delta_horizon:
+            since = -1
 
-            # Create files information of the download
-            selected_files = download.get_selected_files()
-            files_array = []
-            for file, size in download.get_def().get_files_as_unicode_with_length():
-                if download.get_def().is_multifile_torrent():
-                    file_index = download.get_def().get_index_of_file_in_files(file)
-                else:
-                    file_index = 0
-
-                files_array.append({"index": file_index, "name": file, "size": size,
-                                    "included": (file in selected_files)})
-
-            # Create tracker information of the download
-            tracker_info = []
-            for url, url_info in download.network_tracker_status().iteritems():
-                tracker_info.append({"url": url, "peers": url_info[0], "status": url_info[1]})
-
-            download_json = {"name": download.correctedinfoname, "progress": download.get_progress(),
-                             "infohash": download.get_def().get_infohash().encode('hex'),
-                             "speed_down": download.get_current_speed(DOWNLOAD),
-                             "speed_up": download.get_current_speed(UPLOAD),
-                             "status": dlstatus_strings[download.get_status()],
-                             "size": download.get_length(), "eta": download.network_calc_eta(),
-                             "num_peers": stats.numPeers, "num_seeds": stats.numSeeds, "files": files_array,
-                             "trackers": tracker_info, "hops": download.get_hops(),
-                             "anon_download": download.get_anon_mode(), "safe_seeding": download.get_safe_seeding(),
-                             "max_upload_speed": download.get_max_speed(UPLOAD),
-                             "max_download_speed": download.get_max_speed(DOWNLOAD)}
-            downloads_json.append(download_json)
-        return json.dumps({"downloads": downloads_json})
+        changed = [download_json for download_json in downloads_json if states[download_json["infohash"]][0] > since]
+        removed = [infohash for infohash, state in states.iteritems()
+                   if state[1] is None and state[0] > since >= 0]
+        return {"downloads": changed, "removed": removed, "token": "%s:%d" % (self.delta_nonce, self.delta_version),
+                "full": since < 0}
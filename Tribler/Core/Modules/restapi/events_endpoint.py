@@ -1,84 +1,141 @@
 import json
+import logging
+from collections import deque
+from threading import Lock
+
+from twisted.internet.interfaces import IPushProducer
 from twisted.web import server, resource
+from zope.interface import implementer
+
 from Tribler.Core.Modules.restapi.util import convert_db_channel_to_json, convert_torrent_to_json
 from Tribler.Core.simpledefs import NTFY_CHANNELCAST, SIGNAL_CHANNEL, SIGNAL_ON_SEARCH_RESULTS, SIGNAL_TORRENT
+from Tribler.dispersy.util import call_on_reactor_thread
 
 
 MAX_EVENTS_BUFFER_SIZE = 100
+MAX_RESULTS_PER_QUERY = 5000
 
 
+@implementer(IPushProducer)
 class EventsEndpoint(resource.Resource):
     """
     Important events in Tribler are returned over the events endpoint. This connection is held open. Each event is
-    pushed over this endpoint in the form of a JSON dictionary. Each JSON dictionary contains a type field that
-    indicates the type of the event.
+    pushed over this endpoint in the form of a JSON dictionary, followed by a newline. Each JSON dictionary contains a
+    type field that indicates the type of the event. Events that are created at the same time, such as the results
+    of a single search result message, are written to the connection at once.
 
     Currently, the following events are implemented:
     - events_start: An indication that the event socket is opened and that the server is ready to push events.
     - search_result_channel: This event dictionary contains a search result with a channel that has been found.
     - search_result_torrent: This event dictionary contains a search result with a torrent that has been found.
+
+    When the client does not read the events fast enough, the events are kept in a bounded buffer until the
+    connection can be written to again. If the buffer is full, the oldest events are dropped.
     """
 
     def __init__(self, session):
         resource.Resource.__init__(self)
+        self._logger = logging.getLogger(self.__class__.__name__)
         self.session = session
         self.channel_db_handler = self.session.open_dbhandler(NTFY_CHANNELCAST)
         self.events_request = None
-        self.buffer = []
+        self.events_request_paused = False
+        self.buffer = deque()
 
-        self.infohashes_sent = None
-        self.channel_cids_sent = None
+        # the search results are delivered from the notifier threads
+        self._results_lock = Lock()
+        self.infohashes_sent = set()
+        self.channel_cids_sent = set()
 
         self.session.add_observer(self.on_search_results_channels, SIGNAL_CHANNEL, [SIGNAL_ON_SEARCH_RESULTS])
         self.session.add_observer(self.on_search_results_torrents, SIGNAL_TORRENT, [SIGNAL_ON_SEARCH_RESULTS])
 
+    @call_on_reactor_thread
     def write_data(self, message):
         """
-        Write data over the event socket. If the event socket is not open, add the message to the buffer instead.
+        Write data over the event socket. If the event socket is not open or the client is not keeping up, add the
+        message to the buffer instead.
         """
-        if not self.events_request:
-            if len(self.buffer) >= MAX_EVENTS_BUFFER_SIZE:
-                self.buffer.pop(0)
+        if not self.events_request or self.events_request_paused:
+            while len(self.buffer) >= MAX_EVENTS_BUFFER_SIZE:
+                self.buffer.popleft()
             self.buffer.append(message)
         else:
             self.events_request.write(message)
 
+    def flush_buffer(self):
+        """
+        Write all buffered messages over the event socket at once.
+        """
+        if self.buffer and self.events_request and not self.events_request_paused:
+            self.events_request.write(''.join(self.buffer))
+            self.buffer.clear()
+
     def start_new_query(self):
-        self.infohashes_sent = set()
-        self.channel_cids_sent = set()
+        with self._results_lock:
+            self.infohashes_sent = set()
+            self.channel_cids_sent = set()
+
+    def write_search_results(self, event_type, query, results_json, key, sent_keys):
+        """
+        Write the search results that have not been sent for the current query as a single frame.
+        At most MAX_RESULTS_PER_QUERY results are sent per query.
+        """
+        events = []
+        with self._results_lock:
+            for result_json in results_json:
+                if key not in result_json or result_json[key] in sent_keys:
+                    continue
+                if len(sent_keys) >= MAX_RESULTS_PER_QUERY:
+                    self._logger.info("Reached the maximum of %d results for query %s", MAX_RESULTS_PER_QUERY, query)
+                    break
+                sent_keys.add(result_json[key])
+                events.append(json.dumps({"type": event_type, "event": {"query": query, "result": result_json}}))
+
+        if events:
+            self.write_data('\n'.join(events) + '\n')
 
     def on_search_results_channels(self, subject, changetype, objectID, results):
         """
         Returns the channel search results over the events endpoint.
         """
         query = ' '.join(results['keywords'])
-
-        for channel in results['result_list']:
-            channel_json = convert_db_channel_to_json(channel)
-            if channel_json['dispersy_cid'] not in self.channel_cids_sent:
-                self.write_data(json.dumps({"type": "search_result_channel",
-                                            "event": {"query": query, "result": channel_json}}) + '\n')
-                self.channel_cids_sent.add(channel_json['dispersy_cid'])
+        channels_json = [convert_db_channel_to_json(channel) for channel in results['result_list']]
+        self.write_search_results("search_result_channel", query, channels_json, 'dispersy_cid',
+                                  self.channel_cids_sent)
 
     def on_search_results_torrents(self, subject, changetype, objectID, results):
         """
         Returns the torrent search results over the events endpoint.
         """
         query = ' '.join(results['keywords'])
+        torrents_json = [convert_torrent_to_json(torrent) for torrent in results['result_list']]
+        self.write_search_results("search_result_torrent", query, torrents_json, 'infohash', self.infohashes_sent)
+
+    def pauseProducing(self):
+        self.events_request_paused = True
+
+    def resumeProducing(self):
+        self.events_request_paused = False
+        self.flush_buffer()
+
+    def stopProducing(self):
+        self.events_request = None
+        self.events_request_paused = False
 
-        for torrent in results['result_list']:
-            torrent_json = convert_torrent_to_json(torrent)
-            if 'infohash' in torrent_json and torrent_json['infohash'] not in self.infohashes_sent:
-                self.write_data(json.dumps({"type": "search_result_torrent",
-                                            "event": {"query": query, "result": torrent_json}}) + '\n')
-                self.infohashes_sent.add(torrent_json['infohash'])
+    def on_events_request_finished(self, request):
+        if self.events_request is request:
+            self.events_request = None
+            self.events_request_paused = False
 
     def render_GET(self, request):
         self.events_request = request
+        self.events_request_paused = False
 
-        request.write(json.dumps({"type": "events_start"}))
+        request.registerProducer(self, True)
+        request.notifyFinish().addBoth(lambda _: self.on_events_request_finished(request))
 
-        while not len(self.buffer) == 0:
-            request.write(self.buffer.pop(0))
+        request.write(json.dumps({"type": "events_start"}) + '\n')
+        self.flush_buffer()
 
         return server.NOT_DONE_YET
@@ -0,0 +1,38 @@
+from twisted.web import resource
+
+from Tribler.Core.Utilities.metrics import registry
+
+
+class MetricsEndpoint(resource.Resource):
+    """
+    This endpoint is responsible for exporting the performance metrics of Tribler, like the duration of database
+    queries, tracker checks and tunnel crypto operations, the lag of the reactor and the tunnel and Dispersy traffic.
+
+    A GET request to this endpoint returns all metrics in the Prometheus text exposition format, so they can be
+    scraped by Prometheus or read by any other tool that understands this format.
+
+    Example GET response:
+
+        # HELP tribler_db_query_seconds Duration of database queries
+        # TYPE tribler_db_query_seconds histogram
+        tribler_db_query_seconds_bucket{method="fetchall",le="0.001"} 1432
+        ...
+        tribler_db_query_seconds_bucket{method="fetchall",le="+Inf"} 1460
+        tribler_db_query_seconds_sum{method="fetchall"} 3.0713
+        tribler_db_query_seconds_count{method="fetchall"} 1460
+        # HELP tribler_tunnel_objects Number of circuits, relays and exit sockets
+        # TYPE tribler_tunnel_objects gauge
+        tribler_tunnel_objects{type="circuits"} 4
+        ...
+    """
+
+    def __init__(self, session):
+        resource.Resource.__init__(self)
+        self.session = session
+
+    def render_GET(self, request):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        request.setHeader('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        return registry.export().encode('utf-8')
@@ -7,7 +7,8 @@ from twisted.web import http, resource
 from Tribler.Core.CacheDB.sqlitecachedb import str2bin
 from Tribler.Core.TorrentDef import TorrentDef
 from Tribler.Core.simpledefs import NTFY_CHANNELCAST
-from Tribler.Core.exceptions import DuplicateChannelNameError, DuplicateTorrentFileError
+from Tribler.Core.exceptions import DuplicateChannelNameError, DuplicateTorrentFileError, \
+    OperationNotPossibleAtRuntimeException
 
 
 class MyChannelBaseEndpoint(resource.Resource):
@@ -40,10 +41,27 @@ class MyChannelBaseEndpoint(resource.Resource):
             }
         })
 
+    def return_503(self, request, exception):
+        """
+        Returns a 503 response code if a component this request needs has not been started (yet).
+        """
+        self._logger.warning(exception)
+        request.setResponseCode(http.SERVICE_UNAVAILABLE)
+        return json.dumps({
+            u"error": {
+                u"handled": True,
+                u"code": exception.__class__.__name__,
+                u"message": exception.message
+            }
+        })
+
     def get_my_channel_object(self):
         """
         Returns the Channel object associated with you channel that is used to manage rss feeds.
+        :raises OperationNotPossibleAtRuntimeException if the channel manager has not been started yet
         """
+        if not self.session.lm.channel_manager:
+            raise OperationNotPossibleAtRuntimeException("the channel manager has not been started yet")
         my_channel_id = self.channel_db_handler.getMyChannelId()
         return self.session.lm.channel_manager.get_my_channel(my_channel_id)
 
@@ -116,6 +134,8 @@ class MyChannelEndpoint(MyChannelBaseEndpoint):
             channel_id = self.session.create_channel(parameters['name'][0], description, mode)
         except DuplicateChannelNameError as ex:
             return MyChannelBaseEndpoint.return_500(self, request, ex)
+        except OperationNotPossibleAtRuntimeException as ex:
+            return MyChannelBaseEndpoint.return_503(self, request, ex)
 
         return json.dumps({"added": channel_id})
 
@@ -260,7 +280,10 @@ class MyChannelRssFeedsEndpoint(MyChannelBaseEndpoint):
             }, ...]
         }
         """
-        channel_obj = self.get_my_channel_object()
+        try:
+            channel_obj = self.get_my_channel_object()
+        except OperationNotPossibleAtRuntimeException as ex:
+            return MyChannelBaseEndpoint.return_503(self, request, ex)
         if channel_obj is None:
             return MyChannelBaseEndpoint.return_404(request)
 
@@ -279,7 +302,10 @@ class MyChannelRecheckFeedsEndpoint(MyChannelBaseEndpoint):
         """
         Rechecks all rss feeds in your channel. Returns error 404 if you channel does not exist.
         """
-        channel_obj = self.get_my_channel_object()
+        try:
+            channel_obj = self.get_my_channel_object()
+        except OperationNotPossibleAtRuntimeException as ex:
+            return MyChannelBaseEndpoint.return_503(self, request, ex)
         if channel_obj is None:
             return MyChannelBaseEndpoint.return_404(request)
 
@@ -302,7 +328,10 @@ class MyChannelModifyRssFeedsEndpoint(MyChannelBaseEndpoint):
         Add a RSS feed to your channel. Returns error 409 if the supplied RSS feed already exists.
         Note that the rss feed url should be URL-encoded.
         """
-        channel_obj = self.get_my_channel_object()
+        try:
+            channel_obj = self.get_my_channel_object()
+        except OperationNotPossibleAtRuntimeException as ex:
+            return MyChannelBaseEndpoint.return_503(self, request, ex)
         if channel_obj is None:
             return MyChannelBaseEndpoint.return_404(request)
 
@@ -318,7 +347,10 @@ class MyChannelModifyRssFeedsEndpoint(MyChannelBaseEndpoint):
         Delete a RSS feed from your channel. Returns error 404 if the RSS feed that is being removed does not exist.
         Note that the rss feed url should be URL-encoded.
         """
-        channel_obj = self.get_my_channel_object()
+        try:
+            channel_obj = self.get_my_channel_object()
+        except OperationNotPossibleAtRuntimeException as ex:
+            return MyChannelBaseEndpoint.return_503(self, request, ex)
         if channel_obj is None:
             return MyChannelBaseEndpoint.return_404(request)
 
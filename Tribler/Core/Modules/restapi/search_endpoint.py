@@ -1,12 +1,18 @@
 import json
 import logging
+from time import time
 
 from twisted.web import http, resource
+from Tribler.Core.Utilities.metrics import registry
 from Tribler.Core.Utilities.search_utils import split_into_keywords
-from Tribler.Core.exceptions import OperationNotEnabledByConfigurationException
+from Tribler.Core.exceptions import OperationNotEnabledByConfigurationException, \
+    OperationNotPossibleAtRuntimeException
 from Tribler.Core.simpledefs import NTFY_CHANNELCAST, NTFY_TORRENTS, SIGNAL_TORRENT, SIGNAL_ON_SEARCH_RESULTS, \
     SIGNAL_CHANNEL
 
+LOCAL_SEARCH_SECONDS = registry.histogram(u"tribler_search_local_seconds", u"Duration of searches in the local database",
+                                          [u"type"])
+
 
 class SearchEndpoint(resource.Resource):
     """
@@ -58,13 +64,17 @@ class SearchEndpoint(resource.Resource):
 
         # We first search the local database for torrents and channels
         keywords = split_into_keywords(unicode(request.args['q'][0]))
+        start_time = time()
         results_local_channels = self.channel_db_handler.searchChannels(keywords)
+        LOCAL_SEARCH_SECONDS.observe(time() - start_time, type=u"channels")
         results_dict = {"keywords": keywords, "result_list": results_local_channels}
         self.session.notifier.notify(SIGNAL_CHANNEL, SIGNAL_ON_SEARCH_RESULTS, None, results_dict)
 
         torrent_db_columns = ['T.torrent_id', 'infohash', 'T.name', 'length', 'category',
                               'num_seeders', 'num_leechers', 'last_tracker_check']
+        start_time = time()
         results_local_torrents = self.torrent_db_handler.searchNames(keywords, keys=torrent_db_columns, doSort=False)
+        LOCAL_SEARCH_SECONDS.observe(time() - start_time, type=u"torrents")
         results_dict = {"keywords": keywords, "result_list": results_local_torrents}
         self.session.notifier.notify(SIGNAL_TORRENT, SIGNAL_ON_SEARCH_RESULTS, None, results_dict)
 
@@ -72,7 +82,7 @@ class SearchEndpoint(resource.Resource):
         try:
             self.session.search_remote_torrents(keywords)
             self.session.search_remote_channels(keywords)
-        except OperationNotEnabledByConfigurationException as exc:
+        except (OperationNotEnabledByConfigurationException, OperationNotPossibleAtRuntimeException) as exc:
             self._logger.error(exc)
 
         return json.dumps({"queried": True})
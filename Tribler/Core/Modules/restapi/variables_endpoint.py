@@ -17,7 +17,12 @@ class VariablesEndpoint(resource.Resource):
                 "tunnel_community~socks5_listen_ports~1": 1235,
                 ...
             },
-            ...
+            "startup_timeline": [{
+                "stage": "libtorrent",
+                "start": 0.01,
+                "duration": 0.52,
+                "success": True
+            }, ...]
         }
     }
     """
@@ -30,4 +35,5 @@ class VariablesEndpoint(resource.Resource):
         """
         Returns the runtime-defined variables in Tribler in a JSON dictionary.
         """
-        return json.dumps({"variables": {"ports": self.session.selected_ports}})
+        return json.dumps({"variables": {"ports": self.session.selected_ports,
+                                         "startup_timeline": self.session.lm.startup_planner.get_timeline()}})
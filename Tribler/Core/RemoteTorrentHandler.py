@@ -14,8 +14,10 @@ from decorator import decorator
 from twisted.internet import reactor
 from twisted.internet.task import LoopingCall
 
+from Tribler.Core.APIImplementation.threadpoolmanager import PRIORITY_COLLECTING
 from Tribler.Core.TFTP.handler import METADATA_PREFIX
 from Tribler.Core.TorrentDef import TorrentDef
+from Tribler.Core.Utilities.metrics import registry
 from Tribler.Core.simpledefs import INFOHASH_LENGTH, NTFY_TORRENTS
 from Tribler.dispersy.taskmanager import TaskManager
 from Tribler.dispersy.util import call_on_reactor_thread
@@ -75,8 +77,10 @@ class RemoteTorrentHandler(TaskManager):
 
         self.metadata_requester = TftpRequester(u"tftp_metadata_%s" % 0, self.session, self, 0)
 
+        registry.register_collector(self.collect_metrics)
 
     def shutdown(self):
+        registry.unregister_collector(self.collect_metrics)
         self.running = False
         for requester in self.torrent_requesters.itervalues():
             requester.stop()
@@ -149,9 +153,9 @@ class RemoteTorrentHandler(TaskManager):
         # Checking if a key is present fetches the whole torrent from disk if its
         # not on the writeback cache.
         if infohash_str not in self.session.lm.torrent_store:
-            # save torrent to file
+            # save torrent to file, as received so its data hashes to the same infohash
             try:
-                bdata = tdef.encode()
+                bdata = tdef.get_raw_data()
 
             except Exception as e:
                 self._logger.error(u"failed to encode torrent %s: %s", infohash_str, e)
@@ -219,7 +223,8 @@ class RemoteTorrentHandler(TaskManager):
         # notify about the new metadata
         if thumb_hash in self.metadata_callbacks:
             for callback in self.metadata_callbacks[thumb_hash]:
-                self.session.lm.threadpool.call_in_thread(0, callback, hexlify(thumb_hash))
+                self.session.lm.threadpool.call_in_thread(0, callback, hexlify(thumb_hash),
+                                                          priority=PRIORITY_COLLECTING)
 
             del self.metadata_callbacks[thumb_hash]
 
@@ -228,10 +233,23 @@ class RemoteTorrentHandler(TaskManager):
             return
 
         for callback in self.torrent_callbacks[infohash]:
-            self.session.lm.threadpool.call_in_thread(0, callback, hexlify(infohash))
+            self.session.lm.threadpool.call_in_thread(0, callback, hexlify(infohash), priority=PRIORITY_COLLECTING)
 
         del self.torrent_callbacks[infohash]
 
+    def collect_metrics(self, metrics):
+        requests = metrics.gauge(u"tribler_torrent_collecting_requests", u"Torrent collecting requests by queue",
+                                 [u"queue", u"priority", u"state"])
+        bandwidth = metrics.gauge(u"tribler_torrent_collecting_bytes", u"Bytes of collected torrents and metadata",
+                                  [u"queue", u"priority"])
+        for queue, requesters in ((u"tftp", self.torrent_requesters), (u"dht", self.magnet_requesters),
+                                  (u"msg", self.torrent_message_requesters)):
+            for priority, requester in requesters.items():
+                requests.set(requester.pending_request_queue_size, queue=queue, priority=priority, state=u"pending")
+                requests.set(requester.requests_succeeded, queue=queue, priority=priority, state=u"succeeded")
+                requests.set(requester.requests_failed, queue=queue, priority=priority, state=u"failed")
+                bandwidth.set(requester.total_bandwidth, queue=queue, priority=priority)
+
     def getQueueSize(self):
         def getQueueSize(qname, requesters):
             qsize = {}
@@ -599,7 +617,7 @@ class TftpRequester(Requester):
         try:
             if info_hash is not None:
                 # save torrent
-                tdef = TorrentDef.load_from_memory(file_data)
+                tdef = TorrentDef.load_from_memory(file_data, lazy=True)
                 self._remote_torrent_handler.save_torrent(tdef)
             elif thumb_hash is not None:
                 # save metadata
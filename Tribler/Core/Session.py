@@ -16,7 +16,7 @@ from Tribler.Core.Config.tribler_config import TriblerConfig
 from Tribler.Core.SessionConfig import SessionConfigInterface, SessionStartupConfig
 from Tribler.Core.Upgrade.upgrade import TriblerUpgrader
 from Tribler.Core.exceptions import NotYetImplementedException, OperationNotEnabledByConfigurationException, \
-    DuplicateTorrentFileError
+    DuplicateTorrentFileError, OperationNotPossibleAtRuntimeException
 from Tribler.Core.simpledefs import (NTFY_CHANNELCAST, NTFY_DELETE, NTFY_INSERT, NTFY_METADATA, NTFY_MYPREFERENCES,
                                      NTFY_PEERS, NTFY_TORRENTS, NTFY_UPDATE, NTFY_VOTECAST, STATEDIR_DLPSTATE_DIR,
                                      STATEDIR_METADATA_STORE_DIR, STATEDIR_PEERICON_DIR, STATEDIR_TORRENT_STORE_DIR,
@@ -649,6 +649,8 @@ class Session(SessionConfigInterface):
         """
         if not self.get_enable_torrent_search():
             raise OperationNotEnabledByConfigurationException("torrent_search is not enabled")
+        if not self.lm.search_manager:
+            raise OperationNotPossibleAtRuntimeException("the search manager has not been started yet")
         return self.lm.search_manager.search_for_torrents(keywords)
 
     def search_remote_channels(self, keywords):
@@ -658,6 +660,8 @@ class Session(SessionConfigInterface):
         """
         if not self.get_enable_channel_search():
             raise OperationNotEnabledByConfigurationException("channel_search is not enabled")
+        if not self.lm.search_manager:
+            raise OperationNotPossibleAtRuntimeException("the search manager has not been started yet")
         self.lm.search_manager.search_for_channels(keywords)
 
     def create_channel(self, name, description, mode=u'closed'):
@@ -668,7 +672,10 @@ class Session(SessionConfigInterface):
         :param mode: Mode of the Channel ('open', 'semi-open', or 'closed').
         :return: Channel ID
         :raises DuplicateChannelNameError if name already exists
+        :raises OperationNotPossibleAtRuntimeException if the channel manager has not been started yet
         """
+        if not self.lm.channel_manager:
+            raise OperationNotPossibleAtRuntimeException("the channel manager has not been started yet")
         return self.lm.channel_manager.create_channel(name, description, mode)
 
     def add_torrent_def_to_channel(self, channel_id, torrent_def, extra_info={}, forward=True):
@@ -842,6 +842,37 @@ class SessionConfigInterface(object):
         """
         return self._obtain_port(u'http_api', u'port')
 
+    #
+    # Reactor monitor
+    #
+    def set_reactor_monitor_enabled(self, value):
+        """
+        Sets whether the reactor lag and the slow calls on the reactor thread are monitored.
+        :param value: True or False.
+        """
+        self.sessconfig.set(u'reactor_monitor', u'enabled', value)
+
+    def get_reactor_monitor_enabled(self):
+        """
+        Returns whether the reactor lag and the slow calls on the reactor thread are monitored.
+        :return: A boolean indicating whether the reactor monitor is enabled.
+        """
+        return self.sessconfig.get(u'reactor_monitor', u'enabled')
+
+    def set_reactor_monitor_slow_call_threshold(self, value):
+        """
+        Sets the duration above which a call on the reactor thread is considered slow.
+        :param value: A float, the threshold in seconds.
+        """
+        self.sessconfig.set(u'reactor_monitor', u'slow_call_threshold', value)
+
+    def get_reactor_monitor_slow_call_threshold(self):
+        """
+        Returns the duration above which a call on the reactor thread is considered slow.
+        :return: A float, the threshold in seconds.
+        """
+        return self.sessconfig.get(u'reactor_monitor', u'slow_call_threshold')
+
     #
     # Static methods
     #
@@ -8,6 +8,7 @@ from hashlib import sha1
 from base64 import b64encode
 from twisted.internet import reactor
 
+from Tribler.Core.Utilities.metrics import registry
 from Tribler.dispersy.taskmanager import TaskManager, LoopingCall
 from Tribler.dispersy.candidate import Candidate
 from Tribler.dispersy.util import call_on_reactor_thread, blocking_call_on_reactor_thread, attach_runtime_statistics
@@ -24,6 +25,10 @@ METADATA_PREFIX = "metadata" + SEPARATOR
 
 DEFAULT_RETIES = 5
 
+SESSION_SECONDS = registry.histogram(u"tribler_tftp_session_seconds", u"Duration of TFTP sessions",
+                                     [u"role", u"result"])
+SESSION_BYTES = registry.counter(u"tribler_tftp_bytes_total", u"Bytes of files transferred over TFTP", [u"role"])
+
 
 class TftpHandler(TaskManager):
 
@@ -147,6 +152,7 @@ class TftpHandler(TaskManager):
 
                 # fail as timeout
                 self._logger.info(u"%s timed out", session)
+                self._observe_session(session, u"timeout")
                 if session.failure_callback:
                     callback = lambda cb = session.failure_callback, addr = session.address, fn = session.file_name,\
                         msg = "timeout", ei = session.extra_info: cb(addr, fn, msg, ei)
@@ -192,6 +198,12 @@ class TftpHandler(TaskManager):
         self._callbacks = []
         self._callback_scheduled = False
 
+    def _observe_session(self, session, result):
+        role = u"client" if session.is_client else u"server"
+        SESSION_SECONDS.observe(time() - session.start_time, role=role, result=result)
+        if result == u"done":
+            SESSION_BYTES.inc(session.file_size or 0, role=role)
+
     def _add_new_session(self, session):
         self._session_id_dict[session.session_id] = 1 + self._session_id_dict.get(session.session_id, 0)
         self._session_dict[(session.address[0], session.address[1], session.session_id)] = session
@@ -245,6 +257,7 @@ class TftpHandler(TaskManager):
             return
 
         self._cleanup_session((ip, port, packet['session_id']))
+        self._observe_session(session, u"failed" if session.is_failed else u"done")
 
         # schedule callback
         if session.is_failed:
@@ -30,7 +30,7 @@ class Session(object):
         self.success_callback = success_callback
         self.failure_callback = failure_callback
 
-        self.last_contact_time = time()
+        self.start_time = self.last_contact_time = time()
         self.last_received_packet = None
         self.last_sent_packet = None
         self.is_waiting_for_last_ack = False
@@ -67,6 +67,7 @@ class TrackerSession(object):
 
         self._retries = 0
 
+        self._start_time = time.time()
         self._last_contact = None
         self._action = None
 
@@ -141,6 +142,10 @@ class TrackerSession(object):
     def infohash_list(self):
         return self._infohash_list
 
+    @property
+    def start_time(self):
+        return self._start_time
+
     @property
     def last_contact(self):
         return self._last_contact
@@ -11,6 +11,7 @@ from twisted.internet import reactor
 from Tribler.dispersy.taskmanager import TaskManager, LoopingCall
 from Tribler.dispersy.util import blocking_call_on_reactor_thread, call_on_reactor_thread
 
+from Tribler.Core.Utilities.metrics import registry
 from Tribler.Core.simpledefs import NTFY_TORRENTS
 from Tribler.Core.TorrentChecker.session import create_tracker_session, UdpTrackerSession
 
@@ -23,6 +24,9 @@ DEFAULT_TORRENT_CHECK_INTERVAL = 900  # base multiplier for the check delay
 DEFAULT_MAX_TORRENT_CHECK_RETRIES = 8  # max check delay increments when failed.
 DEFAULT_TORRENT_CHECK_RETRY_INTERVAL = 30  # interval when the torrent was successfully checked for the last time
 
+TRACKER_SESSION_SECONDS = registry.histogram(u"tribler_torrent_check_seconds", u"Duration of tracker sessions",
+                                             [u"tracker_type", u"result"])
+
 class TorrentChecker(TaskManager):
 
     def __init__(self, session):
@@ -288,6 +292,8 @@ class TorrentChecker(TaskManager):
 
                 if session.is_failed or session.is_finished:
                     self._logger.debug(u"%s is %s", session, u'failed' if session.is_failed else u'finished')
+                    TRACKER_SESSION_SECONDS.observe(time.time() - session.start_time, tracker_type=session.tracker_type,
+                                                    result=u'failed' if session.is_failed else u'finished')
 
                     # update tracker info
                     self._session.lm.tracker_manager.update_tracker_info(session.tracker_url, not session.is_failed)
@@ -15,6 +15,7 @@ from Tribler.Core.defaults import TDEF_DEFAULTS
 from Tribler.Core.exceptions import TorrentDefNotFinalizedException, NotYetImplementedException
 import Tribler.Core.Utilities.maketorrent as maketorrent
 
+from Tribler.Core.Utilities.bencode_utils import get_info_span
 from Tribler.Core.Utilities.utilities import validTorrentFile, isValidURL, parse_magnetlink
 from Tribler.Core.Utilities.unicode import dunno2unicode
 
@@ -40,6 +41,8 @@ class TorrentDef(object):
         assert infohash is None or len(infohash) == INFOHASH_LENGTH, "INFOHASH has invalid length: %d" % len(infohash)
 
         self._logger = logging.getLogger(self.__class__.__name__)
+        self._file_table = None  # decoded file table of the current metainfo, see get_file_table()
+        self._raw_data = None  # the bencoded torrent this TorrentDef was loaded from, see get_raw_data()
 
         if input is not None:  # copy constructor
             self.input = input
@@ -88,13 +91,28 @@ class TorrentDef(object):
         return TorrentDef._read(f)
 
     @staticmethod
-    def load_from_memory(data):
+    def load_from_memory(data, lazy=False):
         """ Loads a torrent file that is already in memory.
         :param data: The torrent file data.
+        :param lazy: Whether to skip copying the file list into the input of the TorrentDef. Lazy TorrentDefs can be
+        inspected, stored and indexed, but not modified and finalized again.
         :return: A TorrentDef object.
         """
-        data = bdecode(data)
-        return TorrentDef._create(data)
+        metainfo = bdecode(data)
+
+        # The infohash is the hash of the raw info dictionary, so we do not have to encode it again
+        infohash = None
+        if isinstance(metainfo, dict):
+            try:
+                info_span = get_info_span(data)
+            except ValueError:
+                info_span = None
+            if info_span:
+                infohash = sha1(data[info_span[0]:info_span[1]]).digest()
+
+        tdef = TorrentDef._create(metainfo, infohash, lazy)
+        tdef._raw_data = data
+        return tdef
 
     def _read(stream):
         """ Internal class method that reads a torrent file from stream,
@@ -102,11 +120,10 @@ class TorrentDef(object):
         accordingly. """
         bdata = stream.read()
         stream.close()
-        data = bdecode(bdata)
-        return TorrentDef._create(data)
+        return TorrentDef.load_from_memory(bdata)
     _read = staticmethod(_read)
 
-    def _create(metainfo):  # TODO: replace with constructor
+    def _create(metainfo, infohash=None, lazy=False):  # TODO: replace with constructor
         # raises ValueErrors if not good
         validTorrentFile(metainfo)
 
@@ -114,11 +131,11 @@ class TorrentDef(object):
         t.metainfo = metainfo
         t.metainfo_valid = True
         # copy stuff into self.input
-        maketorrent.copy_metainfo_to_input(t.metainfo, t.input)
+        maketorrent.copy_metainfo_to_input(t.metainfo, t.input, include_files=not lazy)
 
         # Two places where infohash calculated, here and in maketorrent.py
         # Elsewhere: must use TorrentDef.get_infohash() to allow P2PURLs.
-        t.infohash = sha1(bencode(metainfo['info'])).digest()
+        t.infohash = infohash or sha1(bencode(metainfo['info'])).digest()
 
         assert isinstance(t.infohash, str), "INFOHASH has invalid type: %s" % type(t.infohash)
         assert len(t.infohash) == INFOHASH_LENGTH, "INFOHASH has invalid length: %d" % len(t.infohash)
@@ -445,6 +462,7 @@ class TorrentDef(object):
         if infohash is not None:
             self.infohash = infohash
             self.metainfo = metainfo
+            self._raw_data = None
 
             self.input['name'] = metainfo['info']['name']
             # May have been 0, meaning auto.
@@ -590,6 +608,15 @@ class TorrentDef(object):
 
         return bencode(self.metainfo)
 
+    def get_raw_data(self):
+        """
+        Returns the bencoded torrent. If the TorrentDef has been loaded from memory and has not been modified since,
+        these are the original bytes, so the torrent keeps its infohash even if it was not canonically encoded.
+        """
+        if self._raw_data is not None and self.metainfo_valid:
+            return self._raw_data
+        return self.encode()
+
     def get_files_with_length(self, exts=None):
         """ The list of files in the finalized torrent def.
         @param exts (Optional) list of filename extensions (without leading .)
@@ -684,25 +711,41 @@ class TorrentDef(object):
             # Single-file torrent
             yield self.get_name_as_unicode(), self.metainfo["info"]["length"]
 
+    def get_file_table(self):
+        """ The decoded file table of the finalized torrent def. The table is
+        built once and rebuilt only when the metainfo is replaced.
+        @return A TorrentFileTable.
+        """
+        if not self.metainfo_valid:
+            raise NotYetImplementedException()  # must save first
+
+        info = self.metainfo["info"]
+        if self._file_table is None or self._file_table.info is not info:
+            self._file_table = TorrentFileTable(info, list(self._get_all_files_as_unicode_with_length()))
+        return self._file_table
+
     def get_files_as_unicode_with_length(self, exts=None):
         """ The list of files in the finalized torrent def.
         @param exts (Optional) list of filename extensions (without leading .)
         to search for.
         @return A list of filenames.
         """
-        if not self.metainfo_valid:
-            raise NotYetImplementedException()  # must save first
+        file_table = self.get_file_table()
+        if exts is None:
+            return zip(file_table.names, file_table.lengths)
 
         videofiles = []
-        for filename, length in self._get_all_files_as_unicode_with_length():
+        for filename, length in zip(file_table.names, file_table.lengths):
             prefix, ext = os.path.splitext(filename)
             if ext != "" and ext[0] == ".":
                 ext = ext[1:]
-            if exts is None or ext.lower() in exts:
+            if ext.lower() in exts:
                 videofiles.append((filename, length))
         return videofiles
 
     def get_files_as_unicode(self, exts=None):
+        if exts is None:
+            return list(self.get_file_table().names)
         return [filename for filename, _ in self.get_files_as_unicode_with_length(exts)]
 
     def get_length(self, selectedfiles=None):
@@ -711,10 +754,13 @@ class TorrentDef(object):
         the total size of only those files.
         @return A length (long)
         """
+        if not selectedfiles:
+            return self.get_file_table().total_length
+
         if not self.metainfo_valid:
             raise NotYetImplementedException()  # must save first
 
-        return maketorrent.get_length_from_metainfo(self.metainfo, selectedfiles)
+        return maketorrent.get_length_from_metainfo(self.metainfo, set(selectedfiles))
 
     def get_creation_date(self, default=0):
         if not self.metainfo_valid:
@@ -752,6 +798,11 @@ class TorrentDef(object):
         info = self.metainfo['info']
 
         if file is not None and 'files' in info:
+            file_index = self.get_file_table().indices.get(file)
+            if file_index is not None:
+                return file_index
+
+            # The decoded name of a file may differ from its raw path, for instance when path.utf-8 is used
             for i in range(len(info['files'])):
                 x = info['files'][i]
 
@@ -763,6 +814,35 @@ class TorrentDef(object):
             raise ValueError("File not found in single-file torrent")
 
 
+class TorrentFileTable(object):
+    """
+    The decoded files of a torrent, in the order of the metainfo. The names, lengths and byte offsets of the files are
+    kept in tuples, together with a map from file name to file index.
+    """
+    __slots__ = ['info', 'names', 'lengths', 'offsets', 'indices', 'total_length']
+
+    def __init__(self, info, files):
+        self.info = info
+        self.names = tuple(name for name, _ in files)
+        self.lengths = tuple(length for _, length in files)
+
+        offsets = []
+        total_length = 0
+        for length in self.lengths:
+            offsets.append(total_length)
+            if length > 0:
+                total_length += length
+        self.offsets = tuple(offsets)
+        self.total_length = total_length
+
+        self.indices = {}
+        for file_index, name in enumerate(self.names):
+            self.indices.setdefault(name, file_index)
+
+    def __len__(self):
+        return len(self.names)
+
+
 class TorrentDefNoMetainfo(object):
     """
     Instances of this class are used when working with a torrent def that contains no metainfo (yet), for instance,
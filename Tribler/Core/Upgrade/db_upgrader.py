@@ -9,14 +9,14 @@
 # Created: Thu Nov  6 18:13:34 2014 (+0100)
 import logging
 import os
-from binascii import hexlify
+from base64 import decodestring
+from binascii import Error as BinasciiError, hexlify
 from shutil import rmtree
 from sqlite3 import Connection
 
 from Tribler.Category.Category import Category
 from Tribler.Core.CacheDB.SqliteCacheDBHandler import TorrentDBHandler
 from Tribler.Core.CacheDB.db_versions import LOWEST_SUPPORTED_DB_VERSION, LATEST_DB_VERSION
-from Tribler.Core.CacheDB.sqlitecachedb import str2bin
 from Tribler.Core.TorrentDef import TorrentDef
 
 
@@ -81,6 +81,22 @@ class DBUpgrader(object):
         if self.db.version == 27:
             self._upgrade_27_to_28()
 
+        # version 28 -> 29
+        if self.db.version == 28:
+            self._upgrade_28_to_29()
+
+        # version 29 -> 30
+        if self.db.version == 29:
+            self._upgrade_29_to_30()
+
+        # version 30 -> 31
+        if self.db.version == 30:
+            self._upgrade_30_to_31()
+
+        # version 31 -> 32
+        if self.db.version == 31:
+            self._upgrade_31_to_32()
+
         # check if we managed to upgrade to the latest DB version.
         if self.db.version == LATEST_DB_VERSION:
             self.status_update_func(u"Database upgrade finished.")
@@ -284,7 +300,7 @@ CREATE TABLE IF NOT EXISTS _tmp_Torrent (
                 for torrent in results:
                     torrent_id, infohash, name, torrent_file_name = torrent[:4]
 
-                    filepath = os.path.join(self.torrent_collecting_dir, hexlify(str2bin(infohash)) + u".torrent")
+                    filepath = os.path.join(self.torrent_collecting_dir, hexlify(decodestring(infohash)) + u".torrent")
 
                     # Check if we have the actual .torrent
                     torrent_file_name = None
@@ -517,6 +533,118 @@ DROP TABLE IF EXISTS MetaDataTypes;
         # update database version
         self.db.write_version(28)
 
+    def _upgrade_28_to_29(self):
+        self.status_update_func(u"Upgrading database from v%s to v%s..." % (28, 29))
+
+        # infohashes and permids used to be stored base64 encoded, they are now stored as blobs
+        for table_name, id_column, column in [(u"Torrent", u"torrent_id", u"infohash"),
+                                              (u"Peer", u"peer_id", u"permid")]:
+            self.status_update_func(u"Converting %s %ss..." % (table_name, column))
+            self._convert_base64_column(table_name, id_column, column)
+
+        # update database version
+        self.db.write_version(29)
+
+    def _upgrade_29_to_30(self):
+        self.status_update_func(u"Upgrading database from v%s to v%s..." % (29, 30))
+
+        # keep the eviction weight of every torrent in an indexed column, so freeSpace does not have to compute and
+        # sort the weight of all collected torrents
+        self.status_update_func(u"Indexing collected torrents...")
+        self.db.execute(u"""
+ALTER TABLE Torrent ADD COLUMN eviction_weight numeric;
+
+UPDATE Torrent SET eviction_weight = MIN(relevance, 2500) + MIN(500, num_leechers) + 4 * MIN(500, num_seeders) + MAX(MIN(creation_date, CAST(strftime('%s', 'now') AS integer)), CAST(strftime('%s', 'now', '-500 days') AS integer)) / 86400;
+
+CREATE TRIGGER IF NOT EXISTS TorEvictionWeightInsert AFTER INSERT ON Torrent
+BEGIN
+  UPDATE Torrent SET eviction_weight = MIN(NEW.relevance, 2500) + MIN(500, NEW.num_leechers) + 4 * MIN(500, NEW.num_seeders) + MAX(MIN(NEW.creation_date, CAST(strftime('%s', 'now') AS integer)), CAST(strftime('%s', 'now', '-500 days') AS integer)) / 86400 WHERE torrent_id == NEW.torrent_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS TorEvictionWeightUpdate AFTER UPDATE OF relevance, num_seeders, num_leechers, creation_date ON Torrent
+BEGIN
+  UPDATE Torrent SET eviction_weight = MIN(NEW.relevance, 2500) + MIN(500, NEW.num_leechers) + 4 * MIN(500, NEW.num_seeders) + MAX(MIN(NEW.creation_date, CAST(strftime('%s', 'now') AS integer)), CAST(strftime('%s', 'now', '-500 days') AS integer)) / 86400 WHERE torrent_id == NEW.torrent_id;
+END;
+
+CREATE INDEX IF NOT EXISTS TorEvictionIndex ON Torrent(eviction_weight) WHERE is_collected == 1;
+""")
+
+        # update database version
+        self.db.write_version(30)
+
+    def _upgrade_30_to_31(self):
+        self.status_update_func(u"Upgrading database from v%s to v%s..." % (30, 31))
+
+        # move the full text index from fts3 to fts4, which merges its segments incrementally (automerge)
+        self.status_update_func(u"Rebuilding full text index...")
+        self.db.execute(u"""
+DROP TABLE IF EXISTS _tmp_FullTextIndex;
+CREATE VIRTUAL TABLE _tmp_FullTextIndex USING fts4(swarmname, filenames, fileextensions, matchinfo=fts3);
+INSERT INTO _tmp_FullTextIndex(_tmp_FullTextIndex) VALUES('automerge=8');
+
+INSERT INTO _tmp_FullTextIndex(docid, swarmname, filenames, fileextensions)
+SELECT docid, swarmname, filenames, fileextensions FROM FullTextIndex;
+
+DROP TABLE FullTextIndex;
+ALTER TABLE _tmp_FullTextIndex RENAME TO FullTextIndex;
+""")
+
+        # update database version
+        self.db.write_version(31)
+
+    def _upgrade_31_to_32(self):
+        self.status_update_func(u"Upgrading database from v%s to v%s..." % (31, 32))
+
+        # index the torrents of a tracker, the torrents that are due for a tracker check and the collected torrents,
+        # so selecting torrents to check and listing the collected torrents no longer scan the Torrent table
+        self.status_update_func(u"Indexing torrents...")
+        self.db.execute(u"""
+CREATE INDEX IF NOT EXISTS TorTrackerMapTrackerIndex ON TorrentTrackerMapping(tracker_id, torrent_id);
+CREATE INDEX IF NOT EXISTS TorNextTrackerCheckIndex ON Torrent(next_tracker_check);
+CREATE INDEX IF NOT EXISTS TorCollectedIndex ON Torrent(insert_time) WHERE is_collected == 1;
+""")
+
+        # the Peer and Torrent tables were recreated without their unique permid and infohash indexes by the upgrades
+        # to v22 and v26-v27, so looking up a torrent or peer scanned the whole table. Uniqueness was not enforced
+        # since then, so a plain index is created (which does nothing if the unique index of a new database exists).
+        self.db.execute(u"""
+CREATE INDEX IF NOT EXISTS infohash_idx ON Torrent(infohash);
+CREATE INDEX IF NOT EXISTS permid_idx ON Peer(permid);
+""")
+
+        # update database version
+        self.db.write_version(32)
+
+    def _convert_base64_column(self, table_name, id_column, column, batch_size=10000):
+        """
+        Replace the base64 encoded text values in a column by the binary data they encode. The rows are converted in
+        batches, ordered by id, so we never have to keep the whole table in memory. Values that cannot be decoded are
+        stored as a blob of their text as-is, as other tables may still refer to their rows.
+        """
+        select_stmt = u"SELECT %s, %s FROM %s WHERE %s > ? AND typeof(%s) == 'text' ORDER BY %s LIMIT ?" % \
+            (id_column, column, table_name, id_column, column, id_column)
+        update_stmt = u"UPDATE %s SET %s = ? WHERE %s = ?" % (table_name, column, id_column)
+
+        last_id = -1
+        while True:
+            rows = list(self.db.execute(select_stmt, (last_id, batch_size)))
+            if not rows:
+                break
+
+            to_update = []
+            num_invalid = 0
+            for row_id, value in rows:
+                try:
+                    to_update.append((buffer(decodestring(value)), row_id))
+                except (BinasciiError, UnicodeEncodeError):
+                    to_update.append((buffer(value.encode('utf-8')), row_id))
+                    num_invalid += 1
+
+            if num_invalid:
+                self._logger.warning(u"Keeping %d rows with an invalid %s in %s", num_invalid, column, table_name)
+            self.db.executemany(update_stmt, to_update)
+            last_id = rows[-1][0]
+
     def reimport_torrents(self):
         """Import all torrent files in the collected torrent dir, all the files already in the database will be ignored.
         """
@@ -530,7 +658,7 @@ DROP TABLE IF EXISTS MetaDataTypes;
         try:
             for infoshash_str, torrent_data in self.torrent_store.iteritems():
                 self.status_update_func("> %s" % infoshash_str)
-                torrentdef = TorrentDef.load_from_memory(torrent_data)
+                torrentdef = TorrentDef.load_from_memory(torrent_data, lazy=True)
                 if torrentdef.is_finalized():
                     infohash = torrentdef.get_infohash()
                     if not torrent_db_handler.hasTorrent(infohash):
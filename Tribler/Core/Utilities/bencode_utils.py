@@ -0,0 +1,74 @@
+"""
+Helpers to inspect bencoded data without decoding it.
+"""
+
+
+def skip_value(data, offset):
+    """
+    Find the end of the bencoded value that starts at the given offset, without decoding it.
+    :param data: The bencoded data.
+    :param offset: The offset of the first byte of the value.
+    :return: The offset of the first byte after the value.
+    :raises ValueError: if the data is not valid bencode.
+    """
+    depth = 0
+    length = len(data)
+    while offset < length:
+        char = data[offset]
+        if char == 'd' or char == 'l':
+            depth += 1
+            offset += 1
+            continue
+        elif char == 'e':
+            if depth == 0:
+                raise ValueError("unexpected end of list or dictionary at offset %d" % offset)
+            depth -= 1
+            offset += 1
+        elif char == 'i':
+            end = data.find('e', offset)
+            if end < 0:
+                raise ValueError("unterminated integer at offset %d" % offset)
+            offset = end + 1
+        elif char.isdigit():
+            colon = data.find(':', offset)
+            if colon < 0:
+                raise ValueError("invalid string length at offset %d" % offset)
+            offset = colon + 1 + int(data[offset:colon])
+        else:
+            raise ValueError("invalid bencode at offset %d" % offset)
+
+        if depth == 0:
+            if offset > length:
+                break
+            return offset
+    raise ValueError("bencoded value is truncated")
+
+
+def get_info_span(data):
+    """
+    Find the raw info dictionary of a bencoded torrent. The infohash of the torrent is the SHA-1 hash of exactly these
+    bytes, so they do not have to be encoded again.
+
+    Only the keys up to info in the top-level dictionary and the info dictionary itself are walked. The keys are not
+    required to be sorted, so torrents that are not canonically encoded get the same infohash as in libtorrent.
+    :param data: The bencoded torrent.
+    :return: A tuple (start, end) with the offsets of the info dictionary, or None if the torrent has no info dictionary.
+    :raises ValueError: if the data is not a valid bencoded dictionary.
+    """
+    if not data.startswith('d'):
+        raise ValueError("bencoded torrent is not a dictionary")
+
+    offset = 1
+    while offset < len(data) and data[offset] != 'e':
+        if not data[offset].isdigit():
+            raise ValueError("dictionary key at offset %d is not a string" % offset)
+        key_end = skip_value(data, offset)
+        key = data[data.index(':', offset) + 1:key_end]
+
+        if key == 'info':
+            if data[key_end:key_end + 1] != 'd':
+                return None
+            return key_end, skip_value(data, key_end)
+
+        offset = skip_value(data, key_end)
+    return None
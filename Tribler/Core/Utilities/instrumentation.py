@@ -35,15 +35,25 @@
 # Code:
 
 
+import logging
 import threading
+from functools import partial
 from os import sys
 from threading import Lock, RLock, Thread
 from time import sleep, time
 
 from decorator import decorator
+from twisted.internet import reactor
+from twisted.internet.task import LoopingCall
+
+from Tribler.Core.Utilities.metrics import Histogram, registry
 
 MAX_SAME_STACK_TIME = 60
 
+REACTOR_LAG_INTERVAL = 0.5
+REACTOR_LAG_BUCKETS = [0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0]
+SLOW_CALL_THRESHOLD = 0.1
+
 
 @decorator
 def synchronized(wrapped, instance, *args, **kwargs):
@@ -203,5 +213,186 @@ class WatchDog(Thread):
                 self.times.pop(thread_id)
                 self.print_all_stacks()
 
+
+def get_callable_name(func):
+    """
+    Returns a module.Class.function name for a callable, looking through partials and LoopingCalls.
+    """
+    while isinstance(func, (partial, LoopingCall)):
+        func = func.func if isinstance(func, partial) else func.f
+
+    name = getattr(func, u"__name__", None) or type(func).__name__
+    cls = getattr(func, u"im_class", None)
+    if cls is not None:
+        name = u"%s.%s" % (cls.__name__, name)
+    module = getattr(func, u"__module__", None) or type(func).__module__
+    return u"%s.%s" % (module, name) if module else name
+
+
+class SlowCallTracer(object):
+    """
+    Keeps track of the calls on the reactor thread that take longer than a threshold, by the name of the function (or
+    SQL statement) that was called. Fast calls only cost two calls to time().
+    """
+
+    def __init__(self, threshold=SLOW_CALL_THRESHOLD, get_time=time):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.threshold = threshold
+        self.get_time = get_time
+        self.slow_calls = {}
+        self.last_slow_call = None
+
+    def record(self, name, duration):
+        """
+        Record the duration of a call.
+        :param name: the name of the call, or a callable to derive the name from.
+        :param duration: the duration of the call in seconds.
+        """
+        if duration < self.threshold:
+            return
+
+        if not isinstance(name, basestring):
+            name = get_callable_name(name)
+
+        stats = self.slow_calls.get(name)
+        if stats is None:
+            stats = self.slow_calls[name] = {u"name": name, u"count": 0, u"total_time": 0.0, u"max_time": 0.0}
+        stats[u"count"] += 1
+        stats[u"total_time"] += duration
+        self.last_slow_call = (name, duration, self.get_time())
+
+        if duration > stats[u"max_time"]:
+            stats[u"max_time"] = duration
+            self._logger.warning("Slow call on the reactor thread: %s took %.3f seconds", name, duration)
+        else:
+            self._logger.debug("Slow call on the reactor thread: %s took %.3f seconds", name, duration)
+
+    def record_sql(self, sql, duration):
+        if duration >= self.threshold:
+            self.record(u"sqlite: " + u" ".join(sql.split())[:80], duration)
+
+    def wrap(self, func):
+        """
+        Returns a callable that calls func and records how long that took.
+        """
+        def traced_call(*args, **kwargs):
+            start_time = self.get_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(func, self.get_time() - start_time)
+        return traced_call
+
+    def get_slow_calls(self):
+        """
+        Returns the slow calls, the ones that took the most time in total first.
+        """
+        return sorted((dict(stats) for stats in self.slow_calls.itervalues()),
+                      key=lambda stats: stats[u"total_time"], reverse=True)
+
+    def reset(self):
+        self.slow_calls = {}
+        self.last_slow_call = None
+
+
+class ReactorMonitor(object):
+    """
+    Measures how late the reactor runs a call scheduled every REACTOR_LAG_INTERVAL seconds, and traces the calls
+    scheduled with callLater and callFromThread (this includes all LoopingCalls and registered tasks) that take longer
+    than the slow call threshold. Large lags are logged together with the last slow call, which usually caused them.
+    """
+
+    def __init__(self, reactor=reactor, interval=REACTOR_LAG_INTERVAL, slow_call_threshold=SLOW_CALL_THRESHOLD,
+                 lag_histogram=None):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.reactor = reactor
+        self.interval = interval
+        self.lag_histogram = lag_histogram or Histogram(REACTOR_LAG_BUCKETS)
+        self.tracer = SlowCallTracer(slow_call_threshold, reactor.seconds)
+        self.running = False
+
+        self._expected_time = None
+        self._delayed_call = None
+        self._call_later = None
+        self._call_from_thread = None
+
+    def start(self):
+        """
+        Start measuring the lag and install the tracing callLater and callFromThread. Should be called on the reactor
+        thread.
+        """
+        if self.running:
+            return
+        self.running = True
+
+        self._call_later = self.reactor.callLater
+        self._call_from_thread = getattr(self.reactor, u"callFromThread", None)
+        self.reactor.callLater = self._traced_call_later
+        if self._call_from_thread:
+            self.reactor.callFromThread = self._traced_call_from_thread
+
+        registry.register_collector(self.collect_metrics)
+        self._schedule_tick()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+
+        if self._delayed_call and self._delayed_call.active():
+            self._delayed_call.cancel()
+        self._delayed_call = None
+
+        registry.unregister_collector(self.collect_metrics)
+
+        # The reactor methods have been shadowed by instance attributes, removing those restores the originals
+        for name in (u"callLater", u"callFromThread"):
+            if name in vars(self.reactor):
+                delattr(self.reactor, name)
+
+    def _traced_call_later(self, delay, func, *args, **kwargs):
+        return self._call_later(delay, self.tracer.wrap(func), *args, **kwargs)
+
+    def _traced_call_from_thread(self, func, *args, **kwargs):
+        return self._call_from_thread(self.tracer.wrap(func), *args, **kwargs)
+
+    def _schedule_tick(self):
+        self._expected_time = self.reactor.seconds() + self.interval
+        self._delayed_call = self._call_later(self.interval, self._tick)
+
+    def _tick(self):
+        lag = max(0.0, self.reactor.seconds() - self._expected_time)
+        self.lag_histogram.observe(lag)
+
+        if lag >= self.tracer.threshold:
+            if self.tracer.last_slow_call:
+                name, duration, _ = self.tracer.last_slow_call
+                self._logger.warning("The reactor lagged %.3f seconds, last slow call: %s (%.3f seconds)",
+                                     lag, name, duration)
+            else:
+                self._logger.warning("The reactor lagged %.3f seconds", lag)
+
+        if self.running:
+            self._schedule_tick()
+
+    def collect_metrics(self, metrics):
+        slow_calls = metrics.gauge(u"tribler_reactor_slow_calls", u"Number of slow calls on the reactor thread",
+                                   [u"name"])
+        slow_call_seconds = metrics.gauge(u"tribler_reactor_slow_call_seconds",
+                                          u"Time spent in slow calls on the reactor thread", [u"name"])
+        for stats in self.tracer.slow_calls.values():
+            slow_calls.set(stats[u"count"], name=stats[u"name"])
+            slow_call_seconds.set(stats[u"total_time"], name=stats[u"name"])
+
+    def get_stats(self):
+        """
+        Returns the lag histogram and the slow calls in a dictionary.
+        """
+        return {u"running": self.running,
+                u"interval": self.interval,
+                u"slow_call_threshold": self.tracer.threshold,
+                u"lag": self.lag_histogram.to_dict(),
+                u"slow_calls": self.tracer.get_slow_calls()}
+
 #
 # instrumentation.py ends here
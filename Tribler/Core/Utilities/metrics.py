@@ -0,0 +1,291 @@
+"""
+A registry of counters, gauges and histograms that the Tribler components publish their performance figures to, and
+that can be exported in the Prometheus text exposition format.
+
+Components that count or time something define their metrics once, at module level, in the shared registry:
+
+    TORRENT_CHECK_SECONDS = registry.histogram(u"tribler_torrent_check_seconds", u"Duration of tracker checks",
+                                               [u"tracker_type", u"result"])
+
+Components that already keep their own statistics register a collector instead, which copies them into gauges right
+before the metrics are exported. Code that runs for every packet should do the same and keep plain counters, as
+observing a histogram still costs two calls to time() and a lock.
+
+The registry lock is only taken to register metrics and collectors, to add label values and to export. Every histogram
+has its own, non-reentrant, lock, so threads observing different histograms do not contend with each other.
+"""
+import logging
+from bisect import bisect_left
+from functools import wraps
+from threading import Lock, RLock
+from time import time
+
+DEFAULT_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0]
+
+METRIC_TYPE_COUNTER = u"counter"
+METRIC_TYPE_GAUGE = u"gauge"
+METRIC_TYPE_HISTOGRAM = u"histogram"
+
+
+class Histogram(object):
+    """
+    Counts values in buckets with fixed upper bounds, together with their number, sum and maximum.
+    add() is not thread-safe, observe() is.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = Lock()
+
+    def add(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def observe(self, value):
+        with self.lock:
+            self.add(value)
+
+    def get_percentile(self, percentile):
+        """
+        Returns the upper bound of the bucket containing the given percentile (0-100), or the maximum value if it falls
+        in the last bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = self.count * percentile / 100.0
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self):
+        return {u"buckets": [[bound, count] for bound, count in zip(self.buckets, self.counts)] +
+                            [[u"inf", self.counts[-1]]],
+                u"count": self.count,
+                u"mean": self.total / self.count if self.count else 0.0,
+                u"max": self.max,
+                u"p50": self.get_percentile(50),
+                u"p99": self.get_percentile(99)}
+
+
+def format_value(value):
+    if isinstance(value, (int, long)):
+        return str(value)
+    value = float(value)
+    if value == float(u"inf"):
+        return u"+Inf"
+    return repr(value)
+
+
+def escape_label_value(value):
+    return unicode(value).replace(u"\\", u"\\\\").replace(u"\"", u"\\\"").replace(u"\n", u"\\n")
+
+
+class MetricFamily(object):
+    """
+    A named metric with a value for every combination of label values.
+    """
+
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames, lock):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = lock
+        self._values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(u"%s expects the labels %s, got %s" % (self.name, self.labelnames, sorted(labels)))
+        return tuple(labels[labelname] for labelname in self.labelnames)
+
+    def _format_labels(self, key, extra_labels=()):
+        labels = [u"%s=\"%s\"" % (labelname, escape_label_value(value))
+                  for labelname, value in zip(self.labelnames, key) + list(extra_labels)]
+        return u"{%s}" % u",".join(labels) if labels else u""
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def get_value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def get_samples(self):
+        """
+        Returns the (name, labels, value) samples of this metric. Should be called with the registry lock held.
+        """
+        return [(self.name + self._format_labels(key), value) for key, value in sorted(self._values.iteritems())]
+
+
+class Counter(MetricFamily):
+
+    metric_type = METRIC_TYPE_COUNTER
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(MetricFamily):
+
+    metric_type = METRIC_TYPE_GAUGE
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, func, **labels):
+        """
+        Let the value be computed by calling func when the metrics are exported.
+        """
+        self.set(func, **labels)
+
+    def get_samples(self):
+        return [(name, value() if callable(value) else value) for name, value in super(Gauge, self).get_samples()]
+
+
+class HistogramFamily(MetricFamily):
+
+    metric_type = METRIC_TYPE_HISTOGRAM
+
+    def __init__(self, name, documentation, labelnames, lock, buckets=None):
+        super(HistogramFamily, self).__init__(name, documentation, labelnames, lock)
+        self.buckets = sorted(buckets or DEFAULT_BUCKETS)
+
+    def labels(self, **labels):
+        """
+        Returns the Histogram for the given label values, creating it if needed.
+        """
+        key = self._key(labels)
+        histogram = self._values.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._values.get(key)
+                if histogram is None:
+                    histogram = self._values[key] = Histogram(self.buckets)
+        return histogram
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+    def timed(self, **labels):
+        """
+        Returns a decorator that observes the duration of every call to the decorated function.
+        """
+        histogram = self.labels(**labels)
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start_time = time()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.observe(time() - start_time)
+            return wrapper
+        return decorator
+
+    def get_samples(self):
+        samples = []
+        for key, histogram in sorted(self._values.iteritems()):
+            with histogram.lock:
+                counts, count, total = list(histogram.counts), histogram.count, histogram.total
+            cumulative_count = 0
+            for bound, bucket_count in zip(histogram.buckets, counts):
+                cumulative_count += bucket_count
+                samples.append((self.name + u"_bucket" + self._format_labels(key, [(u"le", format_value(bound))]),
+                                cumulative_count))
+            samples.append((self.name + u"_bucket" + self._format_labels(key, [(u"le", u"+Inf")]), count))
+            samples.append((self.name + u"_sum" + self._format_labels(key), total))
+            samples.append((self.name + u"_count" + self._format_labels(key), count))
+        return samples
+
+
+class MetricsRegistry(object):
+    """
+    A thread-safe collection of metrics. Asking for a metric that already exists returns the existing one, so
+    components can be created and shut down several times (like in the tests) without losing their metrics.
+    """
+
+    def __init__(self):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._lock = RLock()
+        self._metrics = {}
+        self._collectors = []
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, self._lock, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(u"Metric %s has already been registered as a different metric" % name)
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=None):
+        return self._get_or_create(HistogramFamily, name, documentation, labelnames, buckets=buckets)
+
+    def get_metric(self, name):
+        return self._metrics.get(name)
+
+    def register_collector(self, collector):
+        """
+        Register a callable that is called with the registry right before the metrics are exported.
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def unregister_collector(self, collector):
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def collect(self):
+        with self._lock:
+            collectors = list(self._collectors)
+
+        for collector in collectors:
+            try:
+                collector(self)
+            except Exception:
+                self._logger.exception("Metrics collector %s failed", collector)
+
+    def export(self):
+        """
+        Run the collectors and return all metrics in the Prometheus text exposition format.
+        """
+        self.collect()
+
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.iteritems()):
+                lines.append(u"# HELP %s %s" % (name, metric.documentation.replace(u"\\", u"\\\\")
+                                                                          .replace(u"\n", u"\\n")))
+                lines.append(u"# TYPE %s %s" % (name, metric.metric_type))
+                for sample_name, value in metric.get_samples():
+                    lines.append(u"%s %s" % (sample_name, format_value(value)))
+        return u"\n".join(lines) + u"\n"
+
+
+registry = MetricsRegistry()
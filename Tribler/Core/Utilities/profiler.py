@@ -0,0 +1,304 @@
+"""
+Profilers that can be started and stopped while Tribler is running, to find out where a running session spends its
+time without having to restart it.
+
+The sampling profiler periodically takes the stacks of all Python threads, which costs (almost) nothing in between the
+samples. The yappi profiler traces every call, which is more accurate but slows down Tribler considerably, and is only
+available if yappi is installed.
+"""
+import logging
+import os
+import sys
+import threading
+from collections import defaultdict
+from threading import Event, Lock, Thread
+from time import time
+
+from twisted.python import threadable
+
+try:
+    import yappi
+    YAPPI_AVAILABLE = True
+except ImportError:
+    YAPPI_AVAILABLE = False
+
+PROFILER_SAMPLING = u"sampling"
+PROFILER_YAPPI = u"yappi"
+
+FORMAT_COLLAPSED = u"collapsed"
+FORMAT_CALLGRIND = u"callgrind"
+FORMAT_PSTAT = u"pstat"
+
+THREAD_REACTOR = u"reactor"
+THREAD_POOL = u"threadpool"
+THREAD_OTHER = u"other"
+THREAD_CATEGORIES = (THREAD_REACTOR, THREAD_POOL, THREAD_OTHER)
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+MIN_SAMPLE_INTERVAL = 0.001
+MAX_SAMPLING_OVERHEAD = 0.05  # the fraction of the time the sampler may spend taking samples
+MAX_STACK_DEPTH = 100
+MAX_STACKS = 20000  # samples of new stacks are counted as truncated once this many different stacks have been seen
+TRUNCATED_STACK = (u"[truncated]", ())
+
+
+def get_thread_category(thread_id, thread_name):
+    """
+    Returns whether a thread is the reactor thread, a thread of the Twisted thread pool (the one deferToThread uses) or
+    any other thread. Libtorrent alerts and Dispersy packets are processed on the reactor thread.
+    """
+    if thread_id == threadable.ioThread:
+        return THREAD_REACTOR
+    if thread_name.startswith(u"PoolThread-"):
+        return THREAD_POOL
+    return THREAD_OTHER
+
+
+def format_frame(code_key):
+    filename, line, name = code_key
+    return u"%s (%s:%d)" % (name, filename, line)
+
+
+class Profiler(object):
+    """
+    The base class of the profilers, which all profile from the moment they are started until they are stopped.
+    """
+
+    mode = None
+    formats = ()
+
+    def __init__(self):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.running = False
+        self.start_time = None
+        self.stop_time = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.start_time = time()
+        self.stop_time = None
+        self._logger.info("Starting the %s profiler", self.mode)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.stop_time = time()
+        self._logger.info("Stopped the %s profiler after %.1f seconds", self.mode, self.stop_time - self.start_time)
+
+    def save(self, filename, output_format):
+        """
+        Write the profile to a file.
+        :param filename: the name of the file to write to.
+        :param output_format: one of the formats supported by this profiler.
+        """
+        raise NotImplementedError()
+
+    def check_format(self, output_format):
+        if output_format not in self.formats:
+            raise ValueError(u"the %s profiler supports the formats %s" % (self.mode, u", ".join(self.formats)))
+
+    def get_stats(self):
+        return {u"mode": self.mode,
+                u"running": self.running,
+                u"start_time": self.start_time,
+                u"duration": (self.stop_time or time()) - self.start_time if self.start_time else 0.0}
+
+
+class SamplingProfiler(Profiler):
+    """
+    Samples the stacks of the Python threads every interval seconds in a separate thread and counts how often every
+    stack is seen. The interval is stretched when taking the samples becomes expensive (when there are many threads or
+    deep stacks), so the profiler never uses more than MAX_SAMPLING_OVERHEAD of the time.
+    """
+
+    mode = PROFILER_SAMPLING
+    formats = (FORMAT_COLLAPSED, FORMAT_CALLGRIND)
+
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL, threads=None):
+        """
+        :param interval: the number of seconds between two samples.
+        :param threads: the thread categories (THREAD_REACTOR, THREAD_POOL and/or THREAD_OTHER) to sample, or None to
+        sample all threads.
+        """
+        super(SamplingProfiler, self).__init__()
+        if interval < MIN_SAMPLE_INTERVAL:
+            raise ValueError(u"the sample interval should be at least %s seconds" % MIN_SAMPLE_INTERVAL)
+        for category in threads or ():
+            if category not in THREAD_CATEGORIES:
+                raise ValueError(u"unknown thread category %s, should be one of %s" %
+                                 (category, u", ".join(THREAD_CATEGORIES)))
+
+        self.interval = interval
+        self.threads = frozenset(threads) if threads else None
+        self.samples = defaultdict(int)
+        self.num_samples = 0
+        self.sample_time = 0.0
+
+        self._lock = Lock()
+        self._stop_event = Event()
+        self._thread = None
+
+    def start(self):
+        if self.running:
+            return
+        super(SamplingProfiler, self).start()
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, name=u"SamplingProfiler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        super(SamplingProfiler, self).stop()
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop_event.wait(delay):
+            start_time = time()
+            self.take_sample()
+            duration = time() - start_time
+            self.sample_time += duration
+            delay = max(self.interval, duration / MAX_SAMPLING_OVERHEAD)
+
+    def take_sample(self):
+        """
+        Count the current stack of every thread that should be sampled.
+        """
+        own_thread_id = threading.current_thread().ident
+        thread_names = dict((thread.ident, thread.name) for thread in threading.enumerate())
+
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread_id:
+                continue
+            thread_name = thread_names.get(thread_id, u"Thread-%d" % thread_id)
+            if self.threads is not None and get_thread_category(thread_id, thread_name) not in self.threads:
+                continue
+
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            stack.reverse()
+            stacks.append((thread_name, tuple(stack)))
+
+        with self._lock:
+            for stack in stacks:
+                if stack not in self.samples and len(self.samples) >= MAX_STACKS:
+                    stack = TRUNCATED_STACK
+                self.samples[stack] += 1
+            self.num_samples += 1
+
+    def get_collapsed(self):
+        """
+        Returns the samples in the collapsed stack format of flamegraph.pl: one line per stack, with the thread name and
+        the frames from the outermost to the innermost separated by semicolons, followed by the number of samples.
+        """
+        with self._lock:
+            samples = sorted(self.samples.items())
+
+        return u"".join(u"%s %d\n" % (u";".join([thread_name] + [format_frame(code_key) for code_key in stack]), count)
+                        for (thread_name, stack), count in samples)
+
+    def get_callgrind(self):
+        """
+        Returns the samples in the callgrind format of (K)Cachegrind. The cost of a function is the number of samples in
+        which it was running, the inclusive cost of a call the number of samples in which it was on the stack.
+        """
+        with self._lock:
+            samples = self.samples.items()
+
+        self_cost = defaultdict(int)
+        call_cost = defaultdict(lambda: defaultdict(int))
+        for (_, stack), count in samples:
+            if not stack:
+                continue
+            self_cost[stack[-1]] += count
+            # Recursive calls should only be counted once per sample
+            for caller, callee in set(zip(stack, stack[1:])):
+                call_cost[caller][callee] += count
+
+        lines = [u"events: Samples", u""]
+        for code_key in sorted(set(self_cost) | set(call_cost)):
+            filename, line, name = code_key
+            lines.append(u"fl=%s" % filename)
+            lines.append(u"fn=%s:%d" % (name, line))
+            lines.append(u"%d %d" % (line, self_cost.get(code_key, 0)))
+            for callee, count in sorted(call_cost.get(code_key, {}).items()):
+                lines.append(u"cfl=%s" % callee[0])
+                lines.append(u"cfn=%s:%d" % (callee[2], callee[1]))
+                lines.append(u"calls=%d %d" % (count, callee[1]))
+                lines.append(u"%d %d" % (line, count))
+            lines.append(u"")
+        return u"\n".join(lines)
+
+    def save(self, filename, output_format):
+        self.check_format(output_format)
+        output = self.get_collapsed() if output_format == FORMAT_COLLAPSED else self.get_callgrind()
+        with open(filename, 'wb') as output_file:
+            output_file.write(output.encode('utf-8'))
+
+    def get_stats(self):
+        stats = super(SamplingProfiler, self).get_stats()
+        stats.update({u"interval": self.interval,
+                      u"threads": sorted(self.threads) if self.threads else list(THREAD_CATEGORIES),
+                      u"samples": self.num_samples,
+                      u"stacks": len(self.samples),
+                      u"overhead": self.sample_time / stats[u"duration"] if stats[u"duration"] else 0.0})
+        return stats
+
+
+class YappiProfiler(Profiler):
+    """
+    Profiles every call in all threads with yappi, measuring either the wall or the CPU time. Yappi keeps its state
+    globally, so only one YappiProfiler can run at a time.
+    """
+
+    mode = PROFILER_YAPPI
+    formats = (FORMAT_CALLGRIND, FORMAT_PSTAT)
+
+    def __init__(self, clock_type=u"wall"):
+        super(YappiProfiler, self).__init__()
+        if not YAPPI_AVAILABLE:
+            raise ValueError(u"yappi is not installed")
+        if clock_type not in (u"wall", u"cpu"):
+            raise ValueError(u"the clock type should be wall or cpu")
+        self.clock_type = clock_type
+
+    def start(self):
+        if self.running:
+            return
+        super(YappiProfiler, self).start()
+        yappi.clear_stats()
+        yappi.set_clock_type(self.clock_type)
+        yappi.start(builtins=True)
+
+    def stop(self):
+        if not self.running:
+            return
+        yappi.stop()
+        super(YappiProfiler, self).stop()
+
+    def save(self, filename, output_format):
+        self.check_format(output_format)
+        yappi.get_func_stats().save(filename, type=output_format)
+
+    def get_stats(self):
+        stats = super(YappiProfiler, self).get_stats()
+        stats[u"clock_type"] = self.clock_type
+        return stats
+
+
+def get_profile_filename(directory, profiler, output_format):
+    """
+    Returns the name of the file in directory to save the profile of a profiler in.
+    """
+    return os.path.join(directory, u"profile-%s-%d.%s" % (profiler.mode, int(profiler.start_time), output_format))
@@ -4,6 +4,8 @@
 import re
 
 RE_KEYWORD_SPLIT = re.compile(r"[\W_]", re.UNICODE)
+# The simple tokenizer of the SQLite full text index separates terms by the ASCII characters other than letters and digits
+RE_FTS_TERM_SPLIT = re.compile(r"[\x00-\x2f\x3a-\x40\x5b-\x60\x7b-\x7f]+")
 DIALOG_STOPWORDS = {'an', 'and', 'by', 'for', 'from', 'of', 'the', 'to', 'with'}
 
 
@@ -25,3 +27,11 @@ def split_into_keywords(string, to_filter_stopwords=False):
 
 def filter_keywords(keywords):
     return [kw for kw in keywords if len(kw) > 0 and kw not in DIALOG_STOPWORDS]
+
+
+def get_fts_term_keywords(keywords):
+    """
+    Returns the keyword of every term of a full text query made of the given keywords, in the order in which SQLite
+    numbers the terms (e.g. in the offsets() of a match). A keyword like 16.04 or foo-bar consists of several terms.
+    """
+    return [kw for kw in keywords for term in RE_FTS_TERM_SPLIT.split(kw) if term]
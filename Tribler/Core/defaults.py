@@ -39,8 +39,9 @@ DEFAULTPORT = 7760
 #  Version 12: Added watch folder options.
 #  Version 13: Added HTTP API options.
 #  Version 14: Added option to enable/disable channel, previewchannel and tunnel community.
+#  Version 15: Added reactor monitor options.
 
-SESSDEFAULTS_VERSION = 14
+SESSDEFAULTS_VERSION = 15
 sessdefaults = OrderedDict()
 
 # General Tribler settings
@@ -163,6 +164,11 @@ sessdefaults['http_api'] = OrderedDict()
 sessdefaults['http_api']['enabled'] = False
 sessdefaults['http_api']['port'] = -1
 
+# Reactor monitor config
+sessdefaults['reactor_monitor'] = OrderedDict()
+sessdefaults['reactor_monitor']['enabled'] = True
+sessdefaults['reactor_monitor']['slow_call_threshold'] = 0.1
+
 #
 # BT per download opts
 #
@@ -36,6 +36,30 @@ class TriblerStatistics(object):
         data_dict = {u'communities': self._create_community_data(dispersy)}
         return data_dict
 
+    def collect_metrics(self, metrics):
+        """
+        Copies the packet counters and the number of candidates of the Dispersy communities to the metrics registry.
+        """
+        dispersy = self._session.get_dispersy_instance()
+        if dispersy is None:
+            return
+
+        dispersy.statistics.update()
+
+        packets = metrics.gauge(u"tribler_dispersy_packets", u"Dispersy packets by community and state",
+                                [u"community", u"state"])
+        candidates = metrics.gauge(u"tribler_dispersy_candidates", u"Dispersy candidates by community",
+                                   [u"community"])
+        for community in dispersy.statistics.communities:
+            msg_statistics = community.msg_statistics
+            for state, count in ((u"created", msg_statistics.created_count),
+                                 (u"sent", msg_statistics.outgoing_count),
+                                 (u"received", msg_statistics.total_received_count),
+                                 (u"success", msg_statistics.success_count),
+                                 (u"dropped", msg_statistics.drop_count)):
+                packets.set(count, community=community.classification, state=state)
+            candidates.set(len(community.candidates or []), community=community.classification)
+
     def _create_community_data(self, dispersy):
         """
         Creates a dictionary of community statistics data.
@@ -35,6 +35,7 @@ import wx
 from twisted.python.threadable import isInIOThread
 
 from Tribler.Category.Category import Category
+from Tribler.Core.APIImplementation.threadpoolmanager import PRIORITY_MAINTENANCE
 from Tribler.Core.DownloadConfig import get_default_dest_dir, get_default_dscfg_filename, DefaultDownloadStartupConfig
 from Tribler.Core.Session import Session
 from Tribler.Core.SessionConfig import SessionStartupConfig
@@ -235,7 +236,7 @@ class ABCApp(object):
             session.notifier.notify(NTFY_STARTUP_TICK, NTFY_DELETE, None, None)
             wx.Yield()
             self.frame.Show(True)
-            session.lm.threadpool.call_in_thread(0, self.guiservthread_free_space_check)
+            session.lm.threadpool.call_in_thread(0, self.guiservthread_free_space_check, priority=PRIORITY_MAINTENANCE)
 
             self.webUI = None
             if self.utility.read_config('use_webui'):
@@ -603,7 +604,8 @@ class ABCApp(object):
             wx.CallAfter(wx.MessageBox, "Tribler has detected low disk space. Related downloads have been stopped.",
                          "Error")
 
-        self.utility.session.lm.threadpool.call_in_thread(FREE_SPACE_CHECK_INTERVAL, self.guiservthread_free_space_check)
+        self.utility.session.lm.threadpool.call_in_thread(FREE_SPACE_CHECK_INTERVAL, self.guiservthread_free_space_check,
+                                                          priority=PRIORITY_MAINTENANCE)
 
     def guiservthread_checkpoint_timer(self):
         """ Periodically checkpoint Session """
@@ -613,7 +615,9 @@ class ABCApp(object):
             self._logger.info("main: Checkpointing Session")
             self.utility.session.checkpoint()
 
-            self.utility.session.lm.threadpool.call_in_thread(SESSION_CHECKPOINT_INTERVAL, self.guiservthread_checkpoint_timer)
+            self.utility.session.lm.threadpool.call_in_thread(SESSION_CHECKPOINT_INTERVAL,
+                                                              self.guiservthread_checkpoint_timer,
+                                                              priority=PRIORITY_MAINTENANCE)
         except:
             print_exc()
 
@@ -10,7 +10,7 @@ import sys
 import wx
 
 from Tribler.Category.Category import Category
-from Tribler.Core.CacheDB.sqlitecachedb import bin2str, str2bin, forceAndReturnDBThread
+from Tribler.Core.CacheDB.sqlitecachedb import str2bin, forceAndReturnDBThread
 from Tribler.Core.TorrentDef import TorrentDef, TorrentDefNoMetainfo
 from Tribler.Core.Video.utils import videoextdefaults
 from Tribler.Core.simpledefs import (NTFY_TORRENTS, NTFY_MYPREFERENCES, NTFY_VOTECAST, NTFY_CHANNELCAST,
@@ -22,6 +22,7 @@ from Tribler.Main.Utility.GuiDBTuples import (Torrent, ChannelTorrent, Collected
                                               NotCollectedTorrent, LibraryTorrent, Comment, Modification, Channel,
                                               RemoteChannel, Playlist, Moderation, RemoteChannelTorrent, Marking)
 from Tribler.Core.DownloadConfig import DefaultDownloadStartupConfig
+from Tribler.Core.exceptions import OperationNotPossibleAtRuntimeException
 from Tribler.Main.vwxGUI import (warnWxThread, forceWxThread, TORRENT_REQ_COLUMNS,
                                  CHANNEL_REQ_COLUMNS, PLAYLIST_REQ_COLUMNS, MODIFICATION_REQ_COLUMNS,
                                  MODERATION_REQ_COLUMNS, MARKING_REQ_COLUMNS, COMMENT_REQ_COLUMNS)
@@ -191,7 +192,10 @@ class TorrentManager(object):
     @warnIfNotDispersyThread
     def searchDispersy(self):
         if self.session.get_enable_torrent_search():
-            return self.session.search_remote_torrents(self.searchkeywords)
+            try:
+                return self.session.search_remote_torrents(self.searchkeywords)
+            except OperationNotPossibleAtRuntimeException:
+                self._logger.info("Remote torrent search is not available yet")
         return 0
 
     def getHitsInCategory(self, categorykey='all'):
@@ -880,7 +884,7 @@ class LibraryManager(object):
         prefrerences = self.mypref_db.getMyPrefListInfohash(returnDeleted=False)
         for infohash in infohashes:
             if infohash in prefrerences:
-                self._logger.info("%s missing in library", bin2str(infohash))
+                self._logger.info("%s missing in library", infohash.encode('hex'))
                 return True
         return False
 
@@ -1578,7 +1582,10 @@ class ChannelManager(object):
     @warnIfNotDispersyThread
     def searchDispersy(self):
         if self.session.get_enable_channel_search():
-            return self.session.search_remote_channels(self.searchkeywords)
+            try:
+                return self.session.search_remote_channels(self.searchkeywords)
+            except OperationNotPossibleAtRuntimeException:
+                self._logger.info("Remote channel search is not available yet")
         return 0
 
     def searchLocalDatabase(self):
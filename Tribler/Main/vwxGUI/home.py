@@ -10,6 +10,7 @@ from Tribler.community.tunnel.routing import Hop
 import random
 import logging
 import binascii
+from base64 import b64encode
 from time import strftime, time
 from traceback import print_exc
 
@@ -31,7 +32,6 @@ from Tribler.Main.vwxGUI.list_footer import ListFooter
 from Tribler.Main.vwxGUI.widgets import (SelectableListCtrl, TextCtrlAutoComplete, BetterText as StaticText,
                                          LinkStaticText, ActionButton)
 from Tribler.Main.vwxGUI.GuiImageManager import GuiImageManager
-from Tribler.Core.CacheDB.sqlitecachedb import bin2str
 from Tribler.Core.Video.VideoUtility import considered_xxx
 
 from Tribler.Main.Utility.utility import size_format
@@ -958,9 +958,9 @@ class NetworkGraphPanel(wx.Panel):
             # Determine text
             dc.SetFont(self.font_small)
             if not hop:
-                text = 'You\nPERMID ' + bin2str(self.tunnel_community.my_member.public_key)[:10]
+                text = 'You\nPERMID ' + b64encode(self.tunnel_community.my_member.public_key)[:10]
             else:
-                text = 'PERMID ' + bin2str(self.dispersy.crypto.key_to_hash(hop.public_key))[:10]
+                text = 'PERMID ' + b64encode(self.dispersy.crypto.key_to_hash(hop.public_key))[:10]
                 if 'UNKNOWN HOST' not in hop.host:
                     text = 'IP %s:%s\n' % (hop.host, hop.port) + text
 
@@ -44,6 +44,23 @@ class TriblerCategoryTest(AbstractServer):
                         "announce-list": ["http://tracker.org"], "comment": "lorem ipsum"}
         self.assertEquals(cat.calculateCategory(torrent_info, "my torrent"), 'xxx')
 
+    def test_calculate_category_video(self):
+        cat = Category.getInstance(install_dir=self.CATEGORY_TEST_DATA_DIR)
+        torrent_info = {"info": {"files": [{"path": ["my", "video.avi"], "length": 100 * 1024 * 1024},
+                                           {"path": ["my", "readme.txt"], "length": 1234}]},
+                        "announce": "http://tracker.org", "comment": "lorem ipsum"}
+        self.assertEquals(cat.calculateCategory(torrent_info, "my torrent"), 'Video')
+
+    def test_calculate_category_keywords(self):
+        cat = Category.getInstance(install_dir=self.CATEGORY_TEST_DATA_DIR)
+        self.assertEquals(cat.calculateCategoryNonDict([], "my movie divx", '', ''), 'Video')
+
+    def test_judge(self):
+        cat = Category.getInstance(install_dir=self.CATEGORY_TEST_DATA_DIR)
+        video_category = [category for category in cat.category_info if category['name'] == 'Video'][0]
+        self.assertEquals(cat.judge(video_category, [("video.avi", 100)]), (True, 1.0))
+        self.assertEquals(cat.judge(video_category, [("video.txt", 100)]), (False, 0))
+
     def test_get_family_filter_sql(self):
         cat = Category.getInstance(install_dir=self.CATEGORY_TEST_DATA_DIR)
         self.assertFalse(cat.get_family_filter_sql())
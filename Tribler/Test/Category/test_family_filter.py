@@ -28,6 +28,16 @@ class TriblerCategoryTestFamilyFilter(AbstractServer):
         self.assertTrue(family_filter.isXXXTerm("term1s"))
         self.assertFalse(family_filter.isXXXTerm("term0n"))
 
+    def test_found_xxx_term(self):
+        family_filter = XXXFilter(self.CATEGORY_TEST_DATA_DIR)
+        self.assertTrue(family_filter.foundXXXTerm("myterm3file.avi"))
+        self.assertFalse(family_filter.foundXXXTerm("myterm0file.avi"))
+
+    def test_found_xxx_term_no_searchterms(self):
+        family_filter = XXXFilter(self.CATEGORY_TEST_DATA_DIR)
+        family_filter.xxx_searchterms_regexp = family_filter.compileSearchTerms(set())
+        self.assertFalse(family_filter.foundXXXTerm("myterm3file.avi"))
+
     def test_invalid_filename_exception(self):
         family_filter = XXXFilter(self.CATEGORY_TEST_DATA_DIR)
         terms, searchterms = family_filter.initTerms("thisfiledoesnotexist.txt")
@@ -0,0 +1,92 @@
+from Tribler.Test.Core.base_test import MockObject, TriblerCoreTest
+from Tribler.community.tunnel.exitpool import ExitSocketPool
+
+
+class MockPort(object):
+
+    def __init__(self, port):
+        self.port = port
+        self.stopped = False
+
+    def getHost(self):
+        host = MockObject()
+        host.port = self.port
+        return host
+
+    def stopListening(self):
+        self.stopped = True
+
+
+class MockTransport(object):
+
+    def __init__(self):
+        self.written = []
+
+    def write(self, data, destination):
+        self.written.append((data, destination))
+
+
+class MockReactor(object):
+
+    def __init__(self):
+        self.next_port = 5000
+
+    def listenUDP(self, _, protocol):
+        self.next_port += 1
+        protocol.transport = MockTransport()
+        return MockPort(self.next_port)
+
+
+class MockExitSocket(object):
+
+    def __init__(self):
+        self.received = []
+
+    def datagramReceived(self, data, source):
+        self.received.append((data, source))
+
+
+class TestExitSocketPool(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TestExitSocketPool, self).setUp(annotate=annotate)
+        self.community = MockObject()
+        self.community.exit_sockets = {1: MockExitSocket(), 2: MockExitSocket(), 3: MockExitSocket()}
+        self.pool = ExitSocketPool(self.community, 2)
+        self.pool._reactor = MockReactor()
+
+    def test_start_lazily(self):
+        self.assertFalse(self.pool.started)
+        self.assertTrue(self.pool.sendto(1, "data", ("1.2.3.4", 80)))
+        self.assertEqual(len(self.pool.sockets), 2)
+
+    def test_demultiplex(self):
+        self.pool.sendto(1, "data", ("1.2.3.4", 80))
+        self.pool.sendto(2, "data", ("1.2.3.4", 80))
+
+        for protocol in self.pool.sockets:
+            protocol.datagramReceived("reply", ("1.2.3.4", 80))
+            protocol.datagramReceived("unknown", ("1.2.3.5", 80))
+
+        self.assertEqual(self.community.exit_sockets[1].received, [("reply", ("1.2.3.4", 80))])
+        self.assertEqual(self.community.exit_sockets[2].received, [("reply", ("1.2.3.4", 80))])
+
+    def test_no_socket_available(self):
+        self.assertTrue(self.pool.sendto(1, "data", ("1.2.3.4", 80)))
+        self.assertTrue(self.pool.sendto(2, "data", ("1.2.3.4", 80)))
+        self.assertFalse(self.pool.sendto(3, "data", ("1.2.3.4", 80)))
+        self.assertTrue(self.pool.sendto(3, "data", ("1.2.3.5", 80)))
+
+    def test_remove_circuit(self):
+        self.pool.sendto(1, "data", ("1.2.3.4", 80))
+        self.pool.sendto(2, "data", ("1.2.3.4", 80))
+        self.pool.remove_circuit(1)
+        self.assertEqual(len(self.pool.demux), 1)
+        self.assertTrue(self.pool.sendto(3, "data", ("1.2.3.4", 80)))
+
+    def test_stop(self):
+        self.pool.start()
+        ports = [protocol.port for protocol in self.pool.sockets]
+        self.pool.stop()
+        self.assertFalse(self.pool.started)
+        self.assertTrue(all(port.stopped for port in ports))
@@ -0,0 +1,43 @@
+from Tribler.Core.Utilities.twisted_thread import deferred
+from Tribler.Test.Core.base_test import TriblerCoreTest
+from Tribler.community.tunnel.crypto.keypool import DiffieHellmanKeyPool
+
+
+class MockCrypto(object):
+
+    def __init__(self):
+        self.num_generated = 0
+
+    def generate_diffie_secret(self):
+        self.num_generated += 1
+        return "secret%d" % self.num_generated, "first_part%d" % self.num_generated
+
+
+class TestDiffieHellmanKeyPool(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TestDiffieHellmanKeyPool, self).setUp(annotate=annotate)
+        self.crypto = MockCrypto()
+        self.key_pool = DiffieHellmanKeyPool(self.crypto, 3)
+
+    @deferred(timeout=10)
+    def test_refill(self):
+        def on_refilled(_):
+            self.assertEqual(len(self.key_pool), 3)
+            self.assertFalse(self.key_pool.refilling)
+
+        return self.key_pool.refill().addCallback(on_refilled)
+
+    @deferred(timeout=10)
+    def test_get_from_pool(self):
+        def on_refilled(_):
+            self.assertEqual(self.key_pool.get(), ("secret1", "first_part1"))
+            self.assertEqual(len(self.key_pool), 2)
+            self.assertTrue(self.key_pool.refilling)
+
+        return self.key_pool.refill().addCallback(on_refilled)
+
+    def test_get_empty_pool(self):
+        self.key_pool.refilling = True
+        self.assertEqual(self.key_pool.get(), ("secret1", "first_part1"))
+        self.assertEqual(len(self.key_pool), 0)
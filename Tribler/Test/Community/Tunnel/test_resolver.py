@@ -0,0 +1,76 @@
+from twisted.internet.defer import Deferred, fail, succeed
+
+from Tribler.Test.Core.base_test import TriblerCoreTest
+from Tribler.community.tunnel.resolver import ExitResolver
+
+
+class MockReactor(object):
+
+    def __init__(self):
+        self.lookups = []
+        self.deferreds = []
+
+    def resolve(self, host):
+        self.lookups.append(host)
+        deferred = Deferred()
+        self.deferreds.append(deferred)
+        return deferred
+
+
+class TestExitResolver(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TestExitResolver, self).setUp(annotate=annotate)
+        self.resolver = ExitResolver(ttl=100, negative_ttl=100, max_size=2)
+        self.resolver._reactor = MockReactor()
+
+    def test_is_ip_address(self):
+        self.assertTrue(ExitResolver.is_ip_address("1.2.3.4"))
+        self.assertFalse(ExitResolver.is_ip_address("localhost"))
+        self.assertFalse(ExitResolver.is_ip_address("1"))
+
+    def test_resolve_cached(self):
+        results = []
+        self.resolver.resolve("tribler.org").addCallback(results.append)
+        self.resolver.resolve("tribler.org").addCallback(results.append)
+        self.assertEqual(self.resolver._reactor.lookups, ["tribler.org"])
+
+        self.resolver._reactor.deferreds[0].callback("1.2.3.4")
+        self.assertEqual(results, ["1.2.3.4", "1.2.3.4"])
+        self.assertEqual(self.resolver.get_cached("tribler.org"), (True, "1.2.3.4"))
+
+        self.resolver.resolve("tribler.org").addCallback(results.append)
+        self.assertEqual(len(self.resolver._reactor.lookups), 1)
+        self.assertEqual(len(results), 3)
+
+    def test_resolve_failed(self):
+        self.resolver._reactor.resolve = lambda _: fail(RuntimeError("lookup failed"))
+        failures = []
+        self.resolver.resolve("tribler.invalid").addErrback(failures.append)
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(self.resolver.get_cached("tribler.invalid"), (True, None))
+
+        self.resolver.resolve("tribler.invalid").addErrback(failures.append)
+        self.assertEqual(len(failures), 2)
+
+    def test_cancelled_waiter(self):
+        deferred = self.resolver.resolve("tribler.org")
+        deferred.addErrback(lambda _: None)
+        deferred.cancel()
+        self.resolver._reactor.deferreds[0].callback("1.2.3.4")
+        self.assertEqual(self.resolver.get_cached("tribler.org"), (True, "1.2.3.4"))
+
+    def test_expired(self):
+        self.resolver._reactor.resolve = lambda _: succeed("1.2.3.4")
+        self.resolver.ttl = -1
+        self.resolver.resolve("tribler.org")
+        self.assertEqual(self.resolver.get_cached("tribler.org"), (False, None))
+        self.assertEqual(len(self.resolver), 0)
+
+    def test_max_size(self):
+        self.resolver._reactor.resolve = succeed
+        for host in ["a.org", "b.org", "c.org"]:
+            self.resolver.resolve(host)
+        self.assertEqual(len(self.resolver), 2)
+        self.assertFalse(self.resolver.get_cached("a.org")[0])
+        self.assertTrue(self.resolver.get_cached("c.org")[0])
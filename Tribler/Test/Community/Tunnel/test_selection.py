@@ -0,0 +1,81 @@
+from Tribler.Test.Core.base_test import MockObject, TriblerCoreTest
+from Tribler.community.tunnel import CIRCUIT_STATE_READY, CIRCUIT_TYPE_DATA, CIRCUIT_TYPE_IP
+from Tribler.community.tunnel.selection import CircuitStats, WeightedSelection
+
+
+class TestWeightedSelection(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TestWeightedSelection, self).setUp(annotate=annotate)
+        self.community = MockObject()
+        self.community.circuits = {}
+        self.selection = WeightedSelection(self.community)
+        self.selection.random.seed(42)
+
+    @staticmethod
+    def create_circuit(circuit_id, goal_hops=1, ctype=CIRCUIT_TYPE_DATA):
+        circuit = MockObject()
+        circuit.circuit_id = circuit_id
+        circuit.goal_hops = goal_hops
+        circuit.ctype = ctype
+        circuit.state = CIRCUIT_STATE_READY
+        circuit.bytes_up = circuit.bytes_down = 0
+        return circuit
+
+    def test_hop_index(self):
+        circuit1 = self.create_circuit(1)
+        circuit2 = self.create_circuit(2, goal_hops=2)
+        self.selection.on_circuit_ready(circuit1)
+        self.selection.on_circuit_ready(circuit2)
+        self.selection.on_circuit_ready(self.create_circuit(3, ctype=CIRCUIT_TYPE_IP))
+
+        self.assertTrue(self.selection.has_options(1))
+        self.assertFalse(self.selection.has_options(3))
+        self.assertEqual(self.selection.select(None, 1), circuit1)
+        self.assertEqual(self.selection.select(None, 2), circuit2)
+        self.assertEqual(len(self.selection.get_circuits(None)), 2)
+
+        self.selection.on_circuit_removed(circuit1)
+        self.assertFalse(self.selection.has_options(1))
+        self.assertIsNone(self.selection.select(None, 1))
+        self.assertNotIn(1, self.selection.stats)
+
+    def test_select_fast_circuit(self):
+        fast_circuit = self.create_circuit(1)
+        slow_circuit = self.create_circuit(2)
+        for circuit, rtt in [(fast_circuit, 0.1), (slow_circuit, 1.0)]:
+            self.selection.on_circuit_ready(circuit)
+            self.selection.on_rtt(circuit, rtt)
+
+        selected = [self.selection.select(("1.2.3.4", i), 1) for i in xrange(1000)]
+        self.assertGreater(selected.count(fast_circuit), 800)
+        self.assertGreater(selected.count(slow_circuit), 0)
+
+    def test_unknown_circuit_is_average(self):
+        circuits = [self.create_circuit(circuit_id) for circuit_id in [1, 2, 3]]
+        for circuit in circuits:
+            self.selection.on_circuit_ready(circuit)
+        self.selection.on_rtt(circuits[0], 0.2)
+        self.selection.on_rtt(circuits[1], 0.6)
+
+        weights = self.selection.get_weights(circuits)
+        self.assertAlmostEqual(weights[2], 1 / 0.4)
+
+    def test_throughput(self):
+        circuit = self.create_circuit(1)
+        stats = CircuitStats(circuit)
+        circuit.bytes_down = 1000
+        stats.update_throughput(stats.last_time + 10)
+        self.assertEqual(stats.throughput, 100)
+
+        circuit.bytes_down = 1000
+        stats.update_throughput(stats.last_time + 10)
+        self.assertLess(stats.throughput, 100)
+
+    def test_rtt_ewma(self):
+        stats = CircuitStats(self.create_circuit(1))
+        stats.add_rtt(1.0)
+        self.assertEqual(stats.rtt, 1.0)
+        stats.add_rtt(0.0)
+        self.assertLess(stats.rtt, 1.0)
+        self.assertGreater(stats.rtt, 0.0)
@@ -0,0 +1,82 @@
+from Tribler.Test.Core.base_test import MockObject, TriblerCoreTest
+from Tribler.community.tunnel import CIRCUIT_TYPE_DATA
+from Tribler.community.tunnel.Socks5.server import Socks5Server
+
+
+class MockSelectionStrategy(object):
+
+    def __init__(self, circuits):
+        self.circuits = circuits
+
+    def select(self, destination, hops):
+        return self.circuits.pop(0) if self.circuits else None
+
+
+class MockUDPSocket(object):
+
+    def __init__(self):
+        self.datagrams = []
+
+    def sendDatagram(self, data):
+        self.datagrams.append(data)
+
+
+class TestSocks5Server(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TestSocks5Server, self).setUp(annotate=annotate)
+        self.circuits = [self.create_circuit(circuit_id) for circuit_id in [1, 2]]
+        self.community = MockObject()
+        self.community.selection_strategy = MockSelectionStrategy(list(self.circuits))
+        self.socks5_server = Socks5Server(self.community, [1234])
+
+        self.session1 = self.socks5_server.buildProtocol(None, 1)
+        self.session1._udp_socket = MockUDPSocket()
+        self.session2 = self.socks5_server.buildProtocol(None, 1)
+        self.session2._udp_socket = MockUDPSocket()
+
+    @staticmethod
+    def create_circuit(circuit_id):
+        circuit = MockObject()
+        circuit.circuit_id = circuit_id
+        circuit.ctype = CIRCUIT_TYPE_DATA
+        circuit.goal_hops = 1
+        return circuit
+
+    def test_select_indexes_circuit(self):
+        self.assertEqual(self.session1.select(("1.2.3.4", 80)), self.circuits[0])
+        self.assertEqual(self.session1.select(("1.2.3.4", 80)), self.circuits[0])
+        self.assertEqual(self.session1.circuit_destinations[1], {("1.2.3.4", 80)})
+        self.assertEqual(self.socks5_server.circuit_sessions[1], {self.session1})
+
+    def test_incoming_dispatch(self):
+        self.session1.select(("1.2.3.4", 80))
+        self.session2.select(("1.2.3.5", 80))
+
+        self.socks5_server.on_incoming_from_tunnel(self.community, self.circuits[0], ("1.2.3.6", 80), "data")
+        self.assertEqual(len(self.session1._udp_socket.datagrams), 1)
+        self.assertEqual(len(self.session2._udp_socket.datagrams), 0)
+        self.assertEqual(self.session1.destinations[("1.2.3.6", 80)], self.circuits[0])
+
+    def test_incoming_forced(self):
+        self.socks5_server.on_incoming_from_tunnel(self.community, self.circuits[0], ("1.2.3.6", 80), "data", True)
+        self.assertEqual(len(self.session1._udp_socket.datagrams), 1)
+        self.assertEqual(len(self.session2._udp_socket.datagrams), 1)
+        self.assertEqual(self.socks5_server.circuit_sessions[1], {self.session1, self.session2})
+
+    def test_circuit_dead(self):
+        self.session1.select(("1.2.3.4", 80))
+        self.session2.select(("1.2.3.5", 80))
+
+        self.assertEqual(self.socks5_server.circuit_dead(self.circuits[0]), {("1.2.3.4", 80)})
+        self.assertNotIn(("1.2.3.4", 80), self.session1.destinations)
+        self.assertNotIn(1, self.session1.circuit_destinations)
+        self.assertNotIn(1, self.socks5_server.circuit_sessions)
+        self.assertIn(2, self.socks5_server.circuit_sessions)
+
+    def test_destination_moved(self):
+        self.session1.select(("1.2.3.4", 80))
+        self.session1.on_incoming_from_tunnel(self.community, self.circuits[1], ("1.2.3.4", 80), "data", True)
+        self.assertEqual(self.session1.destinations[("1.2.3.4", 80)], self.circuits[1])
+        self.assertNotIn(1, self.socks5_server.circuit_sessions)
+        self.assertEqual(self.socks5_server.circuit_sessions[2], {self.session1})
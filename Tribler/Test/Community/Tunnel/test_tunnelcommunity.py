@@ -2,8 +2,9 @@ import time
 
 from Tribler.Core.Utilities.twisted_thread import deferred
 from Tribler.Test.Community.Tunnel.test_tunnel_base import AbstractTestTunnelCommunity
-from Tribler.community.tunnel.routing import Circuit, RelayRoute
-from Tribler.community.tunnel.tunnel_community import TunnelExitSocket, CircuitRequestCache, PingRequestCache
+from Tribler.community.tunnel.routing import Circuit, Hop, RelayRoute
+from Tribler.community.tunnel.tunnel_community import (TunnelExitSocket, CircuitRequestCache, PingRequestCache,
+                                                       TunnelSettings)
 from Tribler.dispersy.candidate import Candidate
 from Tribler.dispersy.message import DropMessage
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
@@ -120,3 +121,49 @@ class TestTunnelCommunity(AbstractTestTunnelCommunity):
         data = "ffffffff".decode("HEX") + "1" * 25
         exit_tunnel.sendto(data, ("localhost", -1))
         return exit_tunnel.close()
+
+    @blocking_call_on_reactor_thread
+    def test_circuit_index(self):
+        circuit = Circuit(42L, goal_hops=1, first_hop=("127.0.0.1", 1234))
+        self.tunnel_community.circuits[42] = circuit
+        self.tunnel_community.index_circuit(circuit)
+        self.assertIn(42, self.tunnel_community.data_circuits())
+        self.assertNotIn(42, self.tunnel_community.active_data_circuits())
+        self.assertIn(("127.0.0.1", 1234), self.tunnel_community.circuits_first_hops)
+
+        circuit.add_hop(Hop())
+        self.tunnel_community.index_circuit(circuit)
+        self.assertIn(42, self.tunnel_community.active_data_circuits(1))
+        self.assertNotIn(42, self.tunnel_community.active_data_circuits(2))
+
+        self.tunnel_community.remove_circuit(42)
+        self.assertFalse(self.tunnel_community.data_circuits())
+        self.assertFalse(self.tunnel_community.circuits_first_hops)
+
+    @blocking_call_on_reactor_thread
+    def test_do_remove_inactive(self):
+        self.tunnel_community.settings = TunnelSettings()
+        active_relay = RelayRoute(42, ("127.0.0.1", 1234))
+        inactive_relay = RelayRoute(43, ("127.0.0.1", 1235))
+        inactive_relay.last_incoming = time.time() - self.tunnel_community.settings.max_time_inactive - 1
+        for circuit_id, relay in [(42, active_relay), (43, inactive_relay)]:
+            self.tunnel_community.relay_from_to[circuit_id] = relay
+            self.tunnel_community.schedule_expiry(u"relay", circuit_id, relay, deadline=0)
+
+        self.tunnel_community.do_remove()
+        self.assertIn(42, self.tunnel_community.relay_from_to)
+        self.assertNotIn(43, self.tunnel_community.relay_from_to)
+        # The active relay is checked again once it could have become inactive
+        self.assertEqual(len(self.tunnel_community.expiry_heap), 1)
+        self.assertGreater(self.tunnel_community.expiry_heap[0][0], time.time())
+
+    @blocking_call_on_reactor_thread
+    def test_do_remove_traffic_limit(self):
+        self.tunnel_community.settings = TunnelSettings()
+        relay = RelayRoute(42, ("127.0.0.1", 1234))
+        self.tunnel_community.relay_from_to[42] = relay
+        self.tunnel_community.schedule_expiry(u"relay", 42, relay)
+
+        self.tunnel_community.increase_bytes_sent(relay, self.tunnel_community.settings.max_traffic + 1)
+        self.tunnel_community.do_remove()
+        self.assertNotIn(42, self.tunnel_community.relay_from_to)
@@ -1,9 +1,13 @@
+import json
 import os
-from twisted.internet.defer import DeferredList
+from twisted.internet.defer import Deferred
+from twisted.python.failure import Failure
+from twisted.web.client import ResponseDone
+from twisted.web.http_headers import Headers
 from Tribler.Core.Modules.channel.cache import SimpleCache
 from Tribler.Core.Modules.channel.channel_rss import ChannelRssParser, RSSFeedParser
 from Tribler.Test.Core.Modules.Channel.base_test_channel import BaseTestChannel
-from Tribler.Test.Core.base_test import TriblerCoreTest
+from Tribler.Test.Core.base_test import TriblerCoreTest, MockObject
 from Tribler.Test.test_as_server import TESTS_DATA_DIR
 
 
@@ -49,7 +53,7 @@ class TestChannelRss(BaseTestChannel):
     def test_parse_rss_feed(self):
         self.channel_rss.rss_url = os.path.join(TESTS_DATA_DIR, 'test_rss.xml')
         self.channel_rss._url_cache = SimpleCache(os.path.join(self.session_base_dir, 'cache.txt'))
-        self.assertIsInstance(self.channel_rss.parse_feed(), DeferredList)
+        self.assertIsInstance(self.channel_rss.parse_feed(), Deferred)
 
     def test_parse_feed_stopped(self):
         self.channel_rss.rss_url = os.path.join(TESTS_DATA_DIR, 'test_rss.xml')
@@ -57,6 +61,91 @@ class TestChannelRss(BaseTestChannel):
         self.channel_rss._to_stop = True
         self.assertIsNone(self.channel_rss.parse_feed())
 
+    def test_feed_validators_saved_after_parse(self):
+        response = MockObject()
+        response.code = 200
+        response.phrase = 'OK'
+        response.headers = Headers({'etag': ['abc'], 'last-modified': ['yesterday']})
+        response.deliverBody = lambda protocol: protocol.connectionLost(Failure(ResponseDone()))
+        self.channel_rss._on_feed_response(response)
+        self.assertIsNone(self.channel_rss._etag)
+
+        self.channel_rss._on_feed_parsed([])
+        self.assertEqual(self.channel_rss._etag, 'abc')
+        self.assertEqual(self.channel_rss._last_modified, 'yesterday')
+
+    def test_feed_validators_dropped_on_error(self):
+        failure = MockObject()
+        failure.getErrorMessage = lambda: "error"
+        self.channel_rss._pending_validators = ('abc', None)
+        self.channel_rss._on_feed_error(failure)
+        self.channel_rss._on_feed_parsed([])
+        self.assertIsNone(self.channel_rss._etag)
+
+    def test_feed_not_modified(self):
+        response = MockObject()
+        response.code = 304
+        self.assertIsNone(self.channel_rss._on_feed_response(response))
+
+    def test_feed_bad_response_code(self):
+        response = MockObject()
+        response.code = 500
+        self.assertIsNone(self.channel_rss._on_feed_response(response))
+
+    def test_download_error_refetch_feed(self):
+        failure = MockObject()
+        failure.getErrorMessage = lambda: "error"
+        self.channel_rss._etag = 'abc'
+        self.channel_rss._on_download_error(failure, 'http://localhost/a.torrent', refetch_feed=False)
+        self.assertEqual(self.channel_rss._etag, 'abc')
+        self.channel_rss._on_download_error(failure, 'http://localhost/a.torrent')
+        self.assertIsNone(self.channel_rss._etag)
+
+
+class TestSimpleCache(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TestSimpleCache, self).setUp(annotate=annotate)
+        self.cache_path = os.path.join(self.session_base_dir, 'cache.txt')
+
+    def test_save_load(self):
+        cache = SimpleCache(self.cache_path)
+        cache.add(u'a')
+        cache.add(u'a')
+        cache.save()
+        cache.add(u'b')
+        cache.save()
+
+        loaded_cache = SimpleCache(self.cache_path)
+        loaded_cache.load()
+        self.assertEqual(len(loaded_cache), 2)
+        self.assertTrue(loaded_cache.has(u'a'))
+        self.assertTrue(loaded_cache.has(u'b'))
+        self.assertFalse(loaded_cache.has(u'c'))
+
+    def test_load_old_format(self):
+        with open(self.cache_path, 'wb') as cache_file:
+            json.dump([u'a', u'b'], cache_file)
+
+        cache = SimpleCache(self.cache_path)
+        cache.load()
+        self.assertTrue(cache.has(u'a'))
+        cache.add(u'c')
+        cache.save()
+
+        loaded_cache = SimpleCache(self.cache_path)
+        loaded_cache.load()
+        self.assertEqual(len(loaded_cache), 3)
+
+    def test_load_corrupt_line(self):
+        with open(self.cache_path, 'wb') as cache_file:
+            cache_file.write('"a"\n"b')
+
+        cache = SimpleCache(self.cache_path)
+        cache.load()
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(cache.has(u'a'))
+
 
 class TestRssParser(TriblerCoreTest):
 
@@ -35,10 +35,12 @@ class AbstractBaseApiTest(TestAsServer):
         self.config.set_http_api_enabled(True)
         self.config.set_megacache(True)
 
-    def do_request(self, endpoint, request_type, post_data):
+    def do_request(self, endpoint, request_type, post_data, headers=None):
         agent = Agent(reactor)
+        request_headers = {'User-Agent': ['Tribler ' + version_id]}
+        request_headers.update(headers or {})
         return agent.request(request_type, 'http://localhost:%s/%s' % (self.session.get_http_api_port(), endpoint),
-                             Headers({'User-Agent': ['Tribler ' + version_id]}), POSTDataProducer(post_data))
+                             Headers(request_headers), POSTDataProducer(post_data))
 
 
 class AbstractApiTest(AbstractBaseApiTest):
@@ -1,5 +1,6 @@
 import json
 import time
+from twisted.web.client import readBody
 from Tribler.Core.Modules.restapi.channels_endpoint import VOTE_SUBSCRIBE, VOTE_UNSUBSCRIBE
 
 from Tribler.Core.Utilities.twisted_thread import deferred
@@ -90,6 +91,66 @@ class TestChannelsEndpoint(AbstractTestChannelsEndpoint):
 
         return self.do_request('channels/discovered', expected_code=200).addCallback(self.verify_channels)
 
+    @deferred(timeout=10)
+    def test_get_discovered_channels_page(self):
+        """
+        Testing whether the API returns a page of the discovered channels
+        """
+        def verify_channels(channels):
+            channels_json = json.loads(channels)
+            self.assertEqual([channel['name'] for channel in channels_json['channels']],
+                             ['Test channel 7', 'Test channel 6', 'Test channel 5'])
+
+        self.should_check_equality = False
+        for i in range(0, 10):
+            self.insert_channel_in_db('rand%d' % i, 42 + i, 'Test channel %d' % i, 'Test description %d' % i)
+
+        return self.do_request('channels/discovered?offset=2&limit=3&sort=-name', expected_code=200)\
+            .addCallback(verify_channels)
+
+    @deferred(timeout=10)
+    def test_get_discovered_channels_page_whitespace_name(self):
+        """
+        Testing whether channels with a name consisting of whitespace are skipped when fetching a page of channels
+        """
+        def verify_channels(channels):
+            channels_json = json.loads(channels)
+            self.assertEqual([channel['name'] for channel in channels_json['channels']], ['Test channel 1'])
+
+        self.should_check_equality = False
+        self.insert_channel_in_db('rand0', 42, '\t\n', 'Test description 0')
+        self.insert_channel_in_db('rand1', 43, 'Test channel 1', 'Test description 1')
+
+        return self.do_request('channels/discovered?limit=1&sort=name', expected_code=200)\
+            .addCallback(verify_channels)
+
+    @deferred(timeout=10)
+    def test_get_discovered_channels_invalid_sort(self):
+        """
+        Testing whether the API returns error 400 if the channels are sorted on an unknown column
+        """
+        self.should_check_equality = False
+        return self.do_request('channels/discovered?sort=description', expected_code=400)
+
+    @deferred(timeout=10)
+    def test_get_discovered_channels_not_modified(self):
+        """
+        Testing whether the API returns a 304 response if the client already has the discovered channels
+        """
+        def on_response(response):
+            self.assertEqual(response.code, 200)
+            etag = response.headers.getRawHeaders('ETag')[0]
+            return readBody(response).addCallback(
+                lambda _: super(TestChannelsEndpoint, self).do_request('channels/discovered', 'GET', '',
+                                                                       headers={'If-None-Match': [etag]}))
+
+        def verify_not_modified(response):
+            self.assertEqual(response.code, 304)
+
+        self.insert_channel_in_db('rand', 42, 'Test channel', 'Test description')
+        return super(TestChannelsEndpoint, self).do_request('channels/discovered', 'GET', '')\
+            .addCallback(on_response).addCallback(verify_not_modified)
+
 
 class TestChannelTorrentsEndpoint(AbstractTestChannelsEndpoint):
 
@@ -121,6 +182,41 @@ class TestChannelTorrentsEndpoint(AbstractTestChannelsEndpoint):
         return self.do_request('channels/discovered/%s/torrents' % 'rand'.encode('hex'), expected_code=200)\
             .addCallback(verify_torrents)
 
+    @deferred(timeout=10)
+    def test_get_torrents_in_channel_page(self):
+        """
+        Testing whether the API returns a page of the torrents in a channel
+        """
+        def verify_torrents(torrents):
+            torrents_json = json.loads(torrents)
+            self.assertEqual([torrent['name'] for torrent in torrents_json['torrents']], ['torrent1', 'torrent2'])
+
+        self.should_check_equality = False
+        channel_id = self.insert_channel_in_db('rand', 42, 'Test channel', 'Test description')
+
+        torrent_list = [[channel_id, i, 1, chr(ord('a') + i) * 20, 1460000000 + i, "torrent%d" % i,
+                         [['file.txt', 1000 * i]], []] for i in xrange(1, 5)]
+        self.insert_torrents_into_channel(torrent_list)
+
+        return self.do_request('channels/discovered/%s/torrents?limit=2&sort=size' % 'rand'.encode('hex'),
+                               expected_code=200).addCallback(verify_torrents)
+
+    @deferred(timeout=10)
+    def test_get_torrents_in_channel_empty_page(self):
+        """
+        Testing whether the API returns no torrents when a page with limit 0 is requested
+        """
+        def verify_torrents(torrents):
+            self.assertEqual(json.loads(torrents)['torrents'], [])
+
+        self.should_check_equality = False
+        channel_id = self.insert_channel_in_db('rand', 42, 'Test channel', 'Test description')
+        self.insert_torrents_into_channel([[channel_id, 1, 1, 'a' * 20, 1460000000, "torrent1",
+                                            [['file.txt', 1000]], []]])
+
+        return self.do_request('channels/discovered/%s/torrents?limit=0' % 'rand'.encode('hex'),
+                               expected_code=200).addCallback(verify_torrents)
+
 
 class TestChannelsSubscriptionEndpoint(AbstractTestChannelsEndpoint):
 
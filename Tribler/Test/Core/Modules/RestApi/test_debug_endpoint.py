@@ -0,0 +1,74 @@
+import json
+import os
+
+from Tribler.Core.Utilities.twisted_thread import deferred
+from Tribler.Test.Core.Modules.RestApi.base_api_test import AbstractApiTest
+
+
+class TestDebugEndpoint(AbstractApiTest):
+
+    @deferred(timeout=10)
+    def test_get_reactor_stats(self):
+        """
+        Testing whether the API returns the reactor lag and slow calls
+        """
+        def verify_reactor_stats(body):
+            stats = json.loads(body)["reactor"]
+            self.assertTrue(stats["running"])
+            self.assertIn("lag", stats)
+            self.assertIsInstance(stats["slow_calls"], list)
+
+        self.should_check_equality = False
+        return self.do_request('debug/reactor', expected_code=200).addCallback(verify_reactor_stats)
+
+    @deferred(timeout=10)
+    def test_get_reactor_stats_disabled(self):
+        """
+        Testing whether the API returns a 404 if the reactor monitor is not enabled
+        """
+        self.session.lm.reactor_monitor.stop()
+        self.session.lm.reactor_monitor = None
+        return self.do_request('debug/reactor', expected_code=404,
+                               expected_json={"error": "the reactor monitor is not enabled"})
+
+    @deferred(timeout=10)
+    def test_profiler(self):
+        """
+        Testing whether the API starts the sampling profiler and saves its profile when it is stopped
+        """
+        def verify_profiler_stopped(body):
+            profiler_file = json.loads(body)["profiler_file"]
+            self.assertTrue(profiler_file.endswith(".collapsed"))
+            self.assertTrue(os.path.exists(profiler_file))
+            self.assertFalse(self.session.lm.profiler.running)
+
+        def verify_profiler_running(body):
+            stats = json.loads(body)["profiler"]
+            self.assertTrue(stats["running"])
+            self.assertEqual(stats["threads"], ["reactor"])
+            return self.do_request('debug/profiler', expected_code=200, request_type='DELETE')\
+                .addCallback(verify_profiler_stopped)
+
+        def verify_profiler_started(_):
+            return self.do_request('debug/profiler', expected_code=200).addCallback(verify_profiler_running)
+
+        self.should_check_equality = False
+        return self.do_request('debug/profiler', expected_code=200, request_type='PUT',
+                               post_data={"interval": 0.01, "threads": "reactor"})\
+            .addCallback(verify_profiler_started)
+
+    @deferred(timeout=10)
+    def test_profiler_invalid_mode(self):
+        """
+        Testing whether the API returns a 400 when starting a profiler with an unknown mode
+        """
+        self.should_check_equality = False
+        return self.do_request('debug/profiler', expected_code=400, request_type='PUT', post_data={"mode": "foo"})
+
+    @deferred(timeout=10)
+    def test_profiler_not_running(self):
+        """
+        Testing whether the API returns a 400 when stopping the profiler while it is not running
+        """
+        return self.do_request('debug/profiler', expected_code=400, request_type='DELETE',
+                               expected_json={"error": "the profiler is not running"})
@@ -3,8 +3,10 @@ import os
 from urllib import pathname2url
 
 from Tribler.Core.DownloadConfig import DownloadStartupConfig
+from Tribler.Core.Modules.restapi.downloads_endpoint import DownloadsEndpoint, MAX_DELTA_REMOVED, MAX_DELTA_STATES
 from Tribler.Core.Utilities.twisted_thread import deferred
 from Tribler.Test.Core.Modules.RestApi.base_api_test import AbstractApiTest
+from Tribler.Test.Core.base_test import TriblerCoreTest
 from Tribler.Test.test_as_server import TESTS_DATA_DIR
 
 
@@ -37,3 +39,102 @@ class TestDownloadsEndpoint(AbstractApiTest):
 
         self.should_check_equality = False
         return self.do_request('downloads', expected_code=200).addCallback(verify_download)
+
+    @deferred(timeout=20)
+    def test_get_downloads_fields(self):
+        """
+        Testing whether the API only returns the requested fields of the downloads
+        """
+        def verify_download(downloads):
+            downloads_json = json.loads(downloads)
+            self.assertEqual(len(downloads_json['downloads']), 1)
+            self.assertEqual(set(downloads_json['downloads'][0].keys()), {'infohash', 'progress', 'status'})
+
+        video_tdef, self.torrent_path = self.create_local_torrent(os.path.join(TESTS_DATA_DIR, 'video.avi'))
+        self.session.start_download_from_tdef(video_tdef, DownloadStartupConfig())
+
+        self.should_check_equality = False
+        return self.do_request('downloads?fields=progress,status', expected_code=200).addCallback(verify_download)
+
+    @deferred(timeout=10)
+    def test_get_downloads_unknown_fields(self):
+        """
+        Testing whether the API returns error 400 if unknown fields of the downloads are requested
+        """
+        self.should_check_equality = False
+        return self.do_request('downloads?fields=progress,foo', expected_code=400)
+
+    @deferred(timeout=20)
+    def test_get_downloads_changed_since(self):
+        """
+        Testing whether the API only returns the downloads that changed since the previous response
+        """
+        def verify_unchanged(downloads):
+            downloads_json = json.loads(downloads)
+            self.assertEqual(downloads_json['downloads'], [])
+            self.assertEqual(downloads_json['removed'], [])
+
+        def verify_downloads(downloads):
+            downloads_json = json.loads(downloads)
+            self.assertEqual(len(downloads_json['downloads']), 1)
+            self.should_check_equality = False
+            return self.do_request('downloads?fields=name&changed_since=%s' % downloads_json['token'],
+                                   expected_code=200).addCallback(verify_unchanged)
+
+        video_tdef, self.torrent_path = self.create_local_torrent(os.path.join(TESTS_DATA_DIR, 'video.avi'))
+        self.session.start_download_from_tdef(video_tdef, DownloadStartupConfig())
+
+        self.should_check_equality = False
+        return self.do_request('downloads?fields=name&changed_since=', expected_code=200)\
+            .addCallback(verify_downloads)
+
+
+class TestDownloadsEndpointDelta(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TestDownloadsEndpointDelta, self).setUp(annotate=annotate)
+        self.endpoint = DownloadsEndpoint(None)
+        self.fields = frozenset(["infohash"])
+
+    def test_removed(self):
+        """
+        Testing whether a delta contains the downloads that were removed since the token
+        """
+        token = self.endpoint.get_delta([{"infohash": "a"}, {"infohash": "b"}], self.fields, "")["token"]
+        delta = self.endpoint.get_delta([{"infohash": "a"}], self.fields, token)
+        self.assertEqual(delta["downloads"], [])
+        self.assertEqual(delta["removed"], ["b"])
+        self.assertFalse(delta["full"])
+
+    def test_forget_old_removals(self):
+        """
+        Testing whether only the most recent removals are remembered, and older tokens get all downloads
+        """
+        downloads_json = [{"infohash": "%d" % i} for i in xrange(MAX_DELTA_REMOVED + 2)]
+        old_token = self.endpoint.get_delta(downloads_json, self.fields, "")["token"]
+        for i in xrange(1, len(downloads_json)):
+            token = self.endpoint.get_delta(downloads_json[i:], self.fields, "")["token"]
+
+        states = self.endpoint.delta_states[self.fields]
+        self.assertEqual(len([state for state in states.itervalues() if state[1] is None]), MAX_DELTA_REMOVED)
+
+        delta = self.endpoint.get_delta(downloads_json[-1:], self.fields, old_token)
+        self.assertTrue(delta["full"])
+        self.assertEqual(delta["downloads"], downloads_json[-1:])
+        self.assertEqual(delta["removed"], [])
+
+        delta = self.endpoint.get_delta(downloads_json[-1:], self.fields, token)
+        self.assertFalse(delta["full"])
+        self.assertEqual(delta["downloads"], [])
+
+    def test_clear_states(self):
+        """
+        Testing whether the tokens handed out before the states are cleared get all downloads
+        """
+        token = self.endpoint.get_delta([{"infohash": "a"}, {"infohash": "b"}], self.fields, "")["token"]
+        for i in xrange(MAX_DELTA_STATES):
+            self.endpoint.get_delta([{"infohash": "a"}], frozenset(["infohash", "%d" % i]), "")
+
+        delta = self.endpoint.get_delta([{"infohash": "a"}], self.fields, token)
+        self.assertTrue(delta["full"])
+        self.assertEqual(delta["downloads"], [{"infohash": "a"}])
@@ -2,6 +2,7 @@ import json
 from twisted.internet import reactor
 from twisted.internet.defer import Deferred
 from twisted.internet.protocol import Protocol
+from twisted.internet.threads import blockingCallFromThread
 from twisted.web.client import Agent
 from twisted.web.http_headers import Headers
 from Tribler.Core.Modules.restapi import events_endpoint
@@ -9,6 +10,7 @@ from Tribler.Core.Utilities.twisted_thread import deferred
 from Tribler.Core.simpledefs import SIGNAL_CHANNEL, SIGNAL_ON_SEARCH_RESULTS, SIGNAL_TORRENT
 from Tribler.Core.version import version_id
 from Tribler.Test.Core.Modules.RestApi.base_api_test import AbstractApiTest
+from Tribler.Test.Core.base_test import MockObject
 
 
 class EventDataProtocol(Protocol):
@@ -16,17 +18,22 @@ class EventDataProtocol(Protocol):
     This class is responsible for reading the data received over the event socket.
     """
     def __init__(self, messages_to_wait_for, finished, response):
+        self.data_buffer = ''
         self.json_buffer = []
         self.messages_to_wait_for = messages_to_wait_for + 1  # The first event message is always events_start
         self.finished = finished
         self.response = response
 
     def dataReceived(self, data):
-        self.json_buffer.append(json.loads(data))
-        self.messages_to_wait_for -= 1
-        if self.messages_to_wait_for == 0:
-            self.finished.callback(self.json_buffer[1:])
-            self.response.connectionLost(self)
+        # Each event is terminated by a newline, a single chunk of data might contain multiple events
+        self.data_buffer += data
+        while '\n' in self.data_buffer and self.messages_to_wait_for > 0:
+            line, self.data_buffer = self.data_buffer.split('\n', 1)
+            self.json_buffer.append(json.loads(line))
+            self.messages_to_wait_for -= 1
+            if self.messages_to_wait_for == 0:
+                self.finished.callback(self.json_buffer[1:])
+                self.response.connectionLost(self)
 
 
 class TestEventsEndpoint(AbstractApiTest):
@@ -86,3 +93,46 @@ class TestEventsEndpoint(AbstractApiTest):
         self.messages_to_wait_for = 2
         self.open_events_socket().addCallback(create_search_results)
         return self.events_deferred.addCallback(verify_search_results)
+
+    @deferred(timeout=10)
+    def test_search_results_batch(self):
+        """
+        Testing whether the event endpoint returns all search results of a single notification, without duplicates
+        """
+        def verify_search_results(results):
+            self.assertEqual([result[u'type'] for result in results], [u'search_result_torrent'] * 2)
+            self.assertNotEqual(results[0][u'event'][u'result'][u'infohash'],
+                                results[1][u'event'][u'result'][u'infohash'])
+
+        def create_search_results(_):
+            results_dict = {"keywords": ["test"], "result_list": [('a',) * 9, ('b',) * 9, ('a',) * 9]}
+            self.session.notifier.use_pool = False
+            self.session.notifier.notify(SIGNAL_TORRENT, SIGNAL_ON_SEARCH_RESULTS, None, results_dict)
+
+        self.session.lm.api_manager.root_endpoint.events_endpoint.start_new_query()
+        self.messages_to_wait_for = 2
+        self.open_events_socket().addCallback(create_search_results)
+        return self.events_deferred.addCallback(verify_search_results)
+
+    def test_events_paused(self):
+        """
+        Testing whether events are buffered while the events connection is paused and written once it is resumed
+        """
+        written = []
+        request = MockObject()
+        request.write = written.append
+        endpoint = self.session.lm.api_manager.root_endpoint.events_endpoint
+
+        def write_paused_events():
+            endpoint.events_request = request
+            endpoint.pauseProducing()
+            endpoint.write_data("a\n")
+            endpoint.write_data("b\n")
+            self.assertEqual(written, [])
+
+            endpoint.resumeProducing()
+            self.assertEqual(written, ["a\nb\n"])
+            endpoint.stopProducing()
+            self.assertIsNone(endpoint.events_request)
+
+        blockingCallFromThread(reactor, write_paused_events)
@@ -0,0 +1,18 @@
+from Tribler.Core.Utilities.twisted_thread import deferred
+from Tribler.Test.Core.Modules.RestApi.base_api_test import AbstractApiTest
+
+
+class TestMetricsEndpoint(AbstractApiTest):
+
+    @deferred(timeout=10)
+    def test_get_metrics(self):
+        """
+        Testing whether the API returns the metrics in the Prometheus text format
+        """
+        def verify_metrics(body):
+            lines = body.split("\n")
+            self.assertIn("# TYPE tribler_db_query_seconds histogram", lines)
+            self.assertIn("# TYPE tribler_reactor_lag_seconds histogram", lines)
+
+        self.should_check_equality = False
+        return self.do_request('metrics', expected_code=200).addCallback(verify_metrics)
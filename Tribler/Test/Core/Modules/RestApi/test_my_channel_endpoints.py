@@ -237,6 +237,40 @@ class TestMyChannelEndpoints(AbstractTestMyChannelEndpoints):
         self.session.lm.channel_manager = ChannelManager(self.session)
         return self.do_request('mychannel/rssfeeds', expected_code=404)
 
+    @deferred(timeout=10)
+    def test_my_channel_endpoint_create_channel_manager_not_started(self):
+        """
+        Testing whether the API returns a 503 if a channel is created before the ChannelManager has been started
+        """
+        def verify_error_message(body):
+            error_response = json.loads(body)
+            self.assertEqual(error_response[u"error"][u"code"], u"OperationNotPossibleAtRuntimeException")
+
+        self.session.lm.channel_manager = None
+        self.should_check_equality = False
+        post_data = {"name": "John Smit's channel"}
+        return self.do_request('mychannel', expected_code=503, expected_json=None, request_type='PUT',
+                               post_data=post_data).addCallback(verify_error_message)
+
+    @deferred(timeout=10)
+    def test_rss_feeds_endpoint_channel_manager_not_started(self):
+        """
+        Testing whether the API returns a 503 if rss feeds are fetched before the ChannelManager has been started
+        """
+        self.session.lm.channel_manager = None
+        self.create_my_channel("my channel", "this is a short description")
+        self.should_check_equality = False
+        return self.do_request('mychannel/rssfeeds', expected_code=503)
+
+    @deferred(timeout=10)
+    def test_recheck_rss_feeds_channel_manager_not_started(self):
+        """
+        Testing whether the API returns a 503 if rss feeds are rechecked before the ChannelManager has been started
+        """
+        self.session.lm.channel_manager = None
+        self.should_check_equality = False
+        return self.do_request('mychannel/recheckfeeds', expected_code=503, request_type='POST')
+
 
 class TestMyChannelTorrentsEndpoint(AbstractTestMyChannelEndpoints):
 
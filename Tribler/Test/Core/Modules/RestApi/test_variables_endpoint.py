@@ -9,5 +9,6 @@ class TestVariablesEndpoint(AbstractApiTest):
         """
         Testing whether the API returns a correct variables dictionary when the variables are requested
         """
-        expected_json = {"variables": {"ports": self.session.selected_ports}}
+        expected_json = {"variables": {"ports": self.session.selected_ports,
+                                       "startup_timeline": self.session.lm.startup_planner.get_timeline()}}
         return self.do_request('variables', expected_code=200, expected_json=expected_json)
@@ -1,4 +1,5 @@
 import os
+from base64 import encodestring
 
 from Tribler.Core.CacheDB.SqliteCacheDBHandler import TorrentDBHandler
 from Tribler.Core.CacheDB.db_versions import LATEST_DB_VERSION
@@ -40,6 +41,51 @@ class TestDBUpgrader(AbstractUpgrader):
         db_migrator.db._version = LATEST_DB_VERSION + 1
         self.assertRaises(DatabaseUpgradeError, db_migrator.start_migrate)
 
+    def test_upgrade_28_to_29(self):
+        self.copy_and_initialize_upgrade_database('tribler_v17.sdb')
+        db_migrator = DBUpgrader(self.session, self.sqlitedb, torrent_store=MockTorrentStore())
+        db_migrator.start_migrate()
+
+        # Insert some base64 encoded infohashes, as they were stored up to version 28
+        infohashes = ['%020d' % i for i in xrange(5)]
+        self.sqlitedb.executemany(u"INSERT INTO Torrent (infohash) VALUES (?)",
+                                  [(encodestring(infohash).strip(),) for infohash in infohashes])
+        self.sqlitedb.write_version(28)
+
+        db_migrator._upgrade_28_to_29()
+        self.assertEqual(self.sqlitedb.version, 29)
+        self.assertEqual(sorted(str(infohash) for infohash, in self.sqlitedb.execute(
+            u"SELECT infohash FROM Torrent WHERE typeof(infohash) == 'blob'")), infohashes)
+        self.assertIsNone(self.sqlitedb.fetchone(u"SELECT infohash FROM Torrent WHERE typeof(infohash) == 'text'"))
+
+        torrent_db_handler = TorrentDBHandler(self.session)
+        self.assertEqual(torrent_db_handler.getTorrentID(infohashes[3]), 4)
+
+    def test_upgrade_28_to_29_invalid_value(self):
+        """
+        Rows with a value that is not base64 should be kept, as other tables refer to them
+        """
+        self.copy_and_initialize_upgrade_database('tribler_v17.sdb')
+        db_migrator = DBUpgrader(self.session, self.sqlitedb, torrent_store=MockTorrentStore())
+        db_migrator.start_migrate()
+
+        self.sqlitedb.execute(u"INSERT INTO Torrent (infohash) VALUES (?)", (u"invalid!",))
+        torrent_id = self.sqlitedb.fetchone(u"SELECT torrent_id FROM Torrent WHERE infohash == ?", (u"invalid!",))
+        self.sqlitedb.execute(u"INSERT INTO MyPreference (torrent_id, destination_path, creation_time) "
+                              u"VALUES (?, ?, ?)", (torrent_id, u"/tmp", 0))
+        self.sqlitedb.execute(u"INSERT INTO Peer (permid) VALUES (?)", (u"\xe9invalid",))
+        peer_id = self.sqlitedb.fetchone(u"SELECT MAX(peer_id) FROM Peer")
+        self.sqlitedb.write_version(28)
+
+        db_migrator._upgrade_28_to_29()
+        self.assertEqual(self.sqlitedb.version, 29)
+        self.assertEqual(str(self.sqlitedb.fetchone(u"SELECT infohash FROM Torrent WHERE torrent_id == ?",
+                                                    (torrent_id,))), "invalid!")
+        self.assertEqual(self.sqlitedb.fetchone(u"SELECT COUNT(*) FROM MyPreference JOIN Torrent USING (torrent_id) "
+                                                u"WHERE torrent_id == ?", (torrent_id,)), 1)
+        self.assertEqual(self.sqlitedb.fetchone(u"SELECT typeof(permid) FROM Peer WHERE peer_id == ?", (peer_id,)),
+                         u"blob")
+
     def test_reimport_torrents(self):
         self.copy_and_initialize_upgrade_database('tribler_v17.sdb')
         self.torrent_store = LevelDbStore(self.session.get_torrent_store_dir())
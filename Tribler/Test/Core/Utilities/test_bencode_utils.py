@@ -0,0 +1,55 @@
+import os
+from hashlib import sha1
+
+from nose.tools import raises
+
+from Tribler.Core.Utilities.bencode_utils import get_info_span, skip_value
+from Tribler.Test.test_as_server import BaseTestCase, TESTS_DATA_DIR
+
+
+class TestBencodeUtils(BaseTestCase):
+
+    def test_skip_value(self):
+        data = "d3:keyli42e4:spamee3:end"
+        self.assertEqual(skip_value(data, 0), len(data) - 5)
+        self.assertEqual(skip_value(data, 6), 18)
+        self.assertEqual(skip_value(data, 7), 11)
+
+    @raises(ValueError)
+    def test_skip_value_truncated(self):
+        skip_value("d3:keyl4:spam", 0)
+
+    @raises(ValueError)
+    def test_skip_value_invalid(self):
+        skip_value("x", 0)
+
+    def test_info_span(self):
+        data = "d8:announce3:url4:infod4:name4:testee"
+        start, end = get_info_span(data)
+        self.assertEqual(data[start:end], "d4:name4:teste")
+
+    def test_info_span_not_last(self):
+        data = "d4:infod4:name4:teste5:nodeslee"
+        start, end = get_info_span(data)
+        self.assertEqual(data[start:end], "d4:name4:teste")
+
+    def test_info_span_not_canonical(self):
+        data = "d5:nodesle4:infod4:name4:testee"
+        start, end = get_info_span(data)
+        self.assertEqual(data[start:end], "d4:name4:teste")
+
+    def test_info_span_unsorted_tail(self):
+        data = "d4:infod4:name4:teste8:announce4:name5:nodeslee"
+        start, end = get_info_span(data)
+        self.assertEqual(data[start:end], "d4:name4:teste")
+
+    def test_no_info(self):
+        self.assertIsNone(get_info_span("d8:announce3:urle"))
+        self.assertIsNone(get_info_span("d4:info4:teste"))
+
+    def test_infohash_of_torrent_files(self):
+        for infohash in ["41aea20908363a80d44234e8fef07fab506cd3b4", "45a647b1120ed9fe7f793e17585efb4b0efdf1a5"]:
+            with open(os.path.join(TESTS_DATA_DIR, "%s.torrent" % infohash), 'rb') as torrent_file:
+                data = torrent_file.read()
+            start, end = get_info_span(data)
+            self.assertEqual(sha1(data[start:end]).hexdigest(), infohash)
@@ -1,5 +1,9 @@
 from threading import Event, Thread
-from Tribler.Core.Utilities.instrumentation import synchronized, WatchDog
+
+from twisted.internet.task import Clock, LoopingCall
+
+from Tribler.Core.Utilities.instrumentation import (synchronized, WatchDog, ReactorMonitor, SlowCallTracer,
+                                                    get_callable_name)
 from Tribler.Test.Core.base_test import TriblerCoreTest
 
 
@@ -120,3 +124,50 @@ class TriblerCoreTestWatchDog(TriblerCoreTest):
         self.watchdog.start()
         # The even gets set when a thread has the same stack for more than 0 seconds.
         self.assertTrue(self._printe_event.wait(1))
+
+
+class TriblerCoreTestReactorMonitor(TriblerCoreTest):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.monitor = ReactorMonitor(reactor=self.clock, interval=1.0, slow_call_threshold=0.5)
+
+    def tearDown(self):
+        self.monitor.stop()
+
+    def test_callable_name(self):
+        self.assertEqual(get_callable_name(self.test_callable_name),
+                         u"%s.TriblerCoreTestReactorMonitor.test_callable_name" % __name__)
+        self.assertEqual(get_callable_name(LoopingCall(get_callable_name)),
+                         u"Tribler.Core.Utilities.instrumentation.get_callable_name")
+
+    def test_lag(self):
+        self.monitor.start()
+        self.clock.advance(1.0)
+        self.clock.advance(3.0)
+        self.assertEqual(self.monitor.lag_histogram.count, 2)
+        self.assertEqual(self.monitor.lag_histogram.max, 2.0)
+
+    def test_trace_call_later(self):
+        def slow_call():
+            self.clock.advance(0.75)
+
+        self.monitor.start()
+        self.clock.callLater(0.1, slow_call)
+        self.clock.callLater(0.2, lambda: None)
+        self.clock.advance(0.2)
+
+        slow_calls = self.monitor.get_stats()[u"slow_calls"]
+        self.assertEqual(len(slow_calls), 1)
+        self.assertTrue(slow_calls[0][u"name"].endswith(u"slow_call"))
+
+        self.monitor.stop()
+        self.assertNotIn("callLater", vars(self.clock))
+
+    def test_record_sql(self):
+        tracer = SlowCallTracer(threshold=0.5)
+        tracer.record_sql(u"SELECT *\n  FROM Torrent", 0.1)
+        tracer.record_sql(u"SELECT *\n  FROM Torrent", 1.0)
+        tracer.record_sql(u"SELECT *\n  FROM Torrent", 2.0)
+        self.assertEqual(tracer.get_slow_calls(), [{u"name": u"sqlite: SELECT * FROM Torrent", u"count": 2,
+                                                    u"total_time": 3.0, u"max_time": 2.0}])
@@ -1,3 +1,8 @@
+from twisted.internet.defer import Deferred
+
+from Tribler.Core.APIImplementation.LaunchManyCore import TriblerLaunchMany
+from Tribler.Core.Utilities.twisted_thread import deferred
+from Tribler.Test.Core.base_test import MockObject, TriblerCoreTest
 from Tribler.Test.test_as_server import TestAsServer
 from Tribler.community.allchannel.community import AllChannelCommunity
 from Tribler.community.bartercast4.community import BarterCommunity
@@ -7,6 +12,43 @@ from Tribler.community.tunnel.hidden_community import HiddenTunnelCommunity
 from Tribler.dispersy.discovery.community import DiscoveryCommunity
 
 
+class TestLaunchManyCore(TriblerCoreTest):
+    """
+    This class contains tests that test methods in LaunchManyCore without starting a session.
+    """
+
+    def setUp(self, annotate=True):
+        super(TestLaunchManyCore, self).setUp(annotate=annotate)
+        self.lm = TriblerLaunchMany()
+        self.lm.session = MockObject()
+        self.lm.session.get_megacache = lambda: False
+
+    def tearDown(self, annotate=True):
+        self.lm.threadpool.stop()
+        super(TestLaunchManyCore, self).tearDown(annotate=annotate)
+
+    @deferred(timeout=5)
+    def test_early_shutdown_waits_for_background_startup(self):
+        """
+        Testing whether early_shutdown also shuts down the components started by a running background stage
+        """
+        stopped = []
+        self.lm.background_startup_done = Deferred()
+        shutdown_deferred = self.lm.early_shutdown()
+        self.assertFalse(shutdown_deferred.called)
+
+        # the running background stage starts a component
+        self.lm.watch_folder = MockObject()
+        self.lm.watch_folder.stop = lambda: stopped.append(True)
+        self.lm.background_startup_done.callback(None)
+
+        def verify(_):
+            self.assertEqual(stopped, [True])
+            self.assertIsNone(self.lm.watch_folder)
+
+        return shutdown_deferred.addCallback(verify)
+
+
 class TestLaunchManyCoreFullSession(TestAsServer):
     """
     This class contains tests that tests methods in LaunchManyCore when a full session is started.
@@ -33,6 +75,7 @@ class TestLaunchManyCoreFullSession(TestAsServer):
         """
         Testing whether all Dispersy communities can be succesfully loaded
         """
+        self.assertTrue(self.session.lm.dispersy)
         self.assertTrue(self.get_community(DiscoveryCommunity))
         self.assertTrue(self.session.lm.initComplete)
         self.assertTrue(self.get_community(BarterCommunity))
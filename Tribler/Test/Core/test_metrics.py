@@ -0,0 +1,95 @@
+from Tribler.Core.Utilities.metrics import Histogram, MetricsRegistry
+from Tribler.Test.Core.base_test import TriblerCoreTest
+
+
+class TriblerCoreTestMetrics(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TriblerCoreTestMetrics, self).setUp(annotate=annotate)
+        self.registry = MetricsRegistry()
+
+    def test_histogram(self):
+        histogram = Histogram([1, 2, 3])
+        for value in [0.5, 0.7, 1.5, 10]:
+            histogram.add(value)
+        self.assertEqual(histogram.counts, [2, 1, 0, 1])
+        self.assertEqual(histogram.max, 10)
+        self.assertEqual(histogram.get_percentile(50), 1)
+        self.assertEqual(histogram.get_percentile(100), 10)
+        self.assertEqual(histogram.to_dict()[u"buckets"][-1], [u"inf", 1])
+
+    def test_counter(self):
+        counter = self.registry.counter(u"test_total", u"A test counter", [u"type"])
+        counter.inc(type=u"a")
+        counter.inc(2, type=u"a")
+        self.assertEqual(counter.get_value(type=u"a"), 3)
+        self.assertIs(self.registry.counter(u"test_total", u"A test counter", [u"type"]), counter)
+        self.assertRaises(ValueError, counter.inc)
+        self.assertRaises(ValueError, self.registry.gauge, u"test_total", u"A test gauge")
+
+    def test_export(self):
+        self.registry.counter(u"test_total", u"A test counter", [u"type"]).inc(type=u"a\"b")
+        self.registry.gauge(u"test_gauge", u"A test gauge").set_function(lambda: 42)
+        self.registry.histogram(u"test_seconds", u"A test histogram", buckets=[0.1, 1]).observe(0.5)
+
+        self.assertEqual(self.registry.export().split(u"\n"), [
+            u"# HELP test_gauge A test gauge",
+            u"# TYPE test_gauge gauge",
+            u"test_gauge 42",
+            u"# HELP test_seconds A test histogram",
+            u"# TYPE test_seconds histogram",
+            u"test_seconds_bucket{le=\"0.1\"} 0",
+            u"test_seconds_bucket{le=\"1\"} 1",
+            u"test_seconds_bucket{le=\"+Inf\"} 1",
+            u"test_seconds_sum 0.5",
+            u"test_seconds_count 1",
+            u"# HELP test_total A test counter",
+            u"# TYPE test_total counter",
+            u"test_total{type=\"a\\\"b\"} 1",
+            u""])
+
+    def test_timed(self):
+        histogram = self.registry.histogram(u"test_seconds", u"A test histogram", [u"operation"])
+
+        @histogram.timed(operation=u"test")
+        def operation():
+            return 42
+
+        self.assertEqual(operation(), 42)
+        self.assertEqual(histogram.labels(operation=u"test").count, 1)
+
+    def test_observe_without_registry_lock(self):
+        class UnusableLock(object):
+
+            def __enter__(self):
+                raise AssertionError(u"the registry lock should not be taken")
+
+            def __exit__(self, *_):
+                pass
+
+        histogram = self.registry.histogram(u"test_seconds", u"A test histogram", [u"operation"])
+
+        @histogram.timed(operation=u"test")
+        def operation():
+            return 42
+
+        histogram.observe(0.5, operation=u"test")
+        histogram._lock = UnusableLock()
+        histogram.observe(0.5, operation=u"test")
+        operation()
+        self.assertEqual(histogram.labels(operation=u"test").count, 3)
+
+    def test_collectors(self):
+        def collector(registry):
+            registry.gauge(u"test_gauge", u"A test gauge").set(1)
+
+        def failing_collector(_):
+            raise RuntimeError()
+
+        self.registry.register_collector(failing_collector)
+        self.registry.register_collector(collector)
+        self.assertIn(u"test_gauge 1", self.registry.export())
+
+        self.registry.unregister_collector(collector)
+        self.registry.get_metric(u"test_gauge").clear()
+        self.assertNotIn(u"test_gauge 1", self.registry.export())
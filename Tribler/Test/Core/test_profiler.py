@@ -0,0 +1,92 @@
+import os
+import threading
+from threading import Event, Thread
+
+from Tribler.Core.Utilities.profiler import (FORMAT_CALLGRIND, FORMAT_COLLAPSED, MAX_STACK_DEPTH, THREAD_POOL,
+                                             THREAD_REACTOR, SamplingProfiler, get_profile_filename,
+                                             get_thread_category)
+from Tribler.Test.Core.base_test import TriblerCoreTest
+
+
+class TriblerCoreTestProfiler(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TriblerCoreTestProfiler, self).setUp(annotate=annotate)
+        self.profiler = SamplingProfiler()
+        self.started_event = Event()
+        self.stop_event = Event()
+        self.thread = Thread(target=self.wait_for_stop, name=u"PoolThread-test-1")
+        self.thread.start()
+        self.started_event.wait()
+
+    def tearDown(self, annotate=True):
+        self.profiler.stop()
+        self.stop_event.set()
+        self.thread.join()
+        super(TriblerCoreTestProfiler, self).tearDown(annotate=annotate)
+
+    def wait_for_stop(self):
+        self.started_event.set()
+        self.stop_event.wait()
+
+    def test_thread_category(self):
+        self.assertEqual(get_thread_category(self.thread.ident, self.thread.name), THREAD_POOL)
+        self.assertNotEqual(get_thread_category(threading.current_thread().ident, u"MainThread"), THREAD_POOL)
+
+    def test_invalid_parameters(self):
+        self.assertRaises(ValueError, SamplingProfiler, 0)
+        self.assertRaises(ValueError, SamplingProfiler, threads=[u"libtorrent"])
+
+    def test_collapsed(self):
+        self.profiler.take_sample()
+        self.profiler.take_sample()
+
+        lines = self.profiler.get_collapsed().splitlines()
+        thread_lines = [line for line in lines if line.startswith(u"PoolThread-test-1;")]
+        self.assertEqual(len(thread_lines), 1)
+        self.assertIn(u";wait_for_stop (", thread_lines[0])
+        self.assertTrue(thread_lines[0].endswith(u" 2"))
+        self.assertEqual(self.profiler.num_samples, 2)
+
+    def test_thread_filter(self):
+        self.profiler = SamplingProfiler(threads=[THREAD_REACTOR])
+        self.profiler.take_sample()
+        self.assertNotIn(u"PoolThread-test-1", self.profiler.get_collapsed())
+
+    def test_max_stack_depth(self):
+        def recurse(depth):
+            if depth:
+                return recurse(depth - 1)
+            self.profiler.take_sample()
+
+        recurse(MAX_STACK_DEPTH * 2)
+        self.assertTrue(all(len(stack) == MAX_STACK_DEPTH for _, stack in self.profiler.samples
+                            if stack and stack[-1][2] == u"take_sample"))
+
+    def test_callgrind(self):
+        self.profiler.take_sample()
+        callgrind = self.profiler.get_callgrind().splitlines()
+        self.assertEqual(callgrind[0], u"events: Samples")
+        self.assertIn(u"cfn=wait_for_stop:%d" % self.wait_for_stop.im_func.func_code.co_firstlineno, callgrind)
+
+    def test_start_stop(self):
+        self.profiler.start()
+        self.assertTrue(self.profiler.running)
+        self.profiler.stop()
+        self.assertFalse(self.profiler.running)
+        self.assertGreaterEqual(self.profiler.get_stats()[u"duration"], 0)
+
+    def test_save(self):
+        self.profiler.start()
+        self.profiler.stop()
+        self.profiler.take_sample()
+
+        filename = get_profile_filename(self.session_base_dir, self.profiler, FORMAT_CALLGRIND)
+        self.profiler.save(filename, FORMAT_CALLGRIND)
+        self.assertTrue(os.path.exists(filename))
+        self.assertRaises(ValueError, self.profiler.save, filename, u"pstat")
+
+        filename = get_profile_filename(self.session_base_dir, self.profiler, FORMAT_COLLAPSED)
+        self.profiler.save(filename, FORMAT_COLLAPSED)
+        with open(filename) as profile_file:
+            self.assertIn("wait_for_stop", profile_file.read())
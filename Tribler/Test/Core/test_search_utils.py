@@ -1,4 +1,4 @@
-from Tribler.Core.Utilities.search_utils import split_into_keywords, filter_keywords
+from Tribler.Core.Utilities.search_utils import split_into_keywords, filter_keywords, get_fts_term_keywords
 from Tribler.Test.Core.base_test import TriblerCoreTest
 
 
@@ -17,3 +17,8 @@ class TriblerCoreTestSearchUtils(TriblerCoreTest):
         result = filter_keywords(["to", "be", "or", "not", "to", "be"])
         self.assertIsInstance(result, list)
         self.assertEqual(len(result), 4)
+
+    def test_get_fts_term_keywords(self):
+        result = get_fts_term_keywords([u"ubuntu", u"16.04", u"foo-bar", u"desktop"])
+        self.assertEqual(result, [u"ubuntu", u"16.04", u"16.04", u"foo-bar", u"foo-bar", u"desktop"])
+        self.assertEqual(get_fts_term_keywords([u"\xe9t\xe9", u"..."]), [u"\xe9t\xe9"])
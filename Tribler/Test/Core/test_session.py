@@ -6,7 +6,8 @@ from twisted.internet.defer import Deferred
 from Tribler.Core.Session import Session
 from Tribler.Core.SessionConfig import SessionStartupConfig
 from Tribler.Core.Utilities.twisted_thread import deferred
-from Tribler.Core.exceptions import OperationNotEnabledByConfigurationException, DuplicateTorrentFileError
+from Tribler.Core.exceptions import OperationNotEnabledByConfigurationException, DuplicateTorrentFileError, \
+    OperationNotPossibleAtRuntimeException
 from Tribler.Core.leveldbstore import LevelDbStore
 from Tribler.Core.simpledefs import NTFY_CHANNELCAST, DLSTATUS_STOPPED, SIGNAL_CHANNEL, SIGNAL_ON_CREATED
 from Tribler.Core.TorrentDef import TorrentDef
@@ -73,6 +74,15 @@ class TestSession(TriblerCoreTest):
         self.assertEqual(session.lm.channel_manager.invoked_desc, "description")
         self.assertEqual(session.lm.channel_manager.invoked_mode, "open")
 
+    @raises(OperationNotPossibleAtRuntimeException)
+    def test_create_channel_not_started(self):
+        """
+        Test whether creating a channel before the ChannelManager has been started raises an error.
+        """
+        config = SessionStartupConfig()
+        session = Session(config, ignore_singleton=True)
+        session.create_channel("name", "description", "open")
+
 
 class TestSessionAsServer(TestAsServer):
 
@@ -148,6 +148,12 @@ class TestSessionConfig(TriblerCoreTest):
         sci.set_http_api_port(1337)
         self.assertEqual(sci.sessconfig.get('http_api', 'port'), 1337)
 
+        sci.set_reactor_monitor_enabled(False)
+        self.assertFalse(sci.get_reactor_monitor_enabled())
+
+        sci.set_reactor_monitor_slow_call_threshold(0.5)
+        self.assertEqual(sci.get_reactor_monitor_slow_call_threshold(), 0.5)
+
         self.assertIsInstance(sci.get_default_config_filename(self.session_base_dir), str)
 
     def test_startup_session_save_load(self):
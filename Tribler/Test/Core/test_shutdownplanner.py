@@ -0,0 +1,80 @@
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred
+from twisted.internet.task import deferLater
+
+from Tribler.Core.APIImplementation.shutdownplanner import ShutdownPlanner
+from Tribler.Core.Utilities.twisted_thread import deferred
+from Tribler.Test.Core.base_test import TriblerCoreTest
+
+
+class TriblerCoreTestShutdownPlanner(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TriblerCoreTestShutdownPlanner, self).setUp(annotate=annotate)
+        self.planner = ShutdownPlanner()
+        self.shutdown_order = []
+
+    def get_shutdown(self, name, delay=0):
+        def shutdown():
+            self.shutdown_order.append(name)
+            if delay:
+                return deferLater(reactor, delay, lambda: None)
+        return shutdown
+
+    @deferred(timeout=5)
+    def test_dependencies(self):
+        self.planner.add_component("a", self.get_shutdown("a", delay=0.2))
+        self.planner.add_component("b", self.get_shutdown("b"))
+        self.planner.add_component("c", self.get_shutdown("c"), after=["a", "b"])
+
+        def verify(_):
+            self.assertEqual(self.shutdown_order, ["a", "b", "c"])
+            self.assertEqual(set(self.planner.timings.keys()), {"a", "b", "c"})
+
+        return self.planner.run().addCallback(verify)
+
+    @deferred(timeout=5)
+    def test_unknown_dependency(self):
+        self.planner.add_component("a", self.get_shutdown("a"), after=["disabled"])
+        return self.planner.run().addCallback(lambda _: self.assertEqual(self.shutdown_order, ["a"]))
+
+    @deferred(timeout=5)
+    def test_dependency_added_later(self):
+        self.planner.add_component("c", self.get_shutdown("c"), after=["b"])
+        self.planner.add_component("a", self.get_shutdown("a"))
+        self.planner.add_component("b", self.get_shutdown("b", delay=0.2), after=["a"])
+
+        def verify(_):
+            self.assertEqual(self.shutdown_order, ["a", "b", "c"])
+
+        return self.planner.run().addCallback(verify)
+
+    def test_dependency_cycle(self):
+        self.planner.add_component("a", self.get_shutdown("a"), after=["b"])
+        self.planner.add_component("b", self.get_shutdown("b"), after=["a"])
+        self.assertRaises(ValueError, self.planner.run)
+        self.assertEqual(self.shutdown_order, [])
+
+    @deferred(timeout=5)
+    def test_failing_component(self):
+        def fail():
+            raise RuntimeError("shutdown failed")
+
+        self.planner.add_component("a", fail)
+        self.planner.add_component("b", self.get_shutdown("b"), after=["a"])
+        return self.planner.run().addCallback(lambda _: self.assertEqual(self.shutdown_order, ["b"]))
+
+    @deferred(timeout=5)
+    def test_deadline(self):
+        self.planner.add_component("a", Deferred)
+        self.planner.add_component("b", self.get_shutdown("b"))
+
+        def verify(_):
+            self.assertEqual(self.shutdown_order, ["b"])
+            self.assertNotIn("a", self.planner.timings)
+
+        return self.planner.run(deadline=0.1).addCallback(verify)
+
+    def test_add_twice(self):
+        self.planner.add_component("a", self.get_shutdown("a"))
+        self.assertRaises(AssertionError, self.planner.add_component, "a", self.get_shutdown("a"))
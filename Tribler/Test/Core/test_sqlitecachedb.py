@@ -8,6 +8,7 @@ from nose.tools import raises
 import sys
 
 from Tribler.Test.Core.base_test import TriblerCoreTest
+from Tribler.Core.CacheDB.db_versions import LATEST_DB_VERSION
 from Tribler.Core.CacheDB.sqlitecachedb import SQLiteCacheDB, DB_SCRIPT_NAME, CorruptedDatabaseError
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
 
@@ -77,6 +78,12 @@ class TestSqliteCacheDB(TriblerCoreTest):
         sqlite_test_2.write_version(4)
         self.assertEqual(sqlite_test_2.version, 4)
 
+    @blocking_call_on_reactor_thread
+    def test_open_db_script_file_latest_version(self):
+        sqlite_test_2 = SQLiteCacheDB(os.path.join(self.session_base_dir, "test_db.db"), self.tribler_db_script)
+        sqlite_test_2.initialize()
+        self.assertEqual(sqlite_test_2.version, LATEST_DB_VERSION)
+
     @blocking_call_on_reactor_thread
     def test_initial_begin(self):
         self.sqlite_test.initial_begin()
@@ -0,0 +1,178 @@
+"""
+Runs EXPLAIN QUERY PLAN for the statements that the database handlers issue on hot paths (tracker checks, torrent
+collecting, channelcast, search and the lookups done for every incoming torrent or peer), and fails when one of them
+scans a table that grows with the number of torrents, peers or channels without using an index.
+"""
+import re
+from base64 import b64decode
+from binascii import unhexlify
+from time import time
+
+from Tribler.Core.CacheDB.SqliteCacheDBHandler import (ChannelCastDBHandler, MyPreferenceDBHandler, PeerDBHandler,
+                                                       TorrentDBHandler, VoteCastDBHandler)
+from Tribler.Test.Core.test_sqlitecachedbhandler import AbstractDB
+from Tribler.dispersy.util import blocking_call_on_reactor_thread
+
+# The tables (and the views on them) that may hold up to millions of rows
+LARGE_TABLES = {u"Torrent", u"CollectedTorrent", u"TorrentTrackerMapping", u"TorrentFiles", u"FullTextIndex",
+                u"Peer", u"_ChannelTorrents", u"ChannelTorrents", u"_ChannelVotes", u"ChannelVotes",
+                u"_TorrentMarkings", u"TorrentMarkings"}
+
+SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(.*)$")
+ALIAS_KEYWORDS = {u"WHERE", u"ON", u"SET", u"LEFT", u"INNER", u"CROSS", u"NATURAL", u"JOIN", u"ORDER", u"GROUP",
+                  u"LIMIT", u"VALUES", u"USING", u"AND", u"OR", u"NOT", u"MATCH", u"UNION", u"INDEXED", u"HAVING",
+                  u"OUTER", u"SELECT", u"FROM", u"WHEN", u"DEFAULT"}
+
+INFOHASH = unhexlify("3b7b4a8f1be46c1a3bbe7cc4f4fa1ef0b04dbeea")
+PERMID = b64decode("MFIwEAYHKoZIzj0CAQYFK4EEABoDPgAEAAA6SYI4NHxwQ8P7P8QXgWAP+v8SaMVzF5+fSUHdAMrs6NvL5Epe1nCNSdlBHIjNj"
+                   "EiC5iiwSFZhRLsr")
+
+
+class QueryRecorder(object):
+    """
+    Records the statements executed on a SQLiteCacheDB, together with their arguments.
+    """
+
+    def __init__(self, sqlitedb):
+        self.sqlitedb = sqlitedb
+        self.statements = []
+        self._execute = sqlitedb.execute
+        self._executemany = sqlitedb.executemany
+        sqlitedb.execute = self.execute
+        sqlitedb.executemany = self.executemany
+
+    def execute(self, sql, args=None):
+        self.statements.append((sql, args))
+        return self._execute(sql, args)
+
+    def executemany(self, sql, args=None):
+        args = list(args) if args is not None else None
+        self.statements.append((sql, args[0] if args else None))
+        return self._executemany(sql, args)
+
+    def stop(self):
+        self.sqlitedb.execute = self._execute
+        self.sqlitedb.executemany = self._executemany
+
+    def get_aliases(self, sql):
+        """
+        Returns the tables by their alias in a statement, as newer versions of SQLite report scans by alias.
+        """
+        names = [name for name, in self._execute(u"SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")]
+        aliases = {}
+        for name in names:
+            for alias in re.findall(r"\b%s\s+(?:AS\s+)?(\w+)" % name, sql, re.IGNORECASE):
+                if alias.upper() not in ALIAS_KEYWORDS:
+                    aliases[alias] = name
+        return aliases
+
+    def get_full_scans(self, sql, args):
+        """
+        Returns the plan details of the full scans of large tables done by a statement. Scans that walk an index
+        (to satisfy an ORDER BY ... LIMIT or a partial index) and full text queries are not counted.
+        """
+        aliases = self.get_aliases(sql)
+        full_scans = []
+        for row in self._execute(u"EXPLAIN QUERY PLAN " + sql, args):
+            detail = row[-1]
+            match = SCAN_RE.match(detail)
+            if not match:
+                continue
+            table, rest = aliases.get(match.group(1), match.group(1)), match.group(3)
+            if table not in LARGE_TABLES:
+                continue
+            if u"VIRTUAL TABLE INDEX" in rest and u"INDEX 0:" not in rest:
+                continue
+            if u"USING INDEX" in rest or u"USING COVERING INDEX" in rest:
+                continue
+            full_scans.append(detail)
+        return full_scans
+
+
+class TestQueryPlans(AbstractDB):
+
+    def setUpPreSession(self):
+        super(TestQueryPlans, self).setUpPreSession()
+        self.config.set_megacache(True)
+
+    def setUp(self):
+        super(TestQueryPlans, self).setUp()
+
+        self.tdb = TorrentDBHandler(self.session)
+        self.cdb = ChannelCastDBHandler(self.session)
+        self.vdb = VoteCastDBHandler(self.session)
+        self.pdb = PeerDBHandler(self.session)
+        self.mdb = MyPreferenceDBHandler(self.session)
+        self.tdb.channelcast_db = self.cdb
+        self.tdb.votecast_db = self.vdb
+        self.tdb.mypref_db = self.mdb
+        self.cdb.torrent_db = self.tdb
+        self.cdb.votecast_db = self.vdb
+        self.mdb._torrent_db = self.tdb
+
+        self.recorder = QueryRecorder(self.sqlitedb)
+
+    def tearDown(self):
+        self.recorder.stop()
+        super(TestQueryPlans, self).tearDown()
+
+    def assertNoFullScans(self, func, *args, **kwargs):
+        """
+        Calls func and checks the query plans of all statements it executed.
+        """
+        self.recorder.statements = []
+        func(*args, **kwargs)
+        self.assertTrue(self.recorder.statements, u"%s did not execute any statement" % func.__name__)
+
+        for sql, sql_args in self.recorder.statements:
+            if not sql.strip().upper().startswith((u"SELECT", u"INSERT", u"UPDATE", u"DELETE", u"REPLACE")):
+                continue
+            full_scans = self.recorder.get_full_scans(sql, sql_args)
+            self.assertFalse(full_scans, u"%s scans a large table: %s\n%s" % (func.__name__, full_scans, sql))
+
+    @blocking_call_on_reactor_thread
+    def test_tracker_checks(self):
+        tracker = self.tdb.getTrackerInfoList()[0][0]
+        self.assertNoFullScans(self.tdb.getTorrentsOnTracker, tracker, int(time()))
+        self.assertNoFullScans(self.tdb.getTrackerListByTorrentID, 1)
+        self.assertNoFullScans(self.tdb.getTorrentCheckRetries, 1)
+        self.assertNoFullScans(self.tdb.updateTorrentCheckResult, 1, INFOHASH, 10, 20, int(time()), int(time()) + 60,
+                               u"good", 0)
+        self.assertNoFullScans(self.tdb.addTorrentTrackerMappingInBatch, 1, [tracker])
+
+    @blocking_call_on_reactor_thread
+    def test_torrent_lookups(self):
+        self.assertNoFullScans(self.tdb.getTorrentID, INFOHASH)
+        self.assertNoFullScans(self.tdb.getTorrentIDS, [INFOHASH])
+        self.assertNoFullScans(self.tdb.hasTorrent, INFOHASH)
+        self.assertNoFullScans(self.tdb.addOrGetTorrentID, INFOHASH)
+        self.assertNoFullScans(self.tdb.getTorrent, INFOHASH)
+        self.assertNoFullScans(self.tdb.getInfohash, 1)
+
+    @blocking_call_on_reactor_thread
+    def test_torrent_collecting(self):
+        self.assertNoFullScans(self.tdb.getNumberCollectedTorrents)
+        self.assertNoFullScans(self.tdb.getRecentlyCollectedTorrents, 50)
+        self.assertNoFullScans(self.tdb.getRandomlyCollectedTorrents, int(time()), 50)
+        self.assertNoFullScans(self.tdb.select_torrents_to_collect, [INFOHASH])
+        self.assertNoFullScans(self.tdb.freeSpace, 0)
+
+    @blocking_call_on_reactor_thread
+    def test_search(self):
+        keys = ['T.torrent_id', 'infohash', 'T.name', 'length', 'category', 'num_seeders', 'num_leechers']
+        self.assertNoFullScans(self.tdb.searchNames, ['content'], keys=keys, doSort=False)
+
+    @blocking_call_on_reactor_thread
+    def test_channelcast(self):
+        keys = ['ChannelTorrents.channel_id', 'Torrent.torrent_id', 'infohash', 'Torrent.name']
+        self.assertNoFullScans(self.cdb.getRecentAndRandomTorrents)
+        self.assertNoFullScans(self.cdb.hasTorrents, 1, [INFOHASH])
+        self.assertNoFullScans(self.cdb.getTorrentsFromChannelId, 1, True, keys, limit=20)
+        self.assertNoFullScans(self.cdb.getTorrentFromChannelId, 1, INFOHASH, keys)
+        self.assertNoFullScans(self.vdb.getPosNegVotes, 1)
+
+    @blocking_call_on_reactor_thread
+    def test_peer_lookups(self):
+        self.assertNoFullScans(self.pdb.addOrGetPeerID, PERMID)
+        self.assertNoFullScans(self.pdb.getPeerID, PERMID)
+        self.assertNoFullScans(self.pdb.getPeer, PERMID)
@@ -4,7 +4,7 @@ import tarfile
 
 from Tribler.Core.CacheDB.SqliteCacheDBHandler import (BasicDBHandler,
                                                        PeerDBHandler, LimitedOrderedDict)
-from Tribler.Core.CacheDB.sqlitecachedb import str2bin, SQLiteCacheDB, DB_SCRIPT_RELATIVE_PATH
+from Tribler.Core.CacheDB.sqlitecachedb import SQLiteCacheDB, DB_SCRIPT_RELATIVE_PATH
 from Tribler.Core.Session import Session
 from Tribler.Core.SessionConfig import SessionStartupConfig
 from Tribler.Test.Core.base_test import TriblerCoreTest
@@ -1,5 +1,9 @@
 from binascii import unhexlify
-from Tribler.Core.CacheDB.SqliteCacheDBHandler import ChannelCastDBHandler, TorrentDBHandler, VoteCastDBHandler
+from Tribler.Category.Category import Category
+from Tribler.Core.CacheDB.SqliteCacheDBHandler import (ChannelCastDBHandler, ChannelTorrentPool, TorrentDBHandler,
+                                                       VoteCastDBHandler)
+from Tribler.Core.simpledefs import SIGNAL_ON_TORRENT_UPDATED
+from Tribler.Test.Core.base_test import MockObject
 from Tribler.Test.Core.test_sqlitecachedbhandler import AbstractDB
 
 
@@ -75,6 +79,53 @@ class TestChannelDBHandler(AbstractDB):
         res = self.cdb.getMySubscribedChannels()
         self.assertEqual(len(res), 0)
 
+    def test_on_torrents_from_dispersy(self):
+        notifications = []
+        self.cdb.notifier = MockObject()
+        self.cdb.notifier.notify = lambda *args: notifications.append(args)
+        self.tdb.category = Category.getInstance()
+
+        infohashes = ['a' * 20, 'b' * 20]
+        self.cdb.on_torrents_from_dispersy([(1, 123450 + i, None, infohash, 1457809687, u"Torrent", [(u"file", 42)], [])
+                                            for i, infohash in enumerate(infohashes)])
+        self.assertEqual(self.cdb.hasTorrents(1, infohashes + ['c' * 20]), [True, True, False])
+        self.assertEqual(self.cdb.hasTorrents(2, infohashes), [False, False])
+
+        updated = [args[3] for args in notifications if args[1] == SIGNAL_ON_TORRENT_UPDATED]
+        self.assertEqual([item[u'channel_torrent_id'] for item in updated[0]],
+                         [self.cdb.get_channel_torrent_id(1, infohash) for infohash in infohashes])
+
+    def test_get_recent_and_random_torrents(self):
+        self.cdb.notifier = MockObject()
+        self.cdb.notifier.notify = lambda *_: None
+        self.tdb.category = Category.getInstance()
+
+        torrents = self.cdb.getRecentAndRandomTorrents()
+        self.assertEqual(len(torrents["1"]), 2)
+        self.assertEqual(self.cdb.get_channelcast_pool_stats()[u"refreshes"], 3)
+
+        self.cdb.on_torrents_from_dispersy([(1, 123450, None, 'a' * 20, 1457809687, u"Torrent", [(u"file", 42)], [])])
+        torrents = self.cdb.getRecentAndRandomTorrents()
+        self.assertIn('a' * 20, torrents["1"])
+        self.assertEqual(len(torrents["1"]), 3)
+        self.assertEqual(self.cdb.get_channelcast_pool_stats()[u"refreshes"], 3)
+
+        self.cdb.invalidate_channelcast_pool(u"favorite")
+        self.assertEqual(len(self.cdb.getRecentAndRandomTorrents()["1"]), 3)
+        self.assertEqual(self.cdb.get_channelcast_pool_stats()[u"refreshes"], 4)
+
+    def test_channel_torrent_pool(self):
+        pool = ChannelTorrentPool([1], [(1, 100), (2, 300), (3, 200), (4, None)])
+        self.assertEqual(pool.get_recent(2), [2, 3])
+
+        pool.add(1, 5, 400)
+        pool.add(2, 6, 500)
+        self.assertEqual(len(pool), 5)
+        self.assertEqual(pool.get_recent(2), [5, 2])
+        self.assertEqual(sorted(pool.get_random(2, 10)), [1, 3, 4])
+        self.assertEqual(len(pool.get_random(2, 2)), 2)
+        self.assertEqual(pool.get_random(5, 2), [])
+
     def test_get_channels_no_votecast(self):
         self.cdb.votecast_db = None
         self.assertFalse(self.cdb._getChannels("SELECT id FROM channels"))
@@ -1,5 +1,5 @@
+from base64 import b64decode
 from Tribler.Core.CacheDB.SqliteCacheDBHandler import PeerDBHandler
-from Tribler.Core.CacheDB.sqlitecachedb import str2bin
 from Tribler.Test.Core.test_sqlitecachedbhandler import AbstractDB
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
 
@@ -12,9 +12,9 @@ class TestSqlitePeerDBHandler(AbstractDB):
     def setUp(self):
         super(TestSqlitePeerDBHandler, self).setUp()
 
-        self.p1 = str2bin(
+        self.p1 = b64decode(
             'MFIwEAYHKoZIzj0CAQYFK4EEABoDPgAEAAA6SYI4NHxwQ8P7P8QXgWAP+v8SaMVzF5+fSUHdAMrs6NvL5Epe1nCNSdlBHIjNjEiC5iiwSFZhRLsr')
-        self.p2 = str2bin(
+        self.p2 = b64decode(
             'MFIwEAYHKoZIzj0CAQYFK4EEABoDPgAEAABo69alKy95H7RHzvDCsolAurKyrVvtDdT9/DzNAGvky6YejcK4GWQXBkIoQGQgxVEgIn8dwaR9B+3U')
 
         self.pdb = PeerDBHandler(self.session)
@@ -1,5 +1,5 @@
+from base64 import b64decode
 from Tribler.Core.CacheDB.SqliteCacheDBHandler import TorrentDBHandler, MyPreferenceDBHandler
-from Tribler.Core.CacheDB.sqlitecachedb import str2bin
 from Tribler.Test.Core.test_sqlitecachedbhandler import AbstractDB
 from Tribler.dispersy.util import blocking_call_on_reactor_thread
 
@@ -74,9 +74,9 @@ class TestMyPreferenceDBHandler(AbstractDB):
 
     @blocking_call_on_reactor_thread
     def test_my_pref_stats_infohash(self):
-        infohash = str2bin('AB8cTG7ZuPsyblbRE7CyxsrKUCg=')
+        infohash = b64decode('AB8cTG7ZuPsyblbRE7CyxsrKUCg=')
         self.assertIsNone(self.mdb.getMyPrefStatsInfohash(infohash))
-        infohash = str2bin('ByJho7yj9mWY1ORWgCZykLbU1Xc=')
+        infohash = b64decode('ByJho7yj9mWY1ORWgCZykLbU1Xc=')
         self.assertTrue(self.mdb.getMyPrefStatsInfohash(infohash))
 
     @blocking_call_on_reactor_thread
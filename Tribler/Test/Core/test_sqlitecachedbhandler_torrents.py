@@ -1,9 +1,10 @@
+from base64 import b64decode
 from binascii import unhexlify
 import os
 from shutil import copy as copyfile
 from Tribler.Category.Category import Category
 from Tribler.Core.CacheDB.SqliteCacheDBHandler import TorrentDBHandler, MyPreferenceDBHandler, ChannelCastDBHandler
-from Tribler.Core.CacheDB.sqlitecachedb import str2bin
+from Tribler.Core.CacheDB.sqlitecachedb import bin2str
 from Tribler.Core.TorrentDef import TorrentDef
 from Tribler.Core.leveldbstore import LevelDbStore
 from Tribler.Test.Core.test_sqlitecachedbhandler import AbstractDB
@@ -64,12 +65,20 @@ class TestTorrentDBHandler(AbstractDB):
     @blocking_call_on_reactor_thread
     def test_hasTorrent(self):
         infohash_str = 'AA8cTG7ZuPsyblbRE7CyxsrKUCg='
-        infohash = str2bin(infohash_str)
+        infohash = b64decode(infohash_str)
         self.assertTrue(self.tdb.hasTorrent(infohash))
         self.assertTrue(self.tdb.hasTorrent(infohash)) # cache will trigger
         fake_infohash = 'fake_infohash_100000'
         self.assertFalse(self.tdb.hasTorrent(fake_infohash))
 
+    @blocking_call_on_reactor_thread
+    def test_on_search_response_known_torrent(self):
+        infohash = unhexlify('00190c49843dcc051e9589b8f438f493a464b398')
+        num_torrents = self.tdb.size()
+        self.tdb.on_search_response([(infohash, u'Renamed content', 123, 1, [u'other'], 1460000000)])
+        self.assertEqual(self.tdb.size(), num_torrents)
+        self.assertEqual(self.tdb.getOne(u'name', infohash=bin2str(infohash)), u'Renamed content')
+
     @blocking_call_on_reactor_thread
     def test_get_infohash(self):
         self.assertTrue(self.tdb.getInfohash(1))
@@ -171,7 +180,7 @@ class TestTorrentDBHandler(AbstractDB):
 
     @blocking_call_on_reactor_thread
     def test_add_external_torrent_no_def_existing(self):
-        infohash = str2bin('AA8cTG7ZuPsyblbRE7CyxsrKUCg=')
+        infohash = b64decode('AA8cTG7ZuPsyblbRE7CyxsrKUCg=')
         self.tdb.addExternalTorrentNoDef(infohash, "test torrent", [], [], 1234)
         self.assertTrue(self.tdb.hasTorrent(infohash))
 
@@ -204,7 +213,7 @@ class TestTorrentDBHandler(AbstractDB):
 
     @blocking_call_on_reactor_thread
     def test_add_get_torrent_id(self):
-        infohash = str2bin('AA8cTG7ZuPsyblbRE7CyxsrKUCg=')
+        infohash = b64decode('AA8cTG7ZuPsyblbRE7CyxsrKUCg=')
         self.assertEqual(self.tdb.addOrGetTorrentID(infohash), 1)
 
         new_infohash = unhexlify('50865489ac16e2f34ea0cd3043cfd970cc24ec09')
@@ -212,7 +221,7 @@ class TestTorrentDBHandler(AbstractDB):
 
     @blocking_call_on_reactor_thread
     def test_add_get_torrent_ids_return(self):
-        infohash = str2bin('AA8cTG7ZuPsyblbRE7CyxsrKUCg=')
+        infohash = b64decode('AA8cTG7ZuPsyblbRE7CyxsrKUCg=')
         new_infohash = unhexlify('50865489ac16e2f34ea0cd3043cfd970cc24ec09')
         tids, inserted = self.tdb.addOrGetTorrentIDSReturn([infohash, new_infohash])
         self.assertEqual(tids, [1, 4849])
@@ -222,6 +231,21 @@ class TestTorrentDBHandler(AbstractDB):
     def test_index_torrent_existing(self):
         self.tdb._indexTorrent(1, "test", [])
 
+    @blocking_call_on_reactor_thread
+    def test_index_torrent_replace(self):
+        self.tdb._indexTorrent(5000, "test", [])
+        self.tdb._indexTorrent(5000, "replaced", [u"file.txt"])
+        sql = u"SELECT docid, swarmname, filenames, fileextensions FROM FullTextIndex WHERE FullTextIndex MATCH ?"
+        self.assertEqual(self.tdb._db.fetchall(sql, (u"replaced",)), [(5000, u"replaced", u"file", u"txt")])
+        self.assertNotIn(5000, [result[0] for result in self.tdb._db.fetchall(sql, (u"test",))])
+
+    @blocking_call_on_reactor_thread
+    def test_merge_full_text_index(self):
+        for torrent_id in xrange(5000, 5100):
+            self.tdb._indexTorrent(torrent_id, "test %d" % torrent_id, [])
+        self.assertTrue(any(not self.tdb.merge_full_text_index() for _ in xrange(100)))
+        self.assertFalse(self.tdb.merge_full_text_index())
+
     @blocking_call_on_reactor_thread
     def test_getCollectedTorrentHashes(self):
         res = self.tdb.getNumberCollectedTorrents()
@@ -237,6 +261,22 @@ class TestTorrentDBHandler(AbstractDB):
         self.session.lm.torrent_store.close()
         self.assertEqual(res, old_res-20)
 
+    @blocking_call_on_reactor_thread
+    def test_freeSpace_eviction_weight(self):
+        self.session.lm.torrent_store = LevelDbStore(self.session.get_torrent_store_dir())
+        infohash = b64decode('AA8cTG7ZuPsyblbRE7CyxsrKUCg=')
+        torrent_id = self.tdb.getTorrentID(infohash)
+        old_weight = self.tdb._db.fetchone(u"SELECT eviction_weight FROM Torrent WHERE torrent_id = ?", (torrent_id,))
+
+        # The eviction weight follows the number of seeders, making this the first torrent to be removed
+        self.tdb.updateTorrent(infohash, notify=False, num_seeders=-1000)
+        new_weight = self.tdb._db.fetchone(u"SELECT eviction_weight FROM Torrent WHERE torrent_id = ?", (torrent_id,))
+        self.assertLess(new_weight, old_weight)
+
+        self.assertEqual(self.tdb.freeSpace(1), 1)
+        self.session.lm.torrent_store.close()
+        self.assertFalse(self.tdb.getOne('is_collected', torrent_id=torrent_id))
+
     @blocking_call_on_reactor_thread
     def test_get_search_suggestions(self):
         self.assertEqual(self.tdb.getSearchSuggestion(["content", "cont"]), ["Content 1"])
@@ -252,7 +292,7 @@ class TestTorrentDBHandler(AbstractDB):
 
     @blocking_call_on_reactor_thread
     def test_select_torrents_to_collect(self):
-        infohash = str2bin('AA8cTG7ZuPsyblbRE7CyxsrKUCg=')
+        infohash = b64decode('AA8cTG7ZuPsyblbRE7CyxsrKUCg=')
         self.assertEqual(len(self.tdb.select_torrents_to_collect(infohash)), 0)
 
     @blocking_call_on_reactor_thread
@@ -273,6 +313,17 @@ class TestTorrentDBHandler(AbstractDB):
         self.assertEqual(len(self.tdb.searchNames(['content'], keys=columns, doSort=False)), 4848)
         self.assertEqual(len(self.tdb.searchNames(['content', '1'], keys=columns, doSort=False)), 1)
 
+    @blocking_call_on_reactor_thread
+    def test_search_names_matches(self):
+        """
+        Test whether the keywords that matched are reported for every column of the full text index
+        """
+        columns = ['T.torrent_id', 'infohash', 'status', 'num_seeders']
+        self.tdb.channelcast_db = ChannelCastDBHandler(self.session)
+        result = self.tdb.searchNames(['content', '1'], keys=columns, doSort=False)[0]
+        self.assertEqual(result[len(columns) + 1], {'swarmname': {'content', '1'}, 'filenames': set(),
+                                                   'fileextensions': set()})
+
     @blocking_call_on_reactor_thread
     def test_search_names_sort(self):
         """
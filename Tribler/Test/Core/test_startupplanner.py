@@ -0,0 +1,33 @@
+from Tribler.Core.APIImplementation.startupplanner import StartupPlanner
+from Tribler.Test.Core.base_test import TriblerCoreTest
+
+
+class TriblerCoreTestStartupPlanner(TriblerCoreTest):
+
+    def setUp(self, annotate=True):
+        super(TriblerCoreTestStartupPlanner, self).setUp(annotate=annotate)
+        self.planner = StartupPlanner()
+        self.started = []
+
+    def test_run_stages(self):
+        self.planner.run_stages([("a", lambda: self.started.append("a")), ("b", lambda: self.started.append("b"))])
+        self.assertEqual(self.started, ["a", "b"])
+
+        timeline = self.planner.get_timeline()
+        self.assertEqual([stage_info[u"stage"] for stage_info in timeline], ["a", "b"])
+        self.assertTrue(all(stage_info[u"success"] for stage_info in timeline))
+        self.assertLessEqual(timeline[0][u"start"], timeline[1][u"start"])
+
+    def test_failing_stage(self):
+        def fail():
+            raise RuntimeError("stage failed")
+
+        self.planner.run_stages([("a", fail), ("b", lambda: self.started.append("b"))])
+        self.assertEqual(self.started, ["b"])
+        self.assertFalse(self.planner.get_timeline()[0][u"success"])
+
+    def test_cancel(self):
+        self.planner.cancel()
+        self.assertFalse(self.planner.run_stage("a", lambda: self.started.append("a")))
+        self.assertEqual(self.started, [])
+        self.assertEqual(self.planner.get_timeline(), [])
@@ -1,6 +1,11 @@
+from threading import Event, Lock
+from time import sleep
+
 from twisted.internet.defer import Deferred
 
-from Tribler.Core.APIImplementation.threadpoolmanager import ThreadPoolManager
+from Tribler.Core.APIImplementation.threadpoolmanager import (PRIORITY_COLLECTING, PRIORITY_INTERACTIVE,
+                                                              PRIORITY_MAINTENANCE, PriorityThreadPool,
+                                                              ThreadPoolManager)
 from Tribler.Core.Utilities.twisted_thread import deferred
 from Tribler.Test.Core.base_test import TriblerCoreTest
 
@@ -12,6 +17,10 @@ class TriblerCoreTestThreadpoolManager(TriblerCoreTest):
         self.tpm = ThreadPoolManager()
         self.callback_deferred = Deferred()
 
+    def tearDown(self):
+        self.tpm.stop()
+        super(TriblerCoreTestThreadpoolManager, self).tearDown()
+
     def callback_func(self):
         self.callback_deferred.callback(None)
 
@@ -43,3 +52,106 @@ class TriblerCoreTestThreadpoolManager(TriblerCoreTest):
     def test_delayed_call_in_thread(self):
         self.tpm.call_in_thread(0.2, self.callback_func)
         return self.callback_deferred
+
+    def test_cancel_queued_task(self):
+        self.tpm = ThreadPoolManager(pool_size=1)
+        release_event = Event()
+        done_event = Event()
+        called = []
+
+        self.tpm.add_task_in_thread(release_event.wait)
+        self.tpm.add_task_in_thread(lambda: called.append(True), task_name="test")
+        self.tpm.cancel_pending_task("test")
+        self.tpm.add_task_in_thread(done_event.set)
+        release_event.set()
+
+        self.assertTrue(done_event.wait(5))
+        self.assertEqual(called, [])
+
+
+class TriblerCoreTestPriorityThreadPool(TriblerCoreTest):
+
+    def setUp(self):
+        super(TriblerCoreTestPriorityThreadPool, self).setUp()
+        self.pool = PriorityThreadPool(size=1)
+        self.started_event = Event()
+        self.release_event = Event()
+        self.done_event = Event()
+        self.lock = Lock()
+        self.order = []
+
+    def tearDown(self):
+        self.release_event.set()
+        self.pool.stop()
+        super(TriblerCoreTestPriorityThreadPool, self).tearDown()
+
+    def block(self):
+        self.started_event.set()
+        self.release_event.wait()
+
+    def record(self, name):
+        with self.lock:
+            self.order.append(name)
+
+    def test_priority_order(self):
+        self.pool.submit(self.block)
+        self.started_event.wait()
+        self.pool.submit(self.record, ("maintenance",), priority=PRIORITY_MAINTENANCE)
+        self.pool.submit(self.record, ("collecting",), priority=PRIORITY_COLLECTING)
+        self.pool.submit(self.record, ("interactive 1",))
+        self.pool.submit(self.record, ("interactive 2",))
+        self.pool.submit(self.done_event.set, priority=PRIORITY_MAINTENANCE)
+        self.release_event.set()
+
+        self.assertTrue(self.done_event.wait(5))
+        self.assertEqual(self.order, ["interactive 1", "interactive 2", "collecting", "maintenance"])
+
+    def test_submit_while_worker_wakes_up(self):
+        self.pool = PriorityThreadPool(size=2)
+        self.pool.submit(self.record, ("idle",))
+        for _ in xrange(500):
+            if self.pool._idle_workers:
+                break
+            sleep(0.01)
+
+        # the idle worker cannot take a task before both have been submitted
+        with self.pool._condition:
+            self.pool.submit(self.block)
+            self.pool.submit(self.done_event.set)
+        self.assertTrue(self.done_event.wait(5))
+
+    def test_reserved_threads(self):
+        self.pool = PriorityThreadPool(size=2, reserved=1)
+        self.pool.submit(self.block, priority=PRIORITY_MAINTENANCE)
+        self.pool.submit(self.record, ("maintenance",), priority=PRIORITY_MAINTENANCE)
+        self.pool.submit(self.done_event.set, priority=PRIORITY_INTERACTIVE)
+
+        self.assertTrue(self.done_event.wait(5))
+        self.assertEqual(self.order, [])
+        self.assertEqual(self.pool.get_queue_lengths().values(), [1])
+
+    def test_queue_lengths(self):
+        self.pool.submit(self.block)
+        self.started_event.wait()
+        self.pool.submit(self.record, ("collecting",), priority=PRIORITY_COLLECTING, task_type=u"test")
+        task = self.pool.submit(self.record, ("cancelled",), priority=PRIORITY_COLLECTING, task_type=u"test")
+        task.cancel()
+        self.assertEqual(self.pool.get_queue_lengths(), {(u"test", PRIORITY_COLLECTING): 2})
+
+        self.pool.submit(self.done_event.set, priority=PRIORITY_MAINTENANCE)
+        self.release_event.set()
+        self.assertTrue(self.done_event.wait(5))
+        self.assertEqual(self.order, ["collecting"])
+        self.assertEqual(self.pool.get_queue_lengths(), {})
+
+    def test_failing_task(self):
+        def fail():
+            raise RuntimeError()
+
+        self.pool.submit(fail)
+        self.pool.submit(self.done_event.set)
+        self.assertTrue(self.done_event.wait(5))
+
+    def test_stop(self):
+        self.pool.stop()
+        self.assertIsNone(self.pool.submit(self.record, ("stopped",)))
@@ -3,6 +3,7 @@
 
 import logging
 import os
+from hashlib import sha1
 from nose.tools import raises
 
 from libtorrent import bdecode
@@ -329,6 +330,13 @@ class TestTorrentDef(BaseTestCase):
         torrent = TorrentDef.load_from_dict(metainfo)
         self.assertTrue(isValidTorrentFile(torrent.get_metainfo()))
 
+    def test_load_from_memory_not_canonical(self):
+        info = "d6:lengthi10e4:name4:test12:piece lengthi16384e6:pieces20:%se" % ("x" * 20)
+        data = "d4:info%s8:announce%d:%se" % (info, len(TRACKER), TRACKER)
+        torrent = TorrentDef.load_from_memory(data)
+        self.assertEqual(torrent.get_infohash(), sha1(info).digest())
+        self.assertEqual(torrent.get_raw_data(), data)
+
     @raises(TorrentDefNotFinalizedException)
     def test_no_valid_metainfo(self):
         t = TorrentDef()
@@ -360,6 +368,24 @@ class TestTorrentDef(BaseTestCase):
         torrent2 = TorrentDefNoMetainfo("12345678901234567890", self.VIDEO_FILE_NAME, "magnet:")
         self.assertFalse(torrent2.get_trackers_as_single_tuple())
 
+    def test_file_table(self):
+        files = [{'path': ['dir%d' % (i % 10), 'file%d.avi' % i], 'length': 1000 + i} for i in xrange(10000)]
+        metainfo = {'info': {'name': 'many files', 'piece length': 2 ** 18, 'pieces': 'a' * 20, 'files': files},
+                    'announce': TRACKER}
+        t = TorrentDef.load_from_dict(metainfo)
+
+        file_table = t.get_file_table()
+        self.assertIs(t.get_file_table(), file_table)
+        self.assertEqual(len(file_table), 10000)
+        self.assertEqual(file_table.offsets[2], 2001)
+        self.assertEqual(t.get_length(), sum(1000 + i for i in xrange(10000)))
+        self.assertEqual(t.get_files_as_unicode()[42], os.path.join(u'dir2', u'file42.avi'))
+        self.assertEqual(t.get_index_of_file_in_files(os.path.join(u'dir9', u'file9999.avi')), 9999)
+
+        # Replacing the metainfo rebuilds the table
+        t.metainfo = dict(metainfo, info=dict(metainfo['info'], files=files[:5]))
+        self.assertEqual(len(t.get_file_table()), 5)
+
     def general_check(self, metainfo):
         self.assert_(isValidTorrentFile(metainfo))
         self.assert_(metainfo['announce'] == TRACKER)
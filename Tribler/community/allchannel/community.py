@@ -5,6 +5,7 @@ from twisted.internet.task import LoopingCall
 from twisted.python.threadable import isInIOThread
 
 from .conversion import AllChannelConversion
+from Tribler.Core.CacheDB.SqliteCacheDBHandler import LimitedOrderedDict
 from Tribler.community.allchannel.message import DelayMessageReqChannelMessage
 from Tribler.community.allchannel.payload import (ChannelCastRequestPayload, ChannelCastPayload, VoteCastPayload,
                                                   ChannelSearchPayload, ChannelSearchResponsePayload)
@@ -25,6 +26,7 @@ CHANNELCAST_FIRST_MESSAGE = 3.0
 CHANNELCAST_INTERVAL = 15.0
 CHANNELCAST_BLOCK_PERIOD = 10.0 * 60.0  # block for 10 minutes
 UNLOAD_COMMUNITY_INTERVAL = 60.0
+RECENTLY_REQUESTED_SIZE = 100
 
 DEBUG = False
 
@@ -116,7 +118,7 @@ class AllChannelCommunity(Community):
         super(AllChannelCommunity, self).__init__(*args, **kwargs)
 
         self._blocklist = {}
-        self._recentlyRequested = []
+        self._recentlyRequested = LimitedOrderedDict(RECENTLY_REQUESTED_SIZE)
 
         self.tribler_session = None
         self.auto_join_channel = None
@@ -520,7 +522,7 @@ class AllChannelCommunity(Community):
         collect = []
 
         # filter infohashes using recentlyRequested
-        infohashes = filter(lambda infohash: infohash not in self._recentlyRequested, infohashes)
+        infohashes = [infohash for infohash in infohashes if infohash not in self._recentlyRequested]
 
         # only request updates if nrT < 100 or we have not received an update in the last half hour
         if nrTorrrents < 100 or latestUpdate < (time() - 1800):
@@ -530,8 +532,9 @@ class AllChannelCommunity(Community):
                 if not haveTorrents[i]:
                     collect.append(infohashes[i])
 
-        self._recentlyRequested.extend(collect)
-        self._recentlyRequested = self._recentlyRequested[:100]
+        # the oldest requests are forgotten first
+        for infohash in collect:
+            self._recentlyRequested[infohash] = True
 
         return collect
 
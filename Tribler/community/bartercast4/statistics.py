@@ -1,3 +1,4 @@
+from Tribler.Core.Utilities.metrics import registry
 from Tribler.dispersy.database import Database
 import random
 from operator import itemgetter
@@ -27,6 +28,14 @@ class BarterStatistics(object):
             else:
                 self.bartercast[stats_type][peer] += value
 
+    def collect_metrics(self, metrics):
+        bartercast = metrics.gauge(u"tribler_bartercast_total", u"Bartercast statistics summed over all peers",
+                                   [u"type"])
+        with self._lock:
+            for stats_type, peers in self.bartercast.items():
+                bartercast.set(sum(peers.itervalues()),
+                               type=unicode(BartercastStatisticTypes.reverse_mapping[stats_type]).lower())
+
     def get_top_n_bartercast_statistics(self, key, n):
         """
         Returns top n-n/2 barter cast statistics, +n/2 randomly selected statistics from the rest of the list.
@@ -215,3 +224,4 @@ BartercastStatisticTypes = enum(TORRENTS_RECEIVED=1, TUNNELS_CREATED=2, \
                                 TUNNELS_BYTES_RECEIVED=6, TUNNELS_RELAY_BYTES_RECEIVED=7, TUNNELS_EXIT_BYTES_RECEIVED=8)
 
 _barter_statistics = BarterStatistics()
+registry.register_collector(_barter_statistics.collect_metrics)
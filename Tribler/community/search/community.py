@@ -6,7 +6,6 @@ from traceback import print_exc
 
 from twisted.internet.task import LoopingCall
 
-from Tribler.Core.CacheDB.sqlitecachedb import bin2str
 from Tribler.Core.TorrentDef import TorrentDef
 from Tribler.community.channel.payload import TorrentPayload
 from Tribler.community.channel.preview import PreviewChannelCommunity
@@ -236,7 +235,7 @@ class SearchCommunity(Community):
             my_preferences = sorted(self._mypref_db.getMyPrefListInfohash(limit=500))
             num_preferences = len(my_preferences)
 
-            my_pref_key = u",".join(map(bin2str, my_preferences))
+            my_pref_key = "".join(my_preferences)
             if my_pref_key != self.taste_bloom_filter_key:
                 if num_preferences > 0:
                     # no prefix changing, we want false positives (make sure it is a single char)
@@ -591,7 +590,7 @@ class SearchCommunity(Community):
         torrent_data = self.tribler_session.get_collected_torrent(infohash)
         if torrent_data is not None:
             try:
-                torrentdef = TorrentDef.load_from_memory(torrent_data)
+                torrentdef = TorrentDef.load_from_memory(torrent_data, lazy=True)
                 files = torrentdef.get_files_as_unicode_with_length()
 
                 meta = self.get_meta_message(u"torrent")
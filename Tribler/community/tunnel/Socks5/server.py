@@ -1,4 +1,5 @@
 import logging
+from collections import defaultdict
 
 from twisted.internet import reactor
 from twisted.internet.protocol import Protocol, DatagramProtocol, connectionDone, Factory
@@ -99,6 +100,8 @@ class Socks5Connection(Protocol):
         self.buffer = ''
 
         self.destinations = {}
+        # circuit_id -> destinations using that circuit, the reverse index of self.destinations
+        self.circuit_destinations = defaultdict(set)
 
     def dataReceived(self, data):
         self.buffer = self.buffer + data
@@ -244,11 +247,31 @@ class Socks5Connection(Protocol):
             if not selected_circuit:
                 return None
 
-            self.destinations[destination] = selected_circuit
+            self._set_destination(destination, selected_circuit)
             self._logger.info("SELECT circuit {0} for {1}".format(self.destinations[destination].circuit_id,
                                                                   destination))
         return self.destinations[destination]
 
+    def _set_destination(self, destination, circuit):
+        """
+        Route a destination over a circuit, keeping the circuit_id -> destinations index up to date.
+        """
+        old_circuit = self.destinations.get(destination)
+        if old_circuit is circuit:
+            return
+
+        if old_circuit is not None:
+            old_destinations = self.circuit_destinations[old_circuit.circuit_id]
+            old_destinations.discard(destination)
+            if not old_destinations:
+                del self.circuit_destinations[old_circuit.circuit_id]
+                self.socksserver.circuit_unused(old_circuit.circuit_id, self)
+
+        self.destinations[destination] = circuit
+        if circuit.circuit_id not in self.circuit_destinations:
+            self.socksserver.circuit_used(circuit.circuit_id, self)
+        self.circuit_destinations[circuit.circuit_id].add(destination)
+
     def circuit_dead(self, broken_circuit):
         """
         When a circuit breaks and it affects our operation we should re-add the
@@ -257,22 +280,18 @@ class Socks5Connection(Protocol):
         @param Circuit broken_circuit: the circuit that has been broken
         @return Set with destinations using this circuit
         """
-        affected_destinations = set(
-            destination for destination, tunnel_circuit in self.destinations.iteritems() if tunnel_circuit == broken_circuit)
-        counter = 0
+        affected_destinations = self.circuit_destinations.pop(broken_circuit.circuit_id, set())
         for destination in affected_destinations:
-            if destination in self.destinations:
-                del self.destinations[destination]
-                counter += 1
+            del self.destinations[destination]
 
-        if counter > 0:
-            self._logger.debug("Deleted %d peers from destination list", counter)
+        if affected_destinations:
+            self._logger.debug("Deleted %d peers from destination list", len(affected_destinations))
 
         return affected_destinations
 
     def on_incoming_from_tunnel(self, community, circuit, origin, data, force=False):
-        if circuit in self.destinations.values() or force:
-            self.destinations[origin] = circuit
+        if circuit.circuit_id in self.circuit_destinations or force:
+            self._set_destination(origin, circuit)
 
             if self._udp_socket:
                 socks5_data = conversion.encode_udp_packet(
@@ -302,6 +321,8 @@ class Socks5Server(object):
         self.socks5_ports = socks5_ports
         self.twisted_ports = []
         self.sessions = []
+        # circuit_id -> sessions that route destinations over that circuit
+        self.circuit_sessions = defaultdict(set)
 
     def start(self):
         for i, port in enumerate(self.socks5_ports):
@@ -314,6 +335,7 @@ class Socks5Server(object):
             for session in self.sessions:
                 session.close('stopping')
             self.sessions = []
+            self.circuit_sessions = defaultdict(set)
 
             for twisted_port in self.twisted_ports:
                 twisted_port.stopListening()
@@ -328,12 +350,24 @@ class Socks5Server(object):
         self._logger.debug("SOCKS5 TCP connection lost")
         if socks5connection in self.sessions:
             self.sessions.remove(socks5connection)
+        for circuit_id in socks5connection.circuit_destinations.keys():
+            self.circuit_unused(circuit_id, socks5connection)
 
         socks5connection.close()
 
+    def circuit_used(self, circuit_id, session):
+        self.circuit_sessions[circuit_id].add(session)
+
+    def circuit_unused(self, circuit_id, session):
+        sessions = self.circuit_sessions.get(circuit_id)
+        if sessions is not None:
+            sessions.discard(session)
+            if not sessions:
+                del self.circuit_sessions[circuit_id]
+
     def circuit_dead(self, circuit):
         affected_destinations = set()
-        for session in self.sessions:
+        for session in self.circuit_sessions.pop(circuit.circuit_id, ()):
             affected_destinations.update(session.circuit_dead(circuit))
 
         return affected_destinations
@@ -343,6 +377,12 @@ class Socks5Server(object):
             origin = (community.circuit_id_to_ip(circuit.circuit_id), CIRCUIT_ID_PORT)
         session_hops = circuit.goal_hops if circuit.ctype != CIRCUIT_TYPE_RENDEZVOUS else circuit.goal_hops - 1
 
-        if not any([session.on_incoming_from_tunnel(community, circuit, origin, data, force)
-                    for session in self.sessions if session.hops == session_hops]):
+        # Only the sessions that use this circuit accept the data, unless it is forced upon all of them
+        sessions = self.sessions if force else list(self.circuit_sessions.get(circuit.circuit_id, ()))
+        accepted = False
+        for session in sessions:
+            if session.hops == session_hops:
+                accepted = session.on_incoming_from_tunnel(community, circuit, origin, data, force) or accepted
+
+        if not accepted:
             self._logger.warning("No session accepted this data from %s:%d", *origin)
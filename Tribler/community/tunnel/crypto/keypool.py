@@ -0,0 +1,56 @@
+import logging
+from collections import deque
+
+from twisted.internet.defer import succeed
+from twisted.internet.threads import deferToThread
+
+
+class DiffieHellmanKeyPool(object):
+    """
+    A reserve of precomputed Diffie-Hellman secrets for creating and extending circuits. The secrets are generated on
+    a thread, so building a circuit does not have to wait for (or block the reactor with) key generation.
+    """
+
+    def __init__(self, crypto, size):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.crypto = crypto
+        self.size = size
+        self.keys = deque()
+        self.refilling = False
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self):
+        """
+        Take a (dh_secret, dh_first_part) tuple from the pool. If the pool is empty, the secret is generated right away.
+        """
+        if self.keys:
+            key = self.keys.popleft()
+        else:
+            key = self.crypto.generate_diffie_secret()
+        self.refill()
+        return key
+
+    def refill(self):
+        """
+        Generate the secrets that are missing from the pool in a thread.
+        :return: A deferred that fires once the pool has been refilled.
+        """
+        num_missing = self.size - len(self.keys)
+        if self.refilling or num_missing <= 0:
+            return succeed(None)
+
+        def generate_keys():
+            return [self.crypto.generate_diffie_secret() for _ in xrange(num_missing)]
+
+        def on_keys_generated(keys):
+            self.refilling = False
+            self.keys.extend(keys)
+
+        def on_failure(failure):
+            self.refilling = False
+            self._logger.error("Failed to generate Diffie-Hellman secrets: %s", failure.getErrorMessage())
+
+        self.refilling = True
+        return deferToThread(generate_keys).addCallbacks(on_keys_generated, on_failure)
@@ -1,8 +1,12 @@
 import struct
 
 from cryptowrapper import crypto_box_beforenm, crypto_auth, crypto_auth_verify, Cipher, algorithms, modes, HKDFExpand, hashes, default_backend
+from Tribler.Core.Utilities.metrics import registry
 from Tribler.dispersy.crypto import ECCrypto, LibNaCLPK
 
+CRYPTO_SECONDS = registry.histogram(u"tribler_tunnel_crypto_seconds", u"Duration of tunnel crypto operations",
+                                    [u"operation"], buckets=[0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01])
+
 
 class CryptoException(Exception):
     pass
@@ -10,6 +14,10 @@ class CryptoException(Exception):
 
 class TunnelCrypto(ECCrypto):
 
+    # Encrypting and decrypting happens for every relayed packet, so these are counted instead of timed
+    encrypt_count = 0
+    decrypt_count = 0
+
     def initialize(self, community):
         self.community = community
         self.key = self.community.my_member._ec
@@ -18,12 +26,14 @@ class TunnelCrypto(ECCrypto):
     def is_key_compatible(self, key):
         return isinstance(key, LibNaCLPK)
 
+    @CRYPTO_SECONDS.timed(operation=u"dh_secret")
     def generate_diffie_secret(self):
         tmp_key = self.generate_key(u"curve25519")
         X = tmp_key.key.pk
 
         return tmp_key, X
 
+    @CRYPTO_SECONDS.timed(operation=u"dh_shared_secret")
     def generate_diffie_shared_secret(self, dh_received, key=None):
         if key == None:
             key = self.key
@@ -36,6 +46,7 @@ class TunnelCrypto(ECCrypto):
         AUTH = crypto_auth(Y, shared_secret)
         return shared_secret, Y, AUTH
 
+    @CRYPTO_SECONDS.timed(operation=u"dh_verify")
     def verify_and_generate_shared_secret(self, dh_secret, dh_received, auth, B):
         shared_secret = crypto_box_beforenm(dh_received, dh_secret.key.sk) + crypto_box_beforenm(B, dh_secret.key.sk)
         crypto_auth_verify(auth, dh_received, shared_secret)
@@ -64,6 +75,7 @@ class TunnelCrypto(ECCrypto):
     def encrypt_str(self, content, key, salt, salt_explicit):
         # return the encrypted content prepended with the
         # gcm tag and salt_explicit
+        self.encrypt_count += 1
         cipher = Cipher(algorithms.AES(key),
                         modes.GCM(initialization_vector=self._bulid_iv(salt, salt_explicit)),
                         backend=default_backend()
@@ -73,6 +85,7 @@ class TunnelCrypto(ECCrypto):
 
     def decrypt_str(self, content, key, salt):
         # content contains the gcm tag and salt_explicit in plaintext
+        self.decrypt_count += 1
         salt_explicit, gcm_tag = struct.unpack_from('!q16s', content)
         cipher = Cipher(algorithms.AES(key),
                         modes.GCM(initialization_vector=self._bulid_iv(salt, salt_explicit), tag=gcm_tag),
@@ -0,0 +1,105 @@
+import logging
+from collections import defaultdict
+
+from twisted.internet import reactor
+from twisted.internet.defer import DeferredList, maybeDeferred
+from twisted.internet.protocol import DatagramProtocol
+
+
+class PooledExitSocket(DatagramProtocol):
+    """
+    One of the UDP sockets of an ExitSocketPool.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.port = None
+        self.local_port = None
+
+    def datagramReceived(self, data, source):
+        self.pool.on_datagram(self.local_port, data, source)
+
+
+class ExitSocketPool(object):
+    """
+    A bounded set of UDP sockets that is shared by the exit sockets of all circuits, instead of opening a UDP socket
+    for each circuit.
+
+    Incoming packets are demultiplexed to the right circuit using a (local port, remote address) -> circuit id table.
+    A circuit claims an entry in this table when it first sends a packet to a remote address over one of the sockets,
+    so at most one circuit per socket can talk to the same remote address at the same time.
+    """
+
+    _reactor = reactor
+
+    def __init__(self, community, size):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.community = community
+        self.size = size
+        self.sockets = []
+        self.demux = {}
+        self.circuit_keys = defaultdict(set)
+
+    @property
+    def started(self):
+        return bool(self.sockets)
+
+    def start(self):
+        """
+        Open the UDP sockets of the pool.
+        """
+        for _ in xrange(self.size):
+            protocol = PooledExitSocket(self)
+            protocol.port = self._reactor.listenUDP(0, protocol)
+            protocol.local_port = protocol.port.getHost().port
+            self.sockets.append(protocol)
+        self._logger.info("Opened %d shared exit sockets", len(self.sockets))
+
+    def stop(self):
+        """
+        Close the UDP sockets of the pool.
+        :return: A deferred that fires once all UDP sockets have closed.
+        """
+        deferreds = [maybeDeferred(protocol.port.stopListening) for protocol in self.sockets]
+        self.sockets = []
+        self.demux = {}
+        self.circuit_keys = defaultdict(set)
+        return DeferredList(deferreds)
+
+    def sendto(self, circuit_id, data, destination):
+        """
+        Send data on behalf of a circuit over one of the sockets of the pool.
+        :return: whether there was a socket that could be used to send data to this destination.
+        """
+        if not self.started:
+            self.start()
+
+        start_index = circuit_id % len(self.sockets)
+        for index in xrange(len(self.sockets)):
+            protocol = self.sockets[(start_index + index) % len(self.sockets)]
+            key = (protocol.local_port, destination)
+            owner = self.demux.setdefault(key, circuit_id)
+            if owner == circuit_id:
+                self.circuit_keys[circuit_id].add(key)
+                protocol.transport.write(data, destination)
+                return True
+
+        self._logger.warning("No shared exit socket available for circuit %d to send to %s", circuit_id, destination)
+        return False
+
+    def on_datagram(self, local_port, data, source):
+        circuit_id = self.demux.get((local_port, source))
+        exit_socket = self.community.exit_sockets.get(circuit_id) if circuit_id is not None else None
+        if exit_socket:
+            exit_socket.datagramReceived(data, source)
+        else:
+            self._logger.debug("Dropping packet from %s on shared exit socket %d, no circuit is using this address",
+                               source, local_port)
+
+    def remove_circuit(self, circuit_id):
+        """
+        Release the demultiplexing entries of a circuit, e.g. because its exit socket is closed.
+        """
+        for key in self.circuit_keys.pop(circuit_id, ()):
+            if self.demux.get(key) == circuit_id:
+                del self.demux[key]
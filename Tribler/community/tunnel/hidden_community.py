@@ -585,6 +585,8 @@ class HiddenTunnelCommunity(TunnelCommunity):
 
             self.relay_from_to[circuit.circuit_id] = RelayRoute(relay_circuit.circuit_id, relay_circuit.sock_addr, True)
             self.relay_from_to[relay_circuit.circuit_id] = RelayRoute(circuit.circuit_id, circuit.sock_addr, True)
+            self.schedule_expiry(u"relay", circuit.circuit_id, self.relay_from_to[circuit.circuit_id])
+            self.schedule_expiry(u"relay", relay_circuit.circuit_id, self.relay_from_to[relay_circuit.circuit_id])
 
     def check_linked_e2e(self, messages):
         for message in messages:
@@ -0,0 +1,102 @@
+import logging
+import time
+from collections import OrderedDict, defaultdict
+
+from twisted.internet import reactor
+from twisted.internet.abstract import isIPAddress
+from twisted.internet.defer import Deferred
+
+DNS_CACHE_TTL = 300
+DNS_CACHE_NEGATIVE_TTL = 30
+DNS_CACHE_MAX_SIZE = 10000
+
+
+class ExitResolver(object):
+    """
+    Resolves the hostnames that exit sockets send data to. Results are cached for a limited time and the number of
+    cached hostnames is bounded. Failed lookups are cached as well (for a shorter time), so a hostname that cannot be
+    resolved is not looked up again for every packet that is sent to it.
+
+    Concurrent lookups of the same hostname are merged into a single lookup.
+    """
+
+    _reactor = reactor
+
+    def __init__(self, ttl=DNS_CACHE_TTL, negative_ttl=DNS_CACHE_NEGATIVE_TTL, max_size=DNS_CACHE_MAX_SIZE):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+
+        # hostname -> (ip address or None if the lookup failed, expiration time), oldest entries first
+        self._cache = OrderedDict()
+        self._waiting = defaultdict(list)
+
+    def __len__(self):
+        return len(self._cache)
+
+    @staticmethod
+    def is_ip_address(host):
+        """
+        Returns whether the given host is a literal IPv4 address, which does not have to be resolved.
+        """
+        return isIPAddress(host)
+
+    def get_cached(self, host):
+        """
+        Look up a hostname in the cache.
+        :param host: the hostname to look up.
+        :return: a (found, ip_address) tuple. If found is True and the ip_address is None, the hostname could not
+        be resolved recently.
+        """
+        entry = self._cache.get(host)
+        if entry is None:
+            return False, None
+
+        ip_address, expiration_time = entry
+        if expiration_time < time.time():
+            del self._cache[host]
+            return False, None
+        return True, ip_address
+
+    def resolve(self, host):
+        """
+        Resolve a hostname, using the cache if possible.
+        :param host: the hostname to resolve.
+        :return: a Deferred that fires with the ip address, or errbacks if the hostname cannot be resolved.
+        """
+        deferred = Deferred()
+        found, ip_address = self.get_cached(host)
+        if found:
+            if ip_address:
+                deferred.callback(ip_address)
+            else:
+                deferred.errback(ValueError("Hostname %s could not be resolved recently" % host))
+            return deferred
+
+        self._waiting[host].append(deferred)
+        if len(self._waiting[host]) == 1:
+            self._reactor.resolve(host).addCallbacks(self._on_resolved, self._on_resolve_failed,
+                                                     callbackArgs=(host,), errbackArgs=(host,))
+        return deferred
+
+    def _store(self, host, ip_address, ttl):
+        self._cache.pop(host, None)
+        self._cache[host] = (ip_address, time.time() + ttl)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def _on_resolved(self, ip_address, host):
+        self._logger.debug("Resolved hostname %s to ip address %s", host, ip_address)
+        self._store(host, ip_address, self.ttl)
+        for deferred in self._waiting.pop(host, []):
+            # Deferreds that have been cancelled by their exit socket have already been called
+            if not deferred.called:
+                deferred.callback(ip_address)
+
+    def _on_resolve_failed(self, failure, host):
+        self._logger.debug("Failed to resolve hostname %s: %s", host, failure.getErrorMessage())
+        self._store(host, None, self.negative_ttl)
+        for deferred in self._waiting.pop(host, []):
+            if not deferred.called:
+                deferred.errback(failure)
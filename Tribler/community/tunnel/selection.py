@@ -0,0 +1,182 @@
+import random
+import time
+from collections import defaultdict
+
+from Tribler.community.tunnel import CIRCUIT_ID_PORT, CIRCUIT_STATE_READY, CIRCUIT_TYPE_DATA, CIRCUIT_TYPE_RENDEZVOUS
+
+RTT_EWMA_ALPHA = 0.3
+THROUGHPUT_EWMA_ALPHA = 0.3
+DEFAULT_RTT = 1.0
+
+
+class SelectionStrategy(object):
+    """
+    Base class of the strategies that select the circuit a SOCKS5 destination is routed over. The tunnel community
+    informs the strategy about circuits becoming ready or being removed, and about the round trip times it measures.
+    """
+
+    def __init__(self, community):
+        self.community = community
+
+    def has_options(self, hops):
+        raise NotImplementedError()
+
+    def select(self, destination, hops):
+        raise NotImplementedError()
+
+    def select_rendezvous(self, destination):
+        """
+        Returns the rendezvous circuit a destination refers to, if any.
+        """
+        if destination and destination[1] == CIRCUIT_ID_PORT:
+            circuit_id = self.community.ip_to_circuit_id(destination[0])
+            circuit = self.community.circuits.get(circuit_id, None)
+
+            if circuit and circuit.state == CIRCUIT_STATE_READY and \
+               circuit.ctype == CIRCUIT_TYPE_RENDEZVOUS:
+                return circuit
+        return None
+
+    def on_circuit_ready(self, circuit):
+        pass
+
+    def on_circuit_removed(self, circuit):
+        pass
+
+    def on_rtt(self, circuit, rtt):
+        pass
+
+    def update_throughput(self):
+        pass
+
+
+class RoundRobin(SelectionStrategy):
+
+    def __init__(self, community):
+        super(RoundRobin, self).__init__(community)
+        self.index = -1
+
+    def has_options(self, hops):
+        return len(self.community.active_data_circuits(hops)) > 0
+
+    def select(self, destination, hops):
+        circuit = self.select_rendezvous(destination)
+        if circuit:
+            return circuit
+
+        circuit_ids = sorted(self.community.active_data_circuits(hops).keys())
+
+        if not circuit_ids:
+            return None
+
+        self.index = (self.index + 1) % len(circuit_ids)
+        circuit_id = circuit_ids[self.index]
+        return self.community.active_data_circuits()[circuit_id]
+
+
+class CircuitStats(object):
+    """
+    Exponentially weighted moving averages of the round trip time and the throughput of a circuit.
+    """
+
+    def __init__(self, circuit):
+        self.circuit = circuit
+        self.rtt = None
+        self.throughput = None
+        self.last_bytes = circuit.bytes_up + circuit.bytes_down
+        self.last_time = time.time()
+
+    def add_rtt(self, rtt):
+        self.rtt = rtt if self.rtt is None else RTT_EWMA_ALPHA * rtt + (1 - RTT_EWMA_ALPHA) * self.rtt
+
+    def update_throughput(self, now=None):
+        now = now or time.time()
+        if now <= self.last_time:
+            return
+
+        num_bytes = self.circuit.bytes_up + self.circuit.bytes_down
+        throughput = (num_bytes - self.last_bytes) / (now - self.last_time)
+        self.throughput = throughput if self.throughput is None else \
+            THROUGHPUT_EWMA_ALPHA * throughput + (1 - THROUGHPUT_EWMA_ALPHA) * self.throughput
+        self.last_bytes = num_bytes
+        self.last_time = now
+
+
+class WeightedSelection(SelectionStrategy):
+    """
+    Selects circuits at random, weighted by their round trip time and throughput, so fast circuits are used for more
+    destinations than slow or congested ones. Circuits without measurements yet are assumed to be average.
+
+    The ready data circuits are indexed by their number of hops, so selecting a circuit does not have to go through
+    all circuits of the community.
+    """
+
+    def __init__(self, community):
+        super(WeightedSelection, self).__init__(community)
+        self.random = random.Random()
+        self.circuits_by_hops = defaultdict(dict)
+        self.stats = {}
+
+    def on_circuit_ready(self, circuit):
+        if circuit.ctype == CIRCUIT_TYPE_DATA:
+            self.circuits_by_hops[circuit.goal_hops][circuit.circuit_id] = circuit
+            self.stats[circuit.circuit_id] = CircuitStats(circuit)
+
+    def on_circuit_removed(self, circuit):
+        circuits = self.circuits_by_hops.get(circuit.goal_hops)
+        if circuits is not None:
+            circuits.pop(circuit.circuit_id, None)
+            if not circuits:
+                del self.circuits_by_hops[circuit.goal_hops]
+        self.stats.pop(circuit.circuit_id, None)
+
+    def on_rtt(self, circuit, rtt):
+        if circuit.circuit_id in self.stats:
+            self.stats[circuit.circuit_id].add_rtt(rtt)
+
+    def update_throughput(self):
+        now = time.time()
+        for stats in self.stats.itervalues():
+            stats.update_throughput(now)
+
+    def get_circuits(self, hops):
+        if hops is None:
+            circuits = [circuit for circuits in self.circuits_by_hops.itervalues() for circuit in circuits.itervalues()]
+        else:
+            circuits = self.circuits_by_hops.get(hops, {}).values()
+        return [circuit for circuit in circuits if circuit.state == CIRCUIT_STATE_READY]
+
+    def get_weights(self, circuits):
+        stats = [self.stats.get(circuit.circuit_id) for circuit in circuits]
+        rtts = [s.rtt for s in stats if s and s.rtt is not None]
+        throughputs = [s.throughput for s in stats if s and s.throughput is not None]
+        mean_rtt = sum(rtts) / len(rtts) if rtts else DEFAULT_RTT
+        mean_throughput = sum(throughputs) / len(throughputs) if throughputs else 0
+
+        weights = []
+        for s in stats:
+            rtt = s.rtt if s and s.rtt is not None else mean_rtt
+            throughput = s.throughput if s and s.throughput is not None else mean_throughput
+            throughput_factor = 1.0 + throughput / mean_throughput if mean_throughput > 0 else 1.0
+            weights.append(throughput_factor / max(rtt, 0.001))
+        return weights
+
+    def has_options(self, hops):
+        return len(self.get_circuits(hops)) > 0
+
+    def select(self, destination, hops):
+        circuit = self.select_rendezvous(destination)
+        if circuit:
+            return circuit
+
+        circuits = self.get_circuits(hops)
+        if not circuits:
+            return None
+
+        weights = self.get_weights(circuits)
+        point = self.random.random() * sum(weights)
+        for circuit, weight in zip(circuits, weights):
+            point -= weight
+            if point < 0:
+                return circuit
+        return circuits[-1]
@@ -3,6 +3,8 @@
 import random
 import time
 from collections import defaultdict
+from heapq import heappop, heappush
+from itertools import count
 from cryptography.exceptions import InvalidTag
 from twisted.internet.error import MessageLengthError
 
@@ -13,18 +15,23 @@ from twisted.internet.protocol import DatagramProtocol
 from twisted.internet.task import LoopingCall
 
 from Tribler.Core.Utilities.encoding import decode, encode
+from Tribler.Core.Utilities.metrics import registry
 from Tribler.community.bartercast4.statistics import BartercastStatisticTypes, _barter_statistics
-from Tribler.community.tunnel import (CIRCUIT_ID_PORT, CIRCUIT_STATE_EXTENDING, CIRCUIT_STATE_READY, CIRCUIT_TYPE_DATA,
+from Tribler.community.tunnel import (CIRCUIT_STATE_EXTENDING, CIRCUIT_STATE_READY, CIRCUIT_TYPE_DATA,
                                       CIRCUIT_TYPE_RENDEZVOUS, CIRCUIT_TYPE_RP, EXIT_NODE, EXIT_NODE_SALT, ORIGINATOR,
                                       ORIGINATOR_SALT, PING_INTERVAL)
 from Tribler.community.tunnel.Socks5.server import Socks5Server
 from Tribler.community.tunnel.conversion import TunnelConversion
+from Tribler.community.tunnel.crypto.keypool import DiffieHellmanKeyPool
 from Tribler.community.tunnel.crypto.tunnelcrypto import CryptoException, TunnelCrypto
+from Tribler.community.tunnel.exitpool import ExitSocketPool
 from Tribler.community.tunnel.payload import (CellPayload, CreatePayload, CreatedPayload, DestroyPayload, ExtendPayload,
                                               ExtendedPayload, PingPayload, PongPayload, StatsRequestPayload,
                                               StatsResponsePayload, TunnelIntroductionRequestPayload,
                                               TunnelIntroductionResponsePayload)
+from Tribler.community.tunnel.resolver import ExitResolver
 from Tribler.community.tunnel.routing import Circuit, Hop, RelayRoute
+from Tribler.community.tunnel.selection import WeightedSelection
 from Tribler.dispersy.authentication import MemberAuthentication, NoAuthentication
 from Tribler.dispersy.candidate import Candidate
 from Tribler.dispersy.community import Community
@@ -88,6 +95,7 @@ class PingRequestCache(RandomNumberCache):
         self.tunnel_logger = logging.getLogger('TunnelLogger')
         self.circuit = circuit
         self.community = community
+        self.sent_time = time.time()
 
     @property
     def timeout_delay(self):
@@ -125,39 +133,72 @@ class TunnelExitSocket(DatagramProtocol, TaskManager):
         self.bytes_up = self.bytes_down = 0
         self.creation_time = time.time()
         self.mid = mid
+        self.pending_packets = {}
+        self.shared = False
 
     def enable(self):
         if not self.enabled:
-            self.port = reactor.listenUDP(0, self)
+            if self.community.exit_socket_pool:
+                self.shared = True
+            else:
+                self.port = reactor.listenUDP(0, self)
 
     @property
     def enabled(self):
-        return self.port is not None
+        return self.port is not None or self.shared
 
     def sendto(self, data, destination):
         if self.check_num_packets(destination, False):
             if TunnelConversion.is_allowed(data):
+                host, port = destination
+                if ExitResolver.is_ip_address(host):
+                    self.write_to_transport(data, destination)
+                    return
+
+                found, ip_address = self.community.exit_resolver.get_cached(host)
+                if found:
+                    if ip_address:
+                        self.write_to_transport(data, (ip_address, port))
+                    else:
+                        self.tunnel_logger.debug("Dropping packet to hostname %s that could not be resolved", host)
+                    return
+
+                # Packets to a hostname that is being resolved wait for the lookup to finish
+                if host in self.pending_packets:
+                    self.pending_packets[host].append((data, port))
+                    return
+                self.pending_packets[host] = [(data, port)]
+
+                def on_ip_address(ip_address):
+                    self.tunnel_logger.debug("Resolved hostname %s to ip_address %s", host, ip_address)
+                    for pending_data, pending_port in self.pending_packets.pop(host, []):
+                        self.write_to_transport(pending_data, (ip_address, pending_port))
+
                 def on_error(failure):
+                    self.pending_packets.pop(host, None)
                     self.tunnel_logger.error("Can't resolve ip address for hostname %s. Failure: %s",
-                                             destination[0], failure)
+                                             host, failure)
 
-                def on_ip_address(ip_address):
-                    self.tunnel_logger.debug("Resolved hostname %s to ip_address %s", destination[0], ip_address)
-                    try:
-                        self.transport.write(data, (ip_address, destination[1]))
-                        self.community.increase_bytes_sent(self, len(data))
-                    except (AttributeError, MessageLengthError) as exception:
-                        self.tunnel_logger.error(
-                            "Failed to write data to transport: %s. Destination: %r error was: %r",
-                            exception, destination, exception)
-
-                resolve_ip_address_deferred = reactor.resolve(destination[0])
+                resolve_ip_address_deferred = self.community.exit_resolver.resolve(host)
+                self.register_task("resolving_%r" % host, resolve_ip_address_deferred)
                 resolve_ip_address_deferred.addCallbacks(on_ip_address, on_error)
-                self.register_task("resolving_%r" % destination[0], resolve_ip_address_deferred)
             else:
                 self.tunnel_logger.error("dropping forbidden packets from exit socket with circuit_id %d",
                                          self.circuit_id)
 
+    def write_to_transport(self, data, destination):
+        try:
+            if self.shared:
+                if not self.community.exit_socket_pool.sendto(self.circuit_id, data, destination):
+                    return
+            else:
+                self.transport.write(data, destination)
+            self.community.increase_bytes_sent(self, len(data))
+        except (AttributeError, MessageLengthError) as exception:
+            self.tunnel_logger.error(
+                "Failed to write data to transport: %s. Destination: %r error was: %r",
+                exception, destination, exception)
+
     def datagramReceived(self, data, source):
         self.community.increase_bytes_received(self, len(data))
         if self.check_num_packets(source, True):
@@ -177,9 +218,13 @@ class TunnelExitSocket(DatagramProtocol, TaskManager):
         :return: A deferred that fires once the UDP socket has closed.
         """
         self.cancel_all_pending_tasks()
+        self.pending_packets = {}
 
         done_closing_deferred = succeed(None)
-        if self.enabled:
+        if self.shared:
+            self.community.exit_socket_pool.remove_circuit(self.circuit_id)
+            self.shared = False
+        elif self.enabled:
             done_closing_deferred = maybeDeferred(self.port.stopListening)
             self.port = None
 
@@ -221,6 +266,12 @@ class TunnelSettings(object):
         self.max_traffic = 250 * 1024 * 1024
 
         self.max_packets_without_reply = 50
+        # The number of precomputed Diffie-Hellman secrets for building circuits
+        self.dh_key_pool_size = 8
+        # The hop counts for which max_circuits data circuits are built at startup, before any download asks for them
+        self.reserve_circuit_hops = []
+        # The number of UDP sockets shared by all exit circuits, 0 to use a UDP socket per exit circuit
+        self.exit_socket_pool_size = 0
         self.dht_lookup_interval = 30
 
         if tribler_session:
@@ -238,34 +289,6 @@ class ExitCandidate(object):
         self.creation_time = time.time()
 
 
-class RoundRobin(object):
-
-    def __init__(self, community):
-        self.community = community
-        self.index = -1
-
-    def has_options(self, hops):
-        return len(self.community.active_data_circuits(hops)) > 0
-
-    def select(self, destination, hops):
-        if destination and destination[1] == CIRCUIT_ID_PORT:
-            circuit_id = self.community.ip_to_circuit_id(destination[0])
-            circuit = self.community.circuits.get(circuit_id, None)
-
-            if circuit and circuit.state == CIRCUIT_STATE_READY and \
-               circuit.ctype == CIRCUIT_TYPE_RENDEZVOUS:
-                return circuit
-
-        circuit_ids = sorted(self.community.active_data_circuits(hops).keys())
-
-        if not circuit_ids:
-            return None
-
-        self.index = (self.index + 1) % len(circuit_ids)
-        circuit_id = circuit_ids[self.index]
-        return self.community.active_data_circuits()[circuit_id]
-
-
 class TunnelCommunity(Community):
 
     def __init__(self, *args, **kwargs):
@@ -274,14 +297,26 @@ class TunnelCommunity(Community):
 
         self.data_prefix = "fffffffe".decode("HEX")
         self.circuits = {}
+        # (ctype, state, number of hops) -> {circuit_id: circuit}
+        self.circuits_index = defaultdict(dict)
+        self.circuits_index_keys = {}
+        self.circuits_first_hops = defaultdict(int)
+        # Heap with (deadline, sequence number, kind, key, object) entries of circuits/relays/exit sockets to check
+        self.expiry_heap = []
+        self.expiry_keys = {}
+        self.expiry_counter = count()
         self.directions = {}
         self.relay_from_to = {}
         self.relay_session_keys = {}
         self.exit_sockets = {}
+        self.exit_resolver = ExitResolver()
+        self.exit_socket_pool = None
         self.circuits_needed = defaultdict(int)
+        self.circuits_requested_time = {}
+        self.dh_key_pool = None
         self.exit_candidates = {}
         self.notifier = None
-        self.selection_strategy = RoundRobin(self)
+        self.selection_strategy = WeightedSelection(self)
         self.stats = defaultdict(int)
         self.creation_time = time.time()
         self.crawler_mids = ['5e02620cfabea2d2d3bfdc2032f6307136a35e69'.decode('hex'),
@@ -302,9 +337,16 @@ class TunnelCommunity(Community):
         assert isinstance(self.settings.crypto, TunnelCrypto), self.settings.crypto
 
         self.crypto.initialize(self)
+        self.dh_key_pool = DiffieHellmanKeyPool(self.crypto, self.settings.dh_key_pool_size)
+        self.dh_key_pool.refill()
+        for hops in self.settings.reserve_circuit_hops:
+            self.circuits_needed[hops] = max(self.settings.max_circuits, self.circuits_needed[hops])
 
         self.dispersy.endpoint.listen_to(self.data_prefix, self.on_data)
 
+        if self.settings.exit_socket_pool_size > 0:
+            self.exit_socket_pool = ExitSocketPool(self, self.settings.exit_socket_pool_size)
+
         self.register_task("do_circuits", LoopingCall(self.do_circuits)).start(5, now=True)
         self.register_task("do_ping", LoopingCall(self.do_ping)).start(PING_INTERVAL)
 
@@ -312,6 +354,8 @@ class TunnelCommunity(Community):
                                          if tribler_session else self.settings.socks_listen_ports)
         self.socks_server.start()
 
+        registry.register_collector(self.collect_metrics)
+
         if self.trsession:
             self.notifier = self.trsession.notifier
             self.trsession.lm.tunnel_community = self
@@ -387,6 +431,7 @@ class TunnelCommunity(Community):
         return [DefaultConversion(self), TunnelConversion(self)]
 
     def unload_community(self):
+        registry.unregister_collector(self.collect_metrics)
         self.socks_server.stop()
 
         # Remove all circuits/relays/exitsockets
@@ -396,6 +441,8 @@ class TunnelCommunity(Community):
             self.remove_relay(circuit_id, 'unload', destroy=True, both_sides=False)
         for circuit_id in self.exit_sockets.keys():
             self.remove_exit_socket(circuit_id, 'unload', destroy=True)
+        if self.exit_socket_pool:
+            self.exit_socket_pool.stop()
 
         super(TunnelCommunity, self).unload_community()
 
@@ -403,6 +450,21 @@ class TunnelCommunity(Community):
     def crypto(self):
         return self.settings.crypto
 
+    def collect_metrics(self, metrics):
+        tunnel_bytes = metrics.gauge(u"tribler_tunnel_bytes", u"Bytes sent and received through tunnels", [u"type"])
+        for stat_type, num_bytes in self.stats.items():
+            tunnel_bytes.set(num_bytes, type=stat_type)
+
+        tunnels = metrics.gauge(u"tribler_tunnel_objects", u"Number of circuits, relays and exit sockets", [u"type"])
+        tunnels.set(len(self.circuits), type=u"circuits")
+        tunnels.set(len(self.relay_from_to), type=u"relays")
+        tunnels.set(len(self.exit_sockets), type=u"exit_sockets")
+
+        crypto_operations = metrics.gauge(u"tribler_tunnel_crypto_operations",
+                                          u"Number of packets encrypted and decrypted for tunnels", [u"operation"])
+        crypto_operations.set(self.crypto.encrypt_count, operation=u"encrypt")
+        crypto_operations.set(self.crypto.decrypt_count, operation=u"decrypt")
+
     def get_session_keys(self, keys, direction):
         # increment salt_explicit
         keys[direction + 4] += 1
@@ -447,34 +509,17 @@ class TunnelCommunity(Community):
 
     def build_tunnels(self, hops):
         if hops > 0:
+            if self.tunnels_ready(hops) < 1:
+                self.circuits_requested_time.setdefault(hops, time.time())
             self.circuits_needed[hops] = max(1, self.settings.max_circuits, self.circuits_needed[hops])
             self.do_circuits()
 
     def do_remove(self):
-        # Remove circuits that are inactive / are too old / have transferred too many bytes.
-        for key, circuit in self.circuits.items():
-            if circuit.last_incoming < time.time() - self.settings.max_time_inactive:
-                self.remove_circuit(key, 'no activity')
-            elif circuit.creation_time < time.time() - self.settings.max_time:
-                self.remove_circuit(key, 'too old')
-            elif circuit.bytes_up + circuit.bytes_down > self.settings.max_traffic:
-                self.remove_circuit(key, 'traffic limit exceeded')
-
-        # Remove relays that are inactive / are too old / have transferred too many bytes.
-        for key, relay in self.relay_from_to.items():
-            if relay.last_incoming < time.time() - self.settings.max_time_inactive:
-                self.remove_relay(key, 'no activity', both_sides=False)
-            elif relay.creation_time < time.time() - self.settings.max_time:
-                self.remove_relay(key, 'too old', both_sides=False)
-            elif relay.bytes_up + relay.bytes_down > self.settings.max_traffic:
-                self.remove_relay(key, 'traffic limit exceeded', both_sides=False)
-
-        # Remove exit sockets that are too old / have transferred too many bytes.
-        for circuit_id, exit_socket in self.exit_sockets.items():
-            if exit_socket.creation_time < time.time() - self.settings.max_time:
-                self.remove_exit_socket(circuit_id, 'too old')
-            elif exit_socket.bytes_up + exit_socket.bytes_down > self.settings.max_traffic:
-                self.remove_exit_socket(circuit_id, 'traffic limit exceeded')
+        # Remove circuits/relays/exit sockets that are inactive / are too old / have transferred too many bytes.
+        now = time.time()
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            _, _, kind, key, obj = heappop(self.expiry_heap)
+            self.check_expiry(kind, key, obj, now)
 
         # Remove exit_candidates that are not returned as dispersy verified candidates
         current_candidates = set(c.get_member().public_key for c in self.dispersy_yield_verified_candidates())
@@ -484,6 +529,96 @@ class TunnelCommunity(Community):
                 self.exit_candidates.pop(pubkey)
                 self.tunnel_logger.info("Removed candidate from exit_candidates dictionary")
 
+    def get_expiry_objects(self, kind):
+        return {u"circuit": self.circuits, u"relay": self.relay_from_to, u"exit": self.exit_sockets}[kind]
+
+    def get_expiry_deadline(self, kind, obj):
+        deadline = obj.creation_time + self.settings.max_time
+        if kind != u"exit":
+            deadline = min(deadline, obj.last_incoming + self.settings.max_time_inactive)
+        return deadline
+
+    def schedule_expiry(self, kind, key, obj, deadline=None):
+        """
+        Schedule a check whether a circuit, relay or exit socket should be removed.
+        :param kind: either u"circuit", u"relay" or u"exit".
+        :param key: the key of the object in self.circuits, self.relay_from_to or self.exit_sockets.
+        :param obj: the circuit, relay or exit socket.
+        :param deadline: when to check the object, by default when it will be too old or inactive.
+        """
+        self.expiry_keys[obj] = (kind, key)
+        if deadline is None:
+            deadline = self.get_expiry_deadline(kind, obj)
+        heappush(self.expiry_heap, (deadline, next(self.expiry_counter), kind, key, obj))
+
+    def check_expiry(self, kind, key, obj, now):
+        if self.get_expiry_objects(kind).get(key) is not obj:
+            # The object has been removed already
+            self.expiry_keys.pop(obj, None)
+            return
+
+        if kind != u"exit" and obj.last_incoming < now - self.settings.max_time_inactive:
+            reason = 'no activity'
+        elif obj.creation_time < now - self.settings.max_time:
+            reason = 'too old'
+        elif obj.bytes_up + obj.bytes_down > self.settings.max_traffic:
+            reason = 'traffic limit exceeded'
+        else:
+            # The object has been active since it was scheduled, check it again at its new deadline
+            self.schedule_expiry(kind, key, obj)
+            return
+
+        if kind == u"circuit":
+            self.remove_circuit(key, reason)
+        elif kind == u"relay":
+            self.remove_relay(key, reason, both_sides=False)
+        else:
+            self.remove_exit_socket(key, reason)
+
+    def check_traffic_limit(self, obj, num_bytes):
+        """
+        Schedule an immediate expiry check for an object that crossed the traffic limit by transferring num_bytes.
+        """
+        if obj not in self.expiry_keys:
+            return
+
+        total_bytes = obj.bytes_up + obj.bytes_down
+        if total_bytes > self.settings.max_traffic >= total_bytes - num_bytes:
+            kind, key = self.expiry_keys[obj]
+            self.schedule_expiry(kind, key, obj, deadline=0)
+
+    def index_circuit(self, circuit):
+        """
+        Add a circuit to (or update it in) the circuit indexes, e.g. after its state or number of hops changed.
+        """
+        self.unindex_circuit(circuit)
+        index_key = (circuit.ctype, circuit.state, len(circuit.hops))
+        self.circuits_index[index_key][circuit.circuit_id] = circuit
+        self.circuits_index_keys[circuit.circuit_id] = index_key
+        self.circuits_first_hops[circuit.first_hop] += 1
+
+    def unindex_circuit(self, circuit):
+        index_key = self.circuits_index_keys.pop(circuit.circuit_id, None)
+        if index_key is None:
+            return
+
+        circuits = self.circuits_index[index_key]
+        circuits.pop(circuit.circuit_id, None)
+        if not circuits:
+            del self.circuits_index[index_key]
+
+        self.circuits_first_hops[circuit.first_hop] -= 1
+        if self.circuits_first_hops[circuit.first_hop] <= 0:
+            del self.circuits_first_hops[circuit.first_hop]
+
+    def get_indexed_circuits(self, ctype, state=None, hops=None):
+        circuits = {}
+        for (index_ctype, index_state, index_hops), indexed_circuits in self.circuits_index.iteritems():
+            if index_ctype == ctype and (state is None or index_state == state) and \
+               (hops is None or index_hops == hops):
+                circuits.update(indexed_circuits)
+        return circuits
+
     def create_circuit(self, goal_hops, ctype=CIRCUIT_TYPE_DATA, callback=None, required_endpoint=None, info_hash=None):
         assert required_endpoint is None or isinstance(required_endpoint, tuple), type(required_endpoint)
         assert required_endpoint is None or len(required_endpoint) == 3, required_endpoint
@@ -516,9 +651,8 @@ class TunnelCommunity(Community):
             first_hop.associate(self.get_member(public_key=required_endpoint[2]))
         else:
             self.tunnel_logger.info("Look for a first hop that is not an exit node and is not used before")
-            hops = set([c.first_hop for c in self.circuits.values()])
             for c in self.dispersy_yield_verified_candidates():
-                if (c.sock_addr not in hops) and self.crypto.is_key_compatible(c.get_member()._ec) and \
+                if (c.sock_addr not in self.circuits_first_hops) and self.crypto.is_key_compatible(c.get_member()._ec) and \
                    (not required_endpoint or c.sock_addr != tuple(required_endpoint[:2])) and \
                    not self.exit_candidates[c.get_member().public_key].become_exit:
                     first_hop = c
@@ -540,12 +674,14 @@ class TunnelCommunity(Community):
 
         circuit.unverified_hop = Hop(first_hop.get_member()._ec)
         circuit.unverified_hop.address = first_hop.sock_addr
-        circuit.unverified_hop.dh_secret, circuit.unverified_hop.dh_first_part = self.crypto.generate_diffie_secret()
+        circuit.unverified_hop.dh_secret, circuit.unverified_hop.dh_first_part = self.generate_diffie_secret()
 
         self.tunnel_logger.info("creating circuit %d of %d hops. First hop: %s:%d", circuit_id, circuit.goal_hops,
                            first_hop.sock_addr[0], first_hop.sock_addr[1])
 
         self.circuits[circuit_id] = circuit
+        self.index_circuit(circuit)
+        self.schedule_expiry(u"circuit", circuit_id, circuit)
 
         self.increase_bytes_sent(circuit, self.send_cell([first_hop],
                                                          u"create", (circuit_id,
@@ -557,6 +693,19 @@ class TunnelCommunity(Community):
                                                (first_hop.sock_addr[0], first_hop.sock_addr[1]))
         return circuit_id
 
+    def generate_diffie_secret(self):
+        if self.dh_key_pool:
+            return self.dh_key_pool.get()
+        return self.crypto.generate_diffie_secret()
+
+    def log_tunnels_ready(self, hops):
+        """
+        Log how long it took before the circuits a download asked for became ready.
+        """
+        if hops in self.circuits_requested_time and self.tunnels_ready(hops) >= 1:
+            self.tunnel_logger.info("Circuits of length %d became ready %.2f seconds after they were requested",
+                                    hops, time.time() - self.circuits_requested_time.pop(hops))
+
     def readd_bittorrent_peers(self):
         for torrent, peers in self.bittorrent_peers.items():
             infohash = torrent.tdef.get_infohash().encode("hex")
@@ -577,6 +726,9 @@ class TunnelCommunity(Community):
                 self.destroy_circuit(circuit_id)
 
             circuit = self.circuits.pop(circuit_id)
+            self.unindex_circuit(circuit)
+            self.expiry_keys.pop(circuit, None)
+            self.selection_strategy.on_circuit_removed(circuit)
             if self.notifier:
                 peer = (circuit.first_hop[0], circuit.first_hop[1])
                 candidate = self.get_candidate(peer)
@@ -627,6 +779,7 @@ class TunnelCommunity(Community):
                 self.tunnel_logger.warning("Removing relay %d %s", cid, additional_info)
                 # Remove the relay
                 relay = self.relay_from_to.pop(cid)
+                self.expiry_keys.pop(relay, None)
                 if self.notifier:
                     peer = (relay.sock_addr[0], relay.sock_addr[1])
                     candidate = self.get_candidate(peer)
@@ -651,6 +804,7 @@ class TunnelCommunity(Community):
 
             # Close socket
             exit_socket = self.exit_sockets.pop(circuit_id)
+            self.expiry_keys.pop(exit_socket, None)
             if self.notifier:
                 peer = (exit_socket.sock_addr[0], exit_socket.sock_addr[1])
                 candidate = self.get_candidate(peer)
@@ -705,13 +859,10 @@ class TunnelCommunity(Community):
             self.tunnel_logger.error("could not destroy exit socket %d %s", circuit_id, reason)
 
     def data_circuits(self, hops=None):
-        return {cid: c for cid, c in self.circuits.items()
-                if c.ctype == CIRCUIT_TYPE_DATA and (hops is None or hops == len(c.hops))}
+        return self.get_indexed_circuits(CIRCUIT_TYPE_DATA, hops=hops)
 
     def active_data_circuits(self, hops=None):
-        return {cid: c for cid, c in self.circuits.items()
-                if c.state == CIRCUIT_STATE_READY and c.ctype == CIRCUIT_TYPE_DATA and
-                (hops is None or hops == len(c.hops))}
+        return self.get_indexed_circuits(CIRCUIT_TYPE_DATA, CIRCUIT_STATE_READY, hops)
 
     def is_relay(self, circuit_id):
         return circuit_id > 0 and circuit_id in self.relay_from_to
@@ -892,6 +1043,7 @@ class TunnelCommunity(Community):
 
         circuit.add_hop(hop)
         circuit.unverified_hop = None
+        self.index_circuit(circuit)
 
         if circuit.state == CIRCUIT_STATE_EXTENDING:
             ignore_candidates = [self.crypto.key_to_bin(hop.public_key) for hop in circuit.hops] + \
@@ -930,7 +1082,7 @@ class TunnelCommunity(Community):
                 extend_hop_public_key = self.dispersy.crypto.key_from_public_bin(extend_hop_public_bin)
                 circuit.unverified_hop = Hop(extend_hop_public_key)
                 circuit.unverified_hop.dh_secret, circuit.unverified_hop.dh_first_part = \
-                    self.crypto.generate_diffie_secret()
+                    self.generate_diffie_secret()
 
                 self.tunnel_logger.info("extending circuit %d with %s", circuit.circuit_id,
                                         extend_hop_public_bin.encode('hex'))
@@ -948,6 +1100,8 @@ class TunnelCommunity(Community):
 
         elif circuit.state == CIRCUIT_STATE_READY:
             self.request_cache.pop(u"anon-circuit", circuit.circuit_id)
+            self.selection_strategy.on_circuit_ready(circuit)
+            self.log_tunnels_ready(len(circuit.hops))
             # Re-add BitTorrent peers, if needed.
             self.readd_bittorrent_peers()
 
@@ -1046,6 +1200,7 @@ class TunnelCommunity(Community):
             if candidate.get_member() is not None:
                 candidate_mid = candidate.get_member().mid.encode('hex')
             self.exit_sockets[circuit_id] = TunnelExitSocket(circuit_id, self, candidate.sock_addr, candidate_mid)
+            self.schedule_expiry(u"exit", circuit_id, self.exit_sockets[circuit_id])
 
             if self.notifier:
                 from Tribler.Core.simpledefs import NTFY_TUNNEL, NTFY_JOINED
@@ -1073,6 +1228,8 @@ class TunnelCommunity(Community):
                 self.relay_from_to[request.from_circuit_id] = RelayRoute(request.to_circuit_id,
                                                                          request.to_candidate_sock_addr,
                                                                          mid=request.to_candidate_mid)
+                self.schedule_expiry(u"relay", request.to_circuit_id, forwarding_relay)
+                self.schedule_expiry(u"relay", request.from_circuit_id, self.relay_from_to[request.from_circuit_id])
 
                 self.relay_session_keys[request.to_circuit_id] = self.relay_session_keys[request.from_circuit_id]
 
@@ -1189,10 +1346,13 @@ class TunnelCommunity(Community):
 
     def on_pong(self, messages):
         for message in messages:
-            self.request_cache.pop(u"ping", message.payload.identifier)
+            cache = self.request_cache.pop(u"ping", message.payload.identifier)
+            self.selection_strategy.on_rtt(cache.circuit, time.time() - cache.sent_time)
             self.tunnel_logger.info("Got pong from %s", message.candidate)
 
     def do_ping(self):
+        self.selection_strategy.update_throughput()
+
         # Ping circuits. Pings are only sent to the first hop, subsequent hops will relay the ping.
         for circuit in self.circuits.values():
             if circuit.state == CIRCUIT_STATE_READY and circuit.ctype != CIRCUIT_TYPE_RENDEZVOUS:
@@ -1361,16 +1521,19 @@ class TunnelCommunity(Community):
     def increase_bytes_sent(self, obj, num_bytes):
         if isinstance(obj, Circuit):
             obj.bytes_up += num_bytes
+            self.check_traffic_limit(obj, num_bytes)
             self.stats['bytes_up'] += num_bytes
             _barter_statistics.dict_inc_bartercast(BartercastStatisticTypes.TUNNELS_BYTES_SENT, "%s:%s" %
                                                    (obj.first_hop[0], obj.first_hop[1]), num_bytes)
         elif isinstance(obj, RelayRoute):
             obj.bytes_up += num_bytes
+            self.check_traffic_limit(obj, num_bytes)
             self.stats['bytes_relay_up'] += num_bytes
             _barter_statistics.dict_inc_bartercast(BartercastStatisticTypes.TUNNELS_RELAY_BYTES_SENT, "%s:%s" %
                                                    (obj.sock_addr[0], obj.sock_addr[1]), num_bytes)
         elif isinstance(obj, TunnelExitSocket):
             obj.bytes_up += num_bytes
+            self.check_traffic_limit(obj, num_bytes)
             self.stats['bytes_exit'] += num_bytes
             _barter_statistics.dict_inc_bartercast(BartercastStatisticTypes.TUNNELS_EXIT_BYTES_SENT, "%s:%s" %
                                                    (obj.sock_addr[0], obj.sock_addr[1]), num_bytes)
@@ -1378,16 +1541,19 @@ class TunnelCommunity(Community):
     def increase_bytes_received(self, obj, num_bytes):
         if isinstance(obj, Circuit):
             obj.bytes_down += num_bytes
+            self.check_traffic_limit(obj, num_bytes)
             self.stats['bytes_down'] += num_bytes
             _barter_statistics.dict_inc_bartercast(BartercastStatisticTypes.TUNNELS_BYTES_RECEIVED, "%s:%s" %
                                                    (obj.first_hop[0], obj.first_hop[1]), num_bytes)
         elif isinstance(obj, RelayRoute):
             obj.bytes_down += num_bytes
+            self.check_traffic_limit(obj, num_bytes)
             self.stats['bytes_relay_down'] += num_bytes
             _barter_statistics.dict_inc_bartercast(BartercastStatisticTypes.TUNNELS_RELAY_BYTES_RECEIVED, "%s:%s" %
                                                    (obj.sock_addr[0], obj.sock_addr[1]), num_bytes)
         elif isinstance(obj, TunnelExitSocket):
             obj.bytes_down += num_bytes
+            self.check_traffic_limit(obj, num_bytes)
             self.stats['bytes_enter'] += num_bytes
             _barter_statistics.dict_inc_bartercast(BartercastStatisticTypes.TUNNELS_EXIT_BYTES_RECEIVED, "%s:%s" %
                                                    (obj.sock_addr[0], obj.sock_addr[1]), num_bytes)
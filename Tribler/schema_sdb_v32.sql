@@ -19,7 +19,7 @@ CREATE TABLE MyPreference (
 
 CREATE TABLE Peer (
   peer_id    integer PRIMARY KEY AUTOINCREMENT NOT NULL,
-  permid     text NOT NULL,
+  permid     blob NOT NULL,
   name       text,
   thumbnail  text
 );
@@ -32,7 +32,7 @@ CREATE UNIQUE INDEX permid_idx
 
 CREATE TABLE Torrent (
   torrent_id       integer PRIMARY KEY AUTOINCREMENT NOT NULL,
-  infohash		   text NOT NULL,
+  infohash		   blob NOT NULL,
   name             text,
   length           integer,
   creation_date    integer,
@@ -49,13 +49,41 @@ CREATE TABLE Torrent (
   is_collected     integer DEFAULT 0,
   last_tracker_check    integer DEFAULT 0,
   tracker_check_retries integer DEFAULT 0,
-  next_tracker_check    integer DEFAULT 0
+  next_tracker_check    integer DEFAULT 0,
+  eviction_weight  numeric
 );
 
 CREATE UNIQUE INDEX infohash_idx
   ON Torrent
   (infohash);
 
+-- The collected torrents with the lowest eviction weight are removed first when the collected torrent limit is
+-- reached. Instead of penalizing the age of a torrent, the weight includes its creation date (in days, capped at 500
+-- days before the weight was computed), so it only has to be recomputed when the torrent is updated.
+CREATE TRIGGER TorEvictionWeightInsert AFTER INSERT ON Torrent
+BEGIN
+  UPDATE Torrent SET eviction_weight = MIN(NEW.relevance, 2500) + MIN(500, NEW.num_leechers) + 4 * MIN(500, NEW.num_seeders) + MAX(MIN(NEW.creation_date, CAST(strftime('%s', 'now') AS integer)), CAST(strftime('%s', 'now', '-500 days') AS integer)) / 86400 WHERE torrent_id == NEW.torrent_id;
+END;
+
+CREATE TRIGGER TorEvictionWeightUpdate AFTER UPDATE OF relevance, num_seeders, num_leechers, creation_date ON Torrent
+BEGIN
+  UPDATE Torrent SET eviction_weight = MIN(NEW.relevance, 2500) + MIN(500, NEW.num_leechers) + 4 * MIN(500, NEW.num_seeders) + MAX(MIN(NEW.creation_date, CAST(strftime('%s', 'now') AS integer)), CAST(strftime('%s', 'now', '-500 days') AS integer)) / 86400 WHERE torrent_id == NEW.torrent_id;
+END;
+
+CREATE INDEX TorEvictionIndex
+  ON Torrent
+  (eviction_weight) WHERE is_collected == 1;
+
+-- The tracker checker selects the torrents that are due for a check by next_tracker_check
+CREATE INDEX TorNextTrackerCheckIndex
+  ON Torrent
+  (next_tracker_check);
+
+-- Counting, listing and sampling the collected torrents by insert time
+CREATE INDEX TorCollectedIndex
+  ON Torrent
+  (insert_time) WHERE is_collected == 1;
+
 ----------------------------------------
 
 CREATE TABLE TrackerInfo (
@@ -74,6 +102,11 @@ CREATE TABLE TorrentTrackerMapping (
   PRIMARY KEY (torrent_id, tracker_id)
 );
 
+-- Looking up the torrents of a tracker, the primary key only covers the trackers of a torrent
+CREATE INDEX TorTrackerMapTrackerIndex
+  ON TorrentTrackerMapping
+  (tracker_id, torrent_id);
+
 ----------------------------------------
 
 CREATE VIEW CollectedTorrent AS SELECT * FROM Torrent WHERE is_collected == 1;
@@ -267,7 +300,9 @@ CREATE TABLE IF NOT EXISTS _TorrentMarkings (
 CREATE VIEW TorrentMarkings AS SELECT * FROM _TorrentMarkings WHERE deleted_at IS NULL;
 CREATE INDEX IF NOT EXISTS TorMarkIndex ON _TorrentMarkings(channeltorrent_id);
 
-CREATE VIRTUAL TABLE FullTextIndex USING fts3(swarmname, filenames, fileextensions);
+-- matchinfo=fts3 omits the document sizes, we do not use the matchinfo() statistics that need them
+CREATE VIRTUAL TABLE FullTextIndex USING fts4(swarmname, filenames, fileextensions, matchinfo=fts3);
+INSERT INTO FullTextIndex(FullTextIndex) VALUES('automerge=8');
 
 -------------------------------------
 
@@ -277,7 +312,7 @@ COMMIT TRANSACTION create_table;
 
 BEGIN TRANSACTION init_values;
 
-INSERT INTO MyInfo VALUES ('version', 28);
+INSERT INTO MyInfo VALUES ('version', 32);
 
 INSERT INTO TrackerInfo (tracker) VALUES ('no-DHT');
 INSERT INTO TrackerInfo (tracker) VALUES ('DHT');